@@ -0,0 +1,80 @@
+# benchmarks.ciphertext_formats.py
+"""
+Compare les formats de mots de passe chiffrés : jeton Fernet texte (historique), jeton Fernet binaire (en-tête 0x80)
+et AES-GCM (en-tête 0x01, format par défaut). Pour chacun : octets par ligne (valeur seule, puis fichier SQLite),
+débit de chiffrement et de déchiffrement (objet de chiffrement construit une fois, comme dans le coffre).
+
+Usage: python -m benchmarks.ciphertext_formats [LIGNES]   (par défaut: 10000)
+"""
+
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from cryptography.fernet import Fernet
+
+from pg.utils.security import CIPHER_AES_GCM, CIPHER_FERNET, generate_key, get_cipher
+
+DEFAULT_ROWS = 10_000
+FORMATS = (
+    ("fernet (texte)", CIPHER_FERNET, True),
+    ("fernet (binaire)", CIPHER_FERNET, False),
+    ("aes-gcm", CIPHER_AES_GCM, False),
+)
+
+
+def database_bytes_per_row(directory: Path, name: str, values: list) -> float:
+    """
+    Taille du fichier SQLite (table réduite à l'identifiant et au mot de passe chiffré) divisée par le nombre de lignes
+    """
+    path = directory / f"{name.replace(' ', '_').strip('()')}.db"
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute("CREATE TABLE password (id INTEGER PRIMARY KEY, password_encrypted BLOB)")
+        connection.executemany("INSERT INTO password (password_encrypted) VALUES (?)", ((value,) for value in values))
+    connection.execute("VACUUM")
+    connection.close()
+    return path.stat().st_size / len(values)
+
+def run(rows: int, directory: Path) -> dict[str, dict]:
+    key = generate_key()
+    passwords = [f"mot-de-passe-{i}" for i in range(rows)]
+    results = {}
+    for name, algorithm, text in FORMATS:
+        cipher = get_cipher(key, algorithm)
+        # Stockage historique : jeton base64 produit directement par Fernet
+        encrypt = (lambda password, fernet=Fernet(key.encode()): fernet.encrypt(password.encode()).decode()) if text else cipher.encrypt
+        start = time.perf_counter()
+        values = [encrypt(password) for password in passwords]
+        encrypt_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        decrypted = [cipher.decrypt(value) for value in values]
+        decrypt_seconds = time.perf_counter() - start
+        if decrypted != passwords:
+            raise RuntimeError(f"Déchiffrement incorrect pour le format {name}")
+
+        results[name] = {
+            "value_bytes": sum(len(value) for value in values) / rows,
+            "database_bytes": database_bytes_per_row(directory, name, values),
+            "encrypt_per_s": rows / encrypt_seconds,
+            "decrypt_per_s": rows / decrypt_seconds,
+        }
+    return results
+
+def main(rows: int = DEFAULT_ROWS):
+    with tempfile.TemporaryDirectory() as directory:
+        results = run(rows, Path(directory))
+    print(f"{rows} lignes")
+    print(f"{'format':>18} {'octets/valeur':>14} {'octets/ligne (base)':>20} {'chiffr./s':>10} {'déchiffr./s':>12}")
+    for name, result in results.items():
+        print(
+            f"{name:>18} {result['value_bytes']:>14.1f} {result['database_bytes']:>20.1f} "
+            f"{result['encrypt_per_s']:>10.0f} {result['decrypt_per_s']:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
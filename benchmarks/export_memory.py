@@ -0,0 +1,64 @@
+# benchmarks.export_memory.py
+"""
+Mesure le pic mémoire de l'export CSV selon la taille du coffre.
+
+Usage: python -m benchmarks.export_memory [TAILLE ...]   (par défaut: 1000 10000 100000)
+"""
+
+import sys
+import time
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from sqlmodel import SQLModel, Session, create_engine
+
+from pg.data.database import insert_many
+from pg.data.models import User, Password
+from pg.data.vault import Vault
+from pg.services.password import export_passwords
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+
+def populate(engine, size: int) -> User:
+    SQLModel.metadata.create_all(engine)
+    user = User.create(engine=engine, username="benchmark", password="Benchmark1!")
+    vault = Vault(user)
+    with Session(engine) as session:
+        for start in range(0, size, 5000):
+            insert_many(Password, [
+                {
+                    "user_id": user.id,
+                    "url": f"https://site{i}.example.com/",
+                    "key": f"utilisateur{i}",
+                    "password_encrypted": vault.encrypt(f"mot-de-passe-{i}"),
+                    "description": "Compte de test",
+                }
+                for i in range(start, min(start + 5000, size))
+            ], session=session)
+    return user
+
+def run(size: int, directory: Path) -> dict:
+    engine = create_engine(f"sqlite:///{directory / f'export_{size}.db'}")
+    user = populate(engine, size)
+    with Session(engine) as session:
+        tracemalloc.start()
+        start = time.perf_counter()
+        export_passwords(user, directory / f"export_{size}.csv", session=session)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    engine.dispose()
+    return {"rows": size, "seconds": elapsed, "peak_kib": peak / 1024}
+
+def main(sizes: list[int]):
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'lignes':>10} {'durée (s)':>10} {'pic mémoire (Kio)':>18}")
+        for size in sizes:
+            result = run(size, Path(directory))
+            print(f"{result['rows']:>10} {result['seconds']:>10.2f} {result['peak_kib']:>18.0f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or list(DEFAULT_SIZES))
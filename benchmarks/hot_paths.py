@@ -0,0 +1,156 @@
+# benchmarks.hot_paths.py
+"""
+Mesure les chemins critiques sur un coffre jetable de chaque taille : hachage, chiffrement et déchiffrement,
+création et lecture d'un mot de passe, recherche approximative, import et export CSV, et mise en forme
+des lignes du tableau (sans affichage).
+
+Les résultats peuvent être écrits en JSON (--json) et comparés à une exécution précédente (--baseline) :
+le script échoue si une opération est plus lente que la référence au-delà de la tolérance.
+
+Usage: python -m benchmarks.hot_paths [TAILLE ...] [--json resultats.json] [--baseline reference.json] [--tolerance 0.25]
+       (tailles par défaut: 1000 10000 100000)
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from sqlmodel import SQLModel, Session, create_engine
+
+from pg.data.database import apply_sqlite_profile, insert_many
+from pg.data.migrations import migrate
+from pg.data.models import User, Password
+from pg.data.vault import unlock, lock
+from pg.services.password import similar_passwords, import_passwords, export_passwords
+from pg.utils.security import hash_password, verify_password, encrypt_password, decrypt_password
+from pg.view.password import fetch_password_rows
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+SAMPLES = 1_000  # Appels mesurés pour les opérations unitaires (création, lecture)
+HASH_SAMPLES = 5  # Hachages et vérifications du mot de passe maître mesurés
+QUERIES = 100  # Recherches mesurées une fois l'index construit
+SEARCH_TERMS = ("site1", "example", "utilisateur42", "exmaple", "site99.exmple")
+PASSWORD = "Benchmark1!"
+
+
+def measure(operations: int, func: Callable[[], object]) -> tuple[dict, object]:
+    """
+    Exécute `func` (qui réalise `operations` opérations) et retourne ses mesures et son résultat
+    """
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    return {
+        "operations": operations,
+        "seconds": seconds,
+        "per_s": operations / seconds if seconds else float("inf"),
+        "mean_us": seconds / operations * 1_000_000,
+    }, result
+
+def run(size: int, directory: Path) -> dict[str, dict]:
+    engine = apply_sqlite_profile(create_engine(f"sqlite:///{directory / f'hot_paths_{size}.db'}"))
+    SQLModel.metadata.create_all(engine)
+    migrate(engine)
+    user = User.create(engine=engine, username="benchmark", password=PASSWORD)
+    vault = unlock(user, engine)
+    results = {}
+
+    # Coûteux par conception (calibré sur KDF_TARGET_SECONDS) : quelques appels suffisent
+    password_hash = hash_password(PASSWORD)
+    results["hash_password"], _ = measure(HASH_SAMPLES, lambda: [hash_password(PASSWORD) for _ in range(HASH_SAMPLES)])
+    results["verify_password"], _ = measure(HASH_SAMPLES, lambda: [verify_password(PASSWORD, password_hash) for _ in range(HASH_SAMPLES)])
+
+    clear_passwords = [f"mot-de-passe-{i}" for i in range(size)]
+    results["encrypt_password"], tokens = measure(size, lambda: [encrypt_password(password, user.encryption_key) for password in clear_passwords])
+    results["decrypt_password"], _ = measure(size, lambda: [decrypt_password(token, user.encryption_key) for token in tokens])
+    results["Vault.decrypt_many"], _ = measure(size, lambda: list(vault.decrypt_many(tokens)))
+
+    with Session(engine) as session:
+        for start in range(0, size, 5000):
+            insert_many(Password, [
+                {"user_id": user.id, "url": f"https://site{i}.example.com/", "key": f"utilisateur{i}", "password_encrypted": tokens[i]}
+                for i in range(start, min(start + 5000, size))
+            ], session=session)
+
+    # Une transaction par création, comme depuis l'interface
+    results["Password.create"], created = measure(SAMPLES, lambda: [
+        Password.create(engine=engine, user_id=user.id, url=f"https://nouveau{i}.example.com/", key=f"utilisateur{i}", password="Motdepasse1!")
+        for i in range(SAMPLES)
+    ])
+    ids = random.choices([password.id for password in created] + list(range(1, size + 1)), k=SAMPLES)
+    results["Password.get_by_id"], _ = measure(SAMPLES, lambda: [Password.get_by_id(password_id, engine=engine) for password_id in ids])
+
+    with Session(engine) as session:
+        results["similar_passwords (index)"], _ = measure(1, lambda: similar_passwords(user, session, SEARCH_TERMS[0]))
+        queries = [random.choice(SEARCH_TERMS) for _ in range(QUERIES)]
+        results["similar_passwords"], _ = measure(QUERIES, lambda: [similar_passwords(user, session, query) for query in queries])
+
+    export_file = directory / f"export_{size}.csv"
+    with Session(engine) as session:
+        results["export_passwords"], _ = measure(size + SAMPLES, lambda: export_passwords(user, export_file, session=session))
+
+    importer = User.create(engine=engine, username="import", password=PASSWORD)
+    unlock(importer, engine)
+    with Session(engine) as session:
+        results["import_passwords"], summary = measure(size + SAMPLES, lambda: import_passwords(importer, export_file, session=session))
+    if summary.inserted != size + SAMPLES:
+        raise RuntimeError(f"Import incomplet: {summary}")
+
+    results["load_passwords"], _ = measure(size + SAMPLES, lambda: fetch_password_rows(user, limit=size + SAMPLES, decrypted_passwords=True, engine=engine))
+
+    lock(importer.id, engine)
+    lock(user.id, engine)
+    engine.dispose()
+    return results
+
+def regressions(results: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    """
+    Retourne les opérations dont la durée moyenne dépasse celle de la référence de plus de `tolerance`
+    """
+    found = []
+    for size, operations in results.items():
+        for name, result in operations.items():
+            reference = baseline.get(size, {}).get(name)
+            if reference and result["mean_us"] > reference["mean_us"] * (1 + tolerance):
+                found.append(f"{name} ({size} lignes): {result['mean_us']:.1f} µs contre {reference['mean_us']:.1f} µs")
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesure les chemins critiques de PG selon la taille du coffre")
+    parser.add_argument("sizes", nargs="*", type=int, default=list(DEFAULT_SIZES), help="Tailles de coffre")
+    parser.add_argument("--json", help="Écrit les résultats dans ce fichier JSON")
+    parser.add_argument("--baseline", help="Fichier JSON d'une exécution précédente à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Ralentissement toléré par rapport à la référence (0.25 : 25 %%)")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'lignes':>8} {'opération':>26} {'opérations':>11} {'durée (s)':>10} {'op/s':>10} {'moyenne (µs)':>13}")
+        for size in args.sizes:
+            results[str(size)] = run(size, Path(directory))
+            for name, result in results[str(size)].items():
+                print(f"{size:>8} {name:>26} {result['operations']:>11} {result['seconds']:>10.3f} {result['per_s']:>10.0f} {result['mean_us']:>13.1f}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "date": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }, indent=2))
+    if args.baseline:
+        found = regressions(results, json.loads(Path(args.baseline).read_text())["results"], args.tolerance)
+        for regression in found:
+            print(f"Régression - {regression}", file=sys.stderr)
+        sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# benchmarks.kdf_calibration.py
+"""
+Calibre chaque fonction de dérivation disponible sur cette machine et mesure la durée de vérification obtenue,
+à comparer à la durée visée (PG_KDF_TARGET_MS, 250 ms par défaut).
+
+Usage: python -m benchmarks.kdf_calibration [CIBLE_MS]
+"""
+
+import statistics
+import sys
+import time
+
+from pg.utils.security import KDF_TARGET_SECONDS, calibrate, hash_password, verify_password, supported_algorithms
+
+SAMPLES = 5
+
+
+def run(algorithm: str, target_seconds: float) -> dict:
+    start = time.perf_counter()
+    parameters = calibrate(algorithm, target_seconds)
+    calibration_seconds = time.perf_counter() - start
+    password_hash = hash_password("Calibration1!", algorithm, parameters)
+    timings = []
+    for _ in range(SAMPLES):
+        start = time.perf_counter()
+        verify_password("Calibration1!", password_hash)
+        timings.append(time.perf_counter() - start)
+    return {
+        "algorithm": algorithm,
+        "parameters": parameters,
+        "calibration_s": calibration_seconds,
+        "verify_ms": statistics.median(timings) * 1000,
+    }
+
+def main(target_ms: float | None = None):
+    target_seconds = target_ms / 1000 if target_ms else KDF_TARGET_SECONDS
+    print(f"Durée visée: {target_seconds * 1000:.0f} ms")
+    print(f"{'algorithme':>14} {'paramètres':>28} {'calibration (s)':>16} {'vérification (ms)':>18}")
+    for algorithm in supported_algorithms():
+        result = run(algorithm, target_seconds)
+        parameters = ",".join(f"{key}={value}" for key, value in result["parameters"].items())
+        print(f"{algorithm:>14} {parameters:>28} {result['calibration_s']:>16.2f} {result['verify_ms']:>18.0f}")
+
+
+if __name__ == "__main__":
+    main(*(float(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,208 @@
+# benchmarks.load_test.py
+"""
+Test de charge du mode serveur : débit (requêtes/s) et latences (p50, p99) par route, avec plusieurs clients simultanés.
+
+Sans --url, un serveur est démarré dans un sous-processus sur une base temporaire pré-remplie.
+
+Usage: python -m benchmarks.load_test [--clients 16] [--duration 10] [--rows 10000] [--url http://127.0.0.1:8157]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from sqlmodel import SQLModel, create_engine
+
+from pg.data.database import apply_sqlite_profile, insert_many
+from pg.data.migrations import migrate
+from pg.data.models import User, Password
+from pg.data.vault import unlock, lock
+
+USERNAME = "benchmark"
+PASSWORD = "Benchmark1!"
+SEARCH_TERMS = ("site1", "example", "utilisateur42", "site", "exmaple")
+
+# Répartition des requêtes : surtout des lectures, quelques écritures
+MIX = (
+    ("page", 40),
+    ("get", 30),
+    ("search", 20),
+    ("create", 7),
+    ("update", 3),
+)
+
+
+def seed(database: Path, rows: int):
+    engine = apply_sqlite_profile(create_engine(f"sqlite:///{database}"))
+    SQLModel.metadata.create_all(engine)
+    migrate(engine)
+    user = User.create(engine=engine, username=USERNAME, password=PASSWORD)
+    vault = unlock(user, engine)
+    token = vault.encrypt("Motdepasse1!")
+    for start in range(0, rows, 1000):
+        insert_many(Password, [
+            {"user_id": user.id, "url": f"https://site{i}.example.com/", "key": f"utilisateur{i}", "password_encrypted": token}
+            for i in range(start, min(start + 1000, rows))
+        ], engine=engine)
+    lock(user.id, engine)
+    engine.dispose()
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(directory: Path, port: int) -> subprocess.Popen:
+    environment = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(Path(__file__).resolve().parent.parent), os.environ.get("PYTHONPATH")]))}
+    process = subprocess.Popen([sys.executable, "-m", "pg", "-m", "server", "--port", str(port), "-q"], cwd=directory, env=environment, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError("Le serveur s'est arrêté au démarrage")
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Le serveur n'a pas démarré à temps")
+
+
+class Client:
+    def __init__(self, host: str, port: int):
+        self.connection = http.client.HTTPConnection(host, port, timeout=30)
+        self.token = None
+
+    def request(self, method: str, path: str, body: dict | None = None) -> tuple[int, dict | None]:
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        self.connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        return response.status, json.loads(data) if data else None
+
+    def login(self):
+        status, data = self.request("POST", "/api/login", {"username": USERNAME, "password": PASSWORD})
+        if status != 200:
+            raise RuntimeError(f"Connexion impossible: {data}")
+        self.token = data["token"]
+
+
+def worker(host: str, port: int, ids: list[int], deadline: float, latencies: dict[str, list[float]], errors: dict[str, int], lock_: threading.Lock):
+    client = Client(host, port)
+    client.login()
+    routes, weights = zip(*MIX)
+    local_latencies, local_errors = defaultdict(list), defaultdict(int)
+    cursor = None
+    while time.monotonic() < deadline:
+        route = random.choices(routes, weights)[0]
+        match route:
+            case "page":
+                request = ("GET", "/api/passwords?limit=100" + (f"&after={cursor}" if cursor else ""), None)
+            case "get":
+                request = ("GET", f"/api/passwords/{random.choice(ids)}?reveal=1", None)
+            case "search":
+                request = ("GET", f"/api/passwords/search?q={random.choice(SEARCH_TERMS)}", None)
+            case "create":
+                n = random.randrange(10**9)
+                request = ("POST", "/api/passwords", {"url": f"https://new{n}.example.com", "key": f"k{n}", "password": "Motdepasse1!"})
+            case "update":
+                request = ("PATCH", f"/api/passwords/{random.choice(ids)}", {"description": f"modifié {time.time()}"})
+        start = time.perf_counter()
+        try:
+            status, data = client.request(*request)
+        except (OSError, http.client.HTTPException):
+            local_errors[route] += 1
+            client = Client(host, port)
+            client.login()
+            continue
+        local_latencies[route].append(time.perf_counter() - start)
+        if status >= 400:
+            local_errors[route] += 1
+        elif route == "page":
+            cursor = data.get("next")
+    with lock_:
+        for route, values in local_latencies.items():
+            latencies[route].extend(values)
+        for route, count in local_errors.items():
+            errors[route] += count
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else 0.0
+
+def run(host: str, port: int, clients: int, duration: float) -> dict:
+    probe = Client(host, port)
+    probe.login()
+    _, data = probe.request("GET", f"/api/passwords?limit=1000")
+    ids = [item["id"] for item in data["items"]] or [1]
+
+    latencies, errors, lock_ = defaultdict(list), defaultdict(int), threading.Lock()
+    deadline = time.monotonic() + duration
+    threads = [threading.Thread(target=worker, args=(host, port, ids, deadline, latencies, errors, lock_)) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    results = {}
+    for route in [route for route, _ in MIX] + ["total"]:
+        values = [value for values in latencies.values() for value in values] if route == "total" else latencies[route]
+        results[route] = {
+            "requests": len(values),
+            "errors": sum(errors.values()) if route == "total" else errors[route],
+            "requests_per_s": len(values) / elapsed,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge du mode serveur")
+    parser.add_argument("--url", help="Serveur existant à tester (l'utilisateur benchmark doit exister)")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--rows", type=int, default=10_000, help="Mots de passe de la base temporaire")
+    parser.add_argument("--json", help="Écrit les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        process = None
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+        else:
+            seed(Path(directory) / "password_manager.db", args.rows)
+            host, port = "127.0.0.1", free_port()
+            process = start_server(Path(directory), port)
+        try:
+            results = run(host, port, args.clients, args.duration)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    print(f"{args.clients} clients, {args.duration:.0f} s")
+    print(f"{'route':>8} {'requêtes':>9} {'erreurs':>8} {'req/s':>8} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    for route, result in results.items():
+        print(f"{route:>8} {result['requests']:>9} {result['errors']:>8} {result['requests_per_s']:>8.0f} {result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks.query_counts.py
+"""
+Vérifie que lister, rechercher et exporter N mots de passe coûte un nombre de requêtes SQL indépendant de N
+(chargement anticipé de l'utilisateur, pas de N+1), et que déchiffrer des lignes déjà chargées avec le coffre
+ouvert n'en coûte aucune, en comptant les requêtes émises sur une base jetable.
+
+Échoue (code de sortie 1) si le nombre de requêtes d'un scénario varie avec la taille du coffre, ou si un
+déchiffrement par le coffre émet une requête.
+
+Vérification manuelle : le dépôt n'a pas de suite de tests ni d'intégration continue, ce script n'est lancé
+par rien d'autre ; à exécuter avant de modifier le chargement des mots de passe ou de leur utilisateur.
+
+Usage: python -m benchmarks.query_counts [TAILLE ...]   (par défaut: 10 100 1000)
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+from sqlalchemy import event
+from sqlmodel import SQLModel, Session, create_engine
+
+from pg.data.cache import clear_user_cache
+from pg.data.database import apply_sqlite_profile, insert_many, unit_of_work
+from pg.data.migrations import migrate
+from pg.data.models import User, Password
+from pg.data.vault import unlock, lock
+from pg.services.password import export_passwords, search_passwords
+
+DEFAULT_SIZES = (10, 100, 1_000)
+# Scénarios qui ne doivent émettre aucune requête : le coffre ouvert porte la clé
+ZERO_QUERY_SCENARIOS = ("Password.password", "Vault.decrypt_many")
+
+
+def count_statements(engine, func: Callable[[], object]) -> int:
+    """
+    Exécute `func` et retourne le nombre de requêtes envoyées à la base (cache des utilisateurs vidé au préalable)
+    """
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    clear_user_cache()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        func()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return len(statements)
+
+def run(size: int, directory: Path) -> dict[str, int]:
+    engine = apply_sqlite_profile(create_engine(f"sqlite:///{directory / f'query_counts_{size}.db'}"))
+    SQLModel.metadata.create_all(engine)
+    migrate(engine)
+    user = User.create(engine=engine, username="benchmark", password="Benchmark1!")
+    vault = unlock(user, engine)
+    insert_many(Password, [
+        {"user_id": user.id, "url": f"https://site{i}.example.com/", "key": f"utilisateur{i}", "password_encrypted": vault.encrypt("Motdepasse1!")}
+        for i in range(size)
+    ], engine=engine)
+
+    def export():
+        with Session(engine) as session:
+            export_passwords(user, directory / f"export_{size}.csv", session=session)
+
+    results = {"export_passwords": count_statements(engine, export)}
+
+    # Coffre ouvert : déchiffrer des lignes déjà chargées ne lit ni l'utilisateur ni sa clé en base
+    passwords, _ = Password.page(user.id, limit=size, engine=engine)
+    results["Password.password"] = count_statements(engine, lambda: [password.password for password in passwords])
+    results["Vault.decrypt_many"] = count_statements(engine, lambda: list(vault.decrypt_many([password.password_encrypted for password in passwords])))
+
+    # Coffre verrouillé : chaque mot de passe affiché a besoin de la clé de son utilisateur
+    lock(user.id, engine)
+
+    def list_and_decrypt():
+        with unit_of_work("liste", engine):
+            passwords, _ = Password.page(user.id, limit=size, engine=engine, load_user=True)
+        return [password.password for password in passwords]
+
+    def search_and_decrypt():
+        with unit_of_work("recherche", engine) as session:
+            passwords = search_passwords(user, session, "example", limit=size, load_user=True)
+        return [password.password for password in passwords]
+
+    def similar_and_decrypt():
+        with unit_of_work("recherche approximative", engine) as session:
+            passwords = search_passwords(user, session, "exmaple", limit=size, load_user=True)
+        return [password.password for password in passwords]
+
+    results["Password.page"] = count_statements(engine, list_and_decrypt)
+    results["search_passwords"] = count_statements(engine, search_and_decrypt)
+    results["similar_passwords"] = count_statements(engine, similar_and_decrypt)
+    engine.dispose()
+    return results
+
+def main(sizes: list[int]):
+    with tempfile.TemporaryDirectory() as directory:
+        results = {size: run(size, Path(directory)) for size in sizes}
+
+    scenarios = list(next(iter(results.values())))
+    print(f"{'scénario':>20} " + " ".join(f"{f'N={size}':>8}" for size in sizes))
+    failures = []
+    for scenario in scenarios:
+        counts = [results[size][scenario] for size in sizes]
+        print(f"{scenario:>20} " + " ".join(f"{count:>8}" for count in counts))
+        if len(set(counts)) > 1:
+            failures.append(f"Nombre de requêtes dépendant de N - {scenario}")
+        elif scenario in ZERO_QUERY_SCENARIOS and any(counts):
+            failures.append(f"Requêtes émises par un déchiffrement via le coffre - {scenario}")
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or list(DEFAULT_SIZES))
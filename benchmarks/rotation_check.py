@@ -0,0 +1,112 @@
+# benchmarks.rotation_check.py
+"""
+Vérifie sur une base jetable qu'une rotation de clé interrompue ne perd aucun mot de passe : interruption après
+un lot, nouvelle connexion, lecture de tout le coffre, modification d'un mot de passe déjà rechiffré (par le coffre,
+puis par un processus resté sur l'ancienne clé), lecture sans coffre ouvert, reprise, puis déchiffrement de chaque
+ligne avec la nouvelle clé seule.
+
+Vérification manuelle, non exécutée automatiquement : échoue (code de sortie 1) au premier écart.
+
+Usage: python -m benchmarks.rotation_check [LIGNES]   (par défaut: 2500)
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+from cryptography.fernet import Fernet
+from sqlmodel import SQLModel, Session, create_engine
+
+from pg.data.database import apply_sqlite_profile, insert_many
+from pg.data.migrations import migrate
+from pg.data.models import User, Password
+from pg.data.rotation import pending_rotation
+from pg.data.vault import unlock, lock
+from pg.services.rotation import rotate_encryption_key
+from pg.utils.security import encrypt_password, decrypt_password
+
+DEFAULT_ROWS = 2_500
+BATCH_SIZE = 1_000
+
+
+class Interrupted(Exception):
+    """Interruption simulée de la rotation"""
+
+
+def check(condition: bool, message: str):
+    if not condition:
+        print(f"Échec - {message}", file=sys.stderr)
+        sys.exit(1)
+    print(f"ok - {message}")
+
+def run(rows: int, directory: Path):
+    engine = apply_sqlite_profile(create_engine(f"sqlite:///{directory / 'rotation.db'}"))
+    SQLModel.metadata.create_all(engine)
+    migrate(engine)
+    user = User.create(engine=engine, username="rotation", password="Rotation1!")
+    old_key = user.encryption_key
+    vault = unlock(user, engine)
+    legacy = Fernet(old_key.encode())
+    # Une ligne sur deux au format Fernet texte historique
+    insert_many(Password, [
+        {
+            "user_id": user.id,
+            "url": f"https://site{i}.example.com/",
+            "key": f"utilisateur{i}",
+            "password_encrypted": legacy.encrypt(f"mot-de-passe-{i}".encode()).decode() if i % 2 else vault.encrypt(f"mot-de-passe-{i}"),
+        }
+        for i in range(rows)
+    ], engine=engine)
+    expected = {i + 1: f"mot-de-passe-{i}" for i in range(rows)}
+
+    def interrupt(report):
+        if not report.completed:
+            raise Interrupted
+
+    try:
+        with Session(engine) as session:
+            rotate_encryption_key(user, session=session, batch_size=BATCH_SIZE, on_progress=interrupt)
+    except Interrupted:
+        pass
+    lock()
+    checkpoint = pending_rotation(user.id, engine)
+    check(checkpoint is not None and checkpoint.last_password_id == BATCH_SIZE, "rotation interrompue après un lot")
+
+    # Nouvelle connexion pendant la rotation : le coffre lit les deux clés et écrit avec la nouvelle
+    vault = unlock(User.get_by_id(user.id, engine=engine), engine)
+    passwords, _ = Password.page(user.id, limit=rows, engine=engine)
+    decrypted = {password.id: result.password for password, result in zip(passwords, vault.decrypt_many([password.password_encrypted for password in passwords]))}
+    check(decrypted == expected, "coffre rouvert pendant la rotation : tout le coffre se déchiffre")
+
+    Password.get_by_id(5, engine=engine).update(engine=engine, password="modifié-5")
+    expected[5] = "modifié-5"
+    # Processus dont le coffre est resté sur l'ancienne clé : réécrit une ligne déjà rechiffrée
+    with engine.begin() as connection:
+        connection.exec_driver_sql("UPDATE password SET password_encrypted = ? WHERE id = 10", (encrypt_password("modifié-10", old_key),))
+    expected[10] = "modifié-10"
+    check(pending_rotation(user.id, engine).last_password_id == 4, "une écriture derrière le point de reprise le fait reculer")
+    lock()
+
+    with Session(engine) as session:
+        password = Password.get_by_id(7, engine=engine, session=session, load_user=True)
+        check(password.password == expected[7], "lecture sans coffre ouvert d'une ligne rechiffrée")
+
+    with Session(engine) as session:
+        report = rotate_encryption_key(User.get_by_id(user.id, engine=engine), session=session, batch_size=BATCH_SIZE)
+    check(report.completed and report.resumed and not report.failed, f"reprise terminée ({report.rows_per_s:.0f} lignes/s)")
+    check(pending_rotation(user.id, engine) is None, "point de reprise supprimé")
+
+    new_key = User.get_by_id(user.id, engine=engine).encryption_key
+    check(new_key != old_key, "clé remplacée")
+    passwords, _ = Password.page(user.id, limit=rows, engine=engine)
+    check({password.id: decrypt_password(password.password_encrypted, new_key) for password in passwords} == expected,
+          "chaque ligne se déchiffre avec la nouvelle clé seule")
+    engine.dispose()
+
+def main(rows: int = DEFAULT_ROWS):
+    with tempfile.TemporaryDirectory() as directory:
+        run(rows, Path(directory))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
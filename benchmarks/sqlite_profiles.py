@@ -0,0 +1,54 @@
+# benchmarks.sqlite_profiles.py
+"""
+Compare le débit d'écriture et de lecture de chaque profil SQLite.
+
+Usage: python -m benchmarks.sqlite_profiles [ÉCRITURES] [LECTURES]   (par défaut: 2000 20000)
+"""
+
+import sys
+import time
+import random
+import tempfile
+from pathlib import Path
+
+from sqlmodel import SQLModel, Session, create_engine
+
+from pg.data.database import SQLITE_PROFILES, apply_sqlite_profile
+from pg.data.models import User, Password
+from pg.data.vault import unlock, lock
+
+
+def run(profile: str, directory: Path, writes: int, reads: int) -> dict:
+    engine = apply_sqlite_profile(create_engine(f"sqlite:///{directory / f'{profile}.db'}"), profile)
+    SQLModel.metadata.create_all(engine)
+    user = User.create(engine=engine, username="benchmark", password="Benchmark1!")
+    unlock(user, engine)
+
+    # Une transaction par écriture, comme depuis l'interface
+    start = time.perf_counter()
+    ids = [
+        Password.create(engine=engine, user_id=user.id, url=f"https://site{i}.example.com/", key=f"utilisateur{i}", password="Motdepasse1!").id
+        for i in range(writes)
+    ]
+    write_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with Session(engine) as session:
+        for password_id in random.choices(ids, k=reads):
+            Password.get_by_id(password_id, session=session)
+    read_seconds = time.perf_counter() - start
+
+    lock(user.id, engine)
+    engine.dispose()
+    return {"profile": profile, "writes_per_s": writes / write_seconds, "reads_per_s": reads / read_seconds}
+
+def main(writes: int = 2000, reads: int = 20000):
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'profil':>10} {'écritures/s':>12} {'lectures/s':>12}")
+        for profile in SQLITE_PROFILES:
+            result = run(profile, Path(directory), writes, reads)
+            print(f"{result['profile']:>10} {result['writes_per_s']:>12.0f} {result['reads_per_s']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
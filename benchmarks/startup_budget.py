@@ -0,0 +1,141 @@
+# benchmarks.startup_budget.py
+"""
+Budget de démarrage à froid : `python -m pg --help` et une recherche en console (`python -m pg get`) sont lancés
+dans des sous-processus, mesurés (temps total, et temps d'import par `-X importtime`), et comparés au budget.
+
+Échoue (code de sortie 1) si un budget est dépassé ou si un module interdit est importé
+(SQLAlchemy pour `--help`, tkinter et fuzzywuzzy pour une recherche).
+
+Vérification manuelle : le dépôt n'a pas de suite de tests ni d'intégration continue, ce script n'est lancé
+par rien d'autre ; à exécuter avant de modifier les imports de `pg/__init__.py`, `pg/__main__.py` ou du CLI.
+
+Usage: python -m benchmarks.startup_budget [--runs 5] [--factor 1.5] [--json resultats.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlmodel import SQLModel, create_engine
+
+from pg.data.database import apply_sqlite_profile
+from pg.data.migrations import migrate
+from pg.data.models import User, Password
+from pg.data.vault import unlock, lock
+
+USERNAME = "benchmark"
+PASSWORD = "Benchmark1!"
+
+# Budgets en millisecondes (temps total médian du processus, temps cumulé des imports) et modules interdits
+BUDGETS = {
+    "help": {
+        "args": ["--help"],
+        "wall_ms": 400,
+        "import_ms": 150,
+        "forbidden": ("sqlalchemy", "sqlmodel", "tkinter", "fuzzywuzzy"),
+    },
+    "get": {
+        "args": ["get", "site1", "--username", USERNAME],
+        "wall_ms": 1800,  # Dont la vérification du mot de passe maître, calibrée sur PG_KDF_TARGET_MS (250 ms)
+        "import_ms": 1000,
+        "forbidden": ("tkinter", "fuzzywuzzy"),
+    },
+}
+
+
+def seed(database: Path):
+    engine = apply_sqlite_profile(create_engine(f"sqlite:///{database}"))
+    SQLModel.metadata.create_all(engine)
+    migrate(engine)
+    user = User.create(engine=engine, username=USERNAME, password=PASSWORD)
+    unlock(user, engine)
+    Password.create(engine=engine, user_id=user.id, url="https://site1.example.com/", key="utilisateur1", password="Motdepasse1!")
+    lock(user.id, engine)
+    engine.dispose()
+
+def environment() -> dict[str, str]:
+    return {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(Path(__file__).resolve().parent.parent), os.environ.get("PYTHONPATH")])),
+        "PG_PASSWORD": PASSWORD,
+    }
+
+def run_pg(args: list[str], directory: Path, importtime: bool = False) -> subprocess.CompletedProcess:
+    options = ["-X", "importtime"] if importtime else []
+    process = subprocess.run([sys.executable, *options, "-m", "pg", *args], cwd=directory, env=environment(), capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"`python -m pg {' '.join(args)}` a échoué ({process.returncode}): {process.stderr[-2000:]}")
+    return process
+
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    """
+    Retourne, par module importé, les temps (propre, cumulé) en microsecondes relevés par `-X importtime`
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|", 2)
+        modules[name.rstrip()[1:]] = (int(own), int(cumulative))  # Indentation conservée : deux espaces par niveau
+    return modules
+
+def measure(scenario: dict, directory: Path, runs: int) -> dict:
+    walls = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run_pg(scenario["args"], directory)
+        walls.append((time.perf_counter() - start) * 1000)
+
+    modules = parse_importtime(run_pg(scenario["args"], directory, importtime=True).stderr)
+    # Seuls les modules de premier niveau (sans indentation) sont additionnés : leur temps cumulé inclut leurs dépendances
+    top_level = {name: cumulative for name, (_, cumulative) in modules.items() if not name.startswith(" ")}
+    imported = {name.strip() for name in modules}
+    return {
+        "wall_ms": statistics.median(walls),
+        "import_ms": sum(top_level.values()) / 1000,
+        "slowest": [(name, cumulative / 1000) for name, cumulative in sorted(top_level.items(), key=lambda item: -item[1])[:5]],
+        "forbidden": sorted(
+            module for module in scenario["forbidden"]
+            if any(name == module or name.startswith(module + ".") for name in imported)
+        ),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Budget de démarrage à froid de PG")
+    parser.add_argument("--runs", type=int, default=5, help="Lancements mesurés par scénario (médiane)")
+    parser.add_argument("--factor", type=float, default=1.0, help="Multiplie les budgets de temps (machines lentes)")
+    parser.add_argument("--json", help="Écrit les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    results, failures = {}, []
+    with tempfile.TemporaryDirectory() as directory:
+        seed(Path(directory) / "password_manager.db")
+        for name, scenario in BUDGETS.items():
+            result = results[name] = measure(scenario, Path(directory), args.runs)
+            for metric in ("wall_ms", "import_ms"):
+                budget = scenario[metric] * args.factor
+                result[f"{metric}_budget"] = budget
+                if result[metric] > budget:
+                    failures.append(f"{name}: {metric} = {result[metric]:.0f} > {budget:.0f}")
+            if result["forbidden"]:
+                failures.append(f"{name}: modules interdits importés: {', '.join(result['forbidden'])}")
+
+    print(f"{'scénario':>8} {'total (ms)':>11} {'budget':>7} {'imports (ms)':>13} {'budget':>7}")
+    for name, result in results.items():
+        print(f"{name:>8} {result['wall_ms']:>11.0f} {result['wall_ms_budget']:>7.0f} {result['import_ms']:>13.0f} {result['import_ms_budget']:>7.0f}")
+        print("         imports les plus lents: " + ", ".join(f"{module} {ms:.0f} ms" for module, ms in result["slowest"]))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    for failure in failures:
+        print(f"Budget dépassé - {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
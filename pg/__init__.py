@@ -1,15 +1,8 @@
 # pg.__init__.py
-from sqlmodel import SQLModel
-import tkinter as tk
 from enum import StrEnum
+from importlib import import_module
+import os
 
-from .utils.visual import clear_screen
-
-from .data.database import engine
-from .data.models import *
-
-from .controller.auth import connect
-from .view.auth import create_login_screen
 
 __version__ = "3.141"
 __author__ = "CUISSET Mattéo"
@@ -17,27 +10,78 @@ __email__ = "matteo.cuisset@gmail.com"
 __license__ = "MIT"
 __project_page__ = "https://github.com/Flyns157/PG"
 
+# Instrumentation installée avant tout import des modèles (voir `pg.utils.profiling`)
+if os.environ.get("PG_PROFILE", "") not in ("", "0"):
+    from .utils.profiling import enable_profiling
+    enable_profiling()
+
+# Noms exposés par le paquet, importés à la première utilisation : `python -m pg --help` ou une commande
+# ne chargent ainsi ni SQLAlchemy ni l'interface graphique avant d'en avoir besoin
+_LAZY_ATTRIBUTES = {
+    "clear_screen": ".utils.visual",
+    "engine": ".data.database",
+    "migrate": ".data.migrations",
+    "lock": ".data.vault",
+    **dict.fromkeys(("User", "UserCreate", "UserUpdate", "PasswordCreate", "PasswordUpdate", "Password"), ".data.models"),
+}
+
+def __getattr__(name: str):
+    if (module := _LAZY_ATTRIBUTES.get(name)) is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = getattr(import_module(module, __name__), name)
+    return value
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_LAZY_ATTRIBUTES])
+
 
 def init():
+    """
+    Prépare la base : création des tables et migrations, sautées si le schéma est déjà à jour
+    """
+    from .data.database import engine
+    from .data.migrations import schema_is_current, migrate
+
+    if schema_is_current(engine):
+        return
+    from sqlmodel import SQLModel
+    from .data import models  # noqa: F401  Déclare les tables dans SQLModel.metadata
+
     SQLModel.metadata.create_all(engine)
+    migrate(engine)
 
 class Mode(StrEnum):
     CONSOLE = "console"
     GUI = "gui"
+    SERVER = "server"
 
-def run_app(mode: Mode = Mode.GUI):
+def run_app(mode: Mode = Mode.GUI, **server_options):
     init()
     if mode == Mode.GUI:
         run_gui()
+    elif mode == Mode.SERVER:
+        from .server import run_server
+        run_server(**server_options)
     else:
         run_console()
 
 def run_gui():
+    # Interface graphique importée seulement dans ce mode (les commandes et la console n'en ont pas besoin)
+    import tkinter as tk
+    from .data.vault import lock
+    from .view.auth import create_login_screen
+    from .view.tasks import get_runner
+
     root = tk.Tk()
     create_login_screen(root)
     root.mainloop()
+    get_runner(root).shutdown()
+    lock()
 
 def run_console():
+    from .utils.visual import clear_screen
+    from .controller.auth import connect
+
     clear_screen()
     print("Bienvenue dans Password Gestion!")
     connect()
@@ -1,11 +1,37 @@
 # pg.__main__.py
-from pg import run_app, Mode
+from pg import run_app, init, Mode
+from pg.data.sqlite_profiles import SQLITE_PROFILES
+from pg.controller.cli import add_cli_arguments, run_command
 import argparse
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Password Gestion")
-    parser.add_argument("-m", "--mode", choices=["console", "gui"], default="gui", help="Mode d'exécution")
+    parser.add_argument("-m", "--mode", choices=list(Mode), default=Mode.GUI, help="Mode d'exécution")
+    parser.add_argument("-p", "--profile", choices=list(SQLITE_PROFILES), help="Profil de performance SQLite (par défaut : variable d'environnement PG_SQLITE_PROFILE, sinon durable)")
+    parser.add_argument("--host", help="Adresse d'écoute du mode serveur (127.0.0.1 par défaut)")
+    parser.add_argument("--port", type=int, help="Port d'écoute du mode serveur (8157 par défaut)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="N'affiche pas le journal des requêtes du mode serveur")
+    parser.add_argument("--rebuild-index", action="store_true", help="Reconstruit l'index de recherche plein texte puis quitte")
+    add_cli_arguments(parser)
     args = parser.parse_args()
 
-    run_app(Mode(args.mode))
+    # La base n'est importée qu'une fois les arguments validés (`--help` reste instantané)
+    if args.profile is not None:
+        from pg.data.database import set_sqlite_profile
+        set_sqlite_profile(args.profile)
+    if args.command:
+        init()
+        exit(run_command(args))
+    if args.rebuild_index:
+        from pg.data.database import engine
+        from pg.data.fulltext import rebuild_search_index
+        init()
+        rebuild_search_index(engine)
+        print("Index de recherche reconstruit.")
+        exit()
+    if args.mode == Mode.SERVER:
+        options = {name: value for name, value in (("host", args.host), ("port", args.port)) if value is not None}
+        run_app(Mode.SERVER, verbose=not args.quiet, **options)
+    else:
+        run_app(Mode(args.mode))
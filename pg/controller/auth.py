@@ -2,6 +2,8 @@
 import getpass
 
 from ..data.models import User
+from ..data.vault import unlock
+from ..utils.security import KdfUnavailableError
 from ..utils.visual import clear_screen
 
 
@@ -28,14 +30,25 @@ def consol_login():
     username = input("Nom d'utilisateur: ")
 
     if (user := User.get_by_username(username)):
-        if user.verify_password(getpass.getpass("Mot de passe: ")):
+        try:
+            valid = user.check_password(getpass.getpass("Mot de passe: "))
+        except KdfUnavailableError as e:
+            print(f"Connexion impossible: {e}")
+            return
+        if valid:
+            unlock(user)
             clear_screen()
             print("Connexion réussie!")
             from .home import home
             home(user)
 
 def login(username: str, password: str) -> User|None:
+    """
+    Retourne l'utilisateur connecté, ou None si les identifiants sont invalides
+    (lève `KdfUnavailableError` si son hachage ne peut pas être vérifié ici)
+    """
     if (user := User.get_by_username(username)):
-        if user.verify_password(password):
+        if user.check_password(password):
+            unlock(user)
             return user
     return None
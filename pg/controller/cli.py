@@ -0,0 +1,66 @@
+# pg.controller.cli.py
+"""
+Commandes non interactives (`python -m pg get|list|search|add|import|export|rotate-key`), pour les scripts et les pipelines.
+
+Identifiants : nom d'utilisateur par `--username` ou la variable PG_USERNAME ; mot de passe maître par la variable
+PG_PASSWORD, sinon lu sur la première ligne de l'entrée standard (ou demandé si elle est un terminal).
+Sortie en TSV (par défaut, avec une ligne d'en-tête) ou en JSON. Aucun import de tkinter ni de l'interface graphique.
+
+Ce module ne contient que le parseur, sans dépendance : les commandes (`pg.controller.commands`) et la base
+ne sont importées qu'au lancement de l'une d'elles.
+"""
+
+import argparse
+import os
+import sys
+from typing import TextIO
+
+
+def add_cli_arguments(parser: argparse.ArgumentParser):
+    """
+    Ajoute les sous-commandes au parseur de `python -m pg`
+    """
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMANDE", help="Commande non interactive (sinon, lancement du mode choisi)")
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("-u", "--username", default=os.environ.get("PG_USERNAME"), help="Nom d'utilisateur (ou variable PG_USERNAME)")
+    common.add_argument("-f", "--format", choices=("tsv", "json"), default="tsv", help="Format de sortie")
+    reveal = argparse.ArgumentParser(add_help=False)
+    reveal.add_argument("-r", "--reveal", action="store_true", help="Inclut les mots de passe en clair")
+
+    get = subparsers.add_parser("get", parents=[common, reveal], help="Affiche un mot de passe par identifiant ou par site")
+    get.add_argument("target", help="Identifiant numérique ou partie de l'URL / de l'identifiant du site")
+
+    list_ = subparsers.add_parser("list", parents=[common, reveal], help="Liste les mots de passe")
+    list_.add_argument("--order-by", default="url", help="Colonne de tri : id, url, key, date_added ou date_updated (ordre décroissant : --desc, ou --order-by=-date_added)")
+    list_.add_argument("--desc", action="store_true", help="Ordre décroissant")
+    list_.add_argument("--limit", type=int, default=None, help="Nombre maximal de lignes")
+
+    search = subparsers.add_parser("search", parents=[common, reveal], help="Recherche des mots de passe")
+    search.add_argument("query", help="Termes recherchés")
+    search.add_argument("--limit", type=int, default=10, help="Nombre maximal de résultats")
+
+    add = subparsers.add_parser("add", parents=[common], help="Ajoute un mot de passe (lu sur l'entrée standard après le mot de passe maître)")
+    add.add_argument("--url", required=True)
+    add.add_argument("--key", required=True, help="Identifiant sur le site")
+    add.add_argument("--description")
+    add.add_argument("--email")
+    add.add_argument("--phone")
+
+    import_ = subparsers.add_parser("import", parents=[common], help="Importe un fichier CSV (\"-\" : entrée standard)")
+    import_.add_argument("file")
+
+    export = subparsers.add_parser("export", parents=[common], help="Exporte vers un fichier CSV (\"-\" : sortie standard)")
+    export.add_argument("file")
+
+    rotate = subparsers.add_parser("rotate-key", parents=[common], help="Rechiffre les mots de passe avec une nouvelle clé (reprend une rotation interrompue)")
+    rotate.add_argument("--batch-size", type=int, default=1000, help="Mots de passe rechiffrés par transaction")
+    rotate.add_argument("--workers", type=int, default=1, help="Processus de rechiffrement")
+
+
+def run_command(args: argparse.Namespace, stdin: TextIO = sys.stdin, stdout: TextIO = sys.stdout) -> int:
+    """
+    Exécute une sous-commande et retourne le code de sortie (0 : succès, 1 : introuvable, 2 : authentification, 3 : erreur)
+    """
+    from .commands import run_command
+    return run_command(args, stdin, stdout)
@@ -0,0 +1,215 @@
+# pg.controller.commands.py
+"""
+Implémentation des commandes non interactives déclarées dans `pg.controller.cli`
+"""
+
+import argparse
+import getpass
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import TextIO
+
+from ..data.database import unit_of_work
+from ..data.models import User, Password
+from ..data.vault import unlock, lock, Vault
+from ..utils.security import KdfUnavailableError
+
+FIELDS = ("id", "url", "key", "email", "phone", "description", "date_added", "date_updated")
+
+EXIT_NOT_FOUND = 1
+EXIT_AUTH = 2
+EXIT_ERROR = 3
+
+
+class CliError(Exception):
+    def __init__(self, message: str, exit_code: int = EXIT_ERROR):
+        super().__init__(message)
+        self.exit_code = exit_code
+
+
+def read_secret(stdin: TextIO, prompt: str) -> str:
+    """
+    Lit un secret sur l'entrée standard : une ligne si elle est redirigée, une saisie masquée si c'est un terminal
+    """
+    if stdin.isatty():
+        return getpass.getpass(prompt)
+    if not (line := stdin.readline()):
+        raise CliError(f"Entrée standard vide ({prompt.rstrip(': ')} attendu)", EXIT_AUTH)
+    return line.rstrip("\r\n")
+
+def authenticate(username: str | None, stdin: TextIO) -> User:
+    if not username:
+        raise CliError("Nom d'utilisateur manquant (--username ou variable PG_USERNAME)", EXIT_AUTH)
+    password = os.environ.get("PG_PASSWORD")
+    if password is None:
+        password = read_secret(stdin, "Mot de passe maître: ")
+    with unit_of_work("cli.login"):
+        user = User.get_by_username(username)
+        try:
+            if user is None or not user.check_password(password):
+                raise CliError("Identifiants invalides", EXIT_AUTH)
+        except KdfUnavailableError as e:
+            raise CliError(f"Connexion impossible: {e}", EXIT_AUTH)
+    return user
+
+
+def password_record(password: Password, clear_password: str | None) -> dict:
+    record = {field: getattr(password, field) for field in FIELDS}
+    record["url"] = str(record["url"])
+    for field in ("date_added", "date_updated"):
+        record[field] = record[field].isoformat()
+    if clear_password is not None:
+        record["password"] = clear_password
+    return record
+
+def records(passwords: list[Password], vault: Vault, reveal: bool) -> list[dict]:
+    if not reveal:
+        return [password_record(password, None) for password in passwords]
+    return [
+        password_record(password, decrypted.password if decrypted.ok else None)
+        for password, decrypted in zip(passwords, vault.decrypt_many([password.password_encrypted for password in passwords], workers=1))
+    ]
+
+def _tsv_value(value) -> str:
+    if value is None:
+        return ""
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+def write_records(rows: list[dict], output_format: str, stdout: TextIO, single: bool = False):
+    if output_format == "json":
+        json.dump(rows[0] if single else rows, stdout, ensure_ascii=False)
+        stdout.write("\n")
+        return
+    if not rows:
+        return
+    columns = list(rows[0])
+    stdout.write("\t".join(columns) + "\n")
+    for row in rows:
+        stdout.write("\t".join(_tsv_value(row.get(column)) for column in columns) + "\n")
+
+
+def command_get(args, user: User, vault: Vault, stdin: TextIO, stdout: TextIO) -> int:
+    with unit_of_work("cli.get"):
+        if args.target.isdecimal():
+            password = Password.get_by_id(int(args.target))
+        else:
+            password = Password.get_by_url(args.target, user_id=user.id)
+    if password is None or password.user_id != user.id:
+        raise CliError(f"Aucun mot de passe ne correspond à {args.target!r}", EXIT_NOT_FOUND)
+    write_records(records([password], vault, args.reveal), args.format, stdout, single=True)
+    return 0
+
+def command_list(args, user: User, vault: Vault, stdin: TextIO, stdout: TextIO) -> int:
+    passwords, cursor = [], None
+    order_by = f"-{args.order_by.lstrip('-')}" if args.desc else args.order_by
+    with unit_of_work("cli.list"):
+        while args.limit is None or len(passwords) < args.limit:
+            page_size = 1000 if args.limit is None else min(1000, args.limit - len(passwords))
+            page, cursor = Password.page(user.id, order_by=order_by, after=cursor, limit=page_size)
+            passwords.extend(page)
+            if cursor is None:
+                break
+    write_records(records(passwords, vault, args.reveal), args.format, stdout)
+    return 0
+
+def command_search(args, user: User, vault: Vault, stdin: TextIO, stdout: TextIO) -> int:
+    from ..services.password import search_passwords
+    with unit_of_work("cli.search") as session:
+        passwords = search_passwords(user, session, args.query, limit=args.limit)
+    write_records(records(passwords, vault, args.reveal), args.format, stdout)
+    return 0 if passwords else EXIT_NOT_FOUND
+
+def command_add(args, user: User, vault: Vault, stdin: TextIO, stdout: TextIO) -> int:
+    secret = read_secret(stdin, "Mot de passe à enregistrer: ")
+    with unit_of_work("cli.add"):
+        password = Password.create(
+            user_id=user.id,
+            url=args.url,
+            key=args.key,
+            password=secret,
+            description=args.description,
+            email=args.email,
+            phone=args.phone
+        )
+    write_records([password_record(password, None)], args.format, stdout, single=True)
+    return 0
+
+def command_import(args, user: User, vault: Vault, stdin: TextIO, stdout: TextIO) -> int:
+    from ..services.password import import_passwords
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = Path(args.file)
+        if args.file == "-":
+            file_path = Path(directory) / "import.csv"
+            with open(file_path, "w", newline="", encoding="utf-8") as file:
+                shutil.copyfileobj(stdin, file)
+        summary = import_passwords(user, file_path)
+    result = {"inserted": summary.inserted, "skipped": summary.skipped, "failed": len(summary.failed)}
+    write_records([result], args.format, stdout, single=True)
+    for line, reason in summary.failed:
+        print(f"Ligne {line}: {reason}", file=sys.stderr)
+    return 0 if not summary.failed else EXIT_ERROR
+
+def command_export(args, user: User, vault: Vault, stdin: TextIO, stdout: TextIO) -> int:
+    from ..services.password import export_passwords
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = Path(directory) / "export.csv" if args.file == "-" else Path(args.file)
+        with unit_of_work("cli.export") as session:
+            failed_ids = export_passwords(user, file_path, session=session)
+        if args.file == "-":
+            with open(file_path, newline="", encoding="utf-8") as file:
+                shutil.copyfileobj(file, stdout)
+    if failed_ids:
+        print(f"Mots de passe impossibles à déchiffrer: {', '.join(map(str, failed_ids))}", file=sys.stderr)
+    return 0
+
+def command_rotate_key(args, user: User, vault: Vault, stdin: TextIO, stdout: TextIO) -> int:
+    from ..services.rotation import rotate_encryption_key
+    def progress(report):
+        if not report.completed:
+            print(f"{report.total_rows} mots de passe rechiffrés ({report.rows_per_s:.0f}/s)", file=sys.stderr)
+
+    report = rotate_encryption_key(user, batch_size=args.batch_size, workers=args.workers, on_progress=progress)
+    write_records([{
+        "rows": report.rows,
+        "total_rows": report.total_rows,
+        "batches": report.batches,
+        "seconds": round(report.seconds, 3),
+        "rows_per_s": round(report.rows_per_s),
+        "resumed": report.resumed,
+        "failed": len(report.failed),
+    }], args.format, stdout, single=True)
+    if report.failed:
+        print(f"Mots de passe impossibles à déchiffrer: {', '.join(map(str, report.failed))}", file=sys.stderr)
+    return 0
+
+COMMANDS = {
+    "get": command_get,
+    "list": command_list,
+    "search": command_search,
+    "add": command_add,
+    "import": command_import,
+    "export": command_export,
+    "rotate-key": command_rotate_key,
+}
+
+def run_command(args: argparse.Namespace, stdin: TextIO = sys.stdin, stdout: TextIO = sys.stdout) -> int:
+    """
+    Exécute une sous-commande et retourne le code de sortie (0 : succès, 1 : introuvable, 2 : authentification, 3 : erreur)
+    """
+    try:
+        user = authenticate(args.username, stdin)
+        vault = unlock(user)
+        try:
+            return COMMANDS[args.command](args, user, vault, stdin, stdout)
+        finally:
+            lock(user.id)
+    except CliError as e:
+        print(e, file=sys.stderr)
+        return e.exit_code
+    except ValueError as e:
+        print(f"Erreur: {e}", file=sys.stderr)
+        return EXIT_ERROR
@@ -11,6 +11,7 @@ from .password import (
 )
 from ..utils.visual import clear_screen
 from ..data.models import User
+from ..data.vault import lock
 
 
 def home(user: User):
@@ -48,9 +49,11 @@ def home(user: User):
             case "8":
                 console_import_passwords(user)
             case "9":
+                lock(user.id)
                 from .auth import connect
                 connect()
             case "10":
+                lock()
                 clear_screen()
                 exit()
             case _:
@@ -1,24 +1,26 @@
 # pg.controller.password.py
 import getpass
 from pathlib import Path
-from sqlmodel import Session, select
 
 from ..utils.visual import clear_screen
-from ..utils.search_engine import similar_passwords
 
-from ..data.database import engine
+from ..data.database import unit_of_work
 from ..data.models import Password, User
+from ..data.vault import vault_for
 
 from ..services.password import (
     import_passwords as import_passwords_service,
-    export_passwords as export_passwords_service
+    export_passwords as export_passwords_service,
+    search_passwords
 )
 
 
+DECRYPTION_FAILED = "<impossible à déchiffrer>"
+
 def console_create_password(user: User):
     clear_screen()
     try:
-        Password.create(
+        data = dict(
             user_id=user.id,
             url=input("Site web: "),
             description=input("Description (optionnel): ") or None,
@@ -27,6 +29,8 @@ def console_create_password(user: User):
             email=input("Adresse e-mail (optionnel): ") or None,
             phone=input("Numéro de téléphone (optionnel): ") or None
         )
+        with unit_of_work("console_create_password"):
+            Password.create(**data)
         clear_screen()
         print("Mot de passe enregistré avec succès!", end="\n\n")
     except Exception as e:
@@ -37,7 +41,8 @@ def console_view_password(user: User):
     try:
         while not (password_id := input("ID du mot de passe à récupérer: ")).isnumeric():...
         
-        password = Password.get_by_id(password_id)
+        with unit_of_work("console_view_password"):
+            password = Password.get_by_id(password_id, load_user=True)  # Utilisateur joint : l'affichage ne relance pas de requête
         if password is None:
             clear_screen()
             print(f"Le mot de passe d'ID {password_id} n'existe pas.", end="\n\n")
@@ -52,18 +57,23 @@ def console_view_password(user: User):
     except Exception as e:
         print(f"Une erreur est survenue: {e}", end="\n\n")
 
-def console_list_passwords(user: User, filtre=lambda x: x.url):
+def console_list_passwords(user: User, order_by: str="url", page_size: int=500):
     clear_screen()
-    with Session(engine) as session:
-        user = User.get_by_id(user.id, session=session)
+    vault = vault_for(user)
+    with unit_of_work("console_list_passwords") as session:
         print("Liste des mots de passe enregistrés:", end="\n\n")
-        for password in sorted(user.passwords, key=filtre):
-            print(password, end="\n\n")
+        cursor = None
+        while True:
+            passwords, cursor = Password.page(user.id, order_by=order_by, after=cursor, limit=page_size, session=session)
+            for password, decrypted in zip(passwords, vault.decrypt_many([pwd.password_encrypted for pwd in passwords])):
+                print(password.to_text(decrypted.password if decrypted.ok else DECRYPTION_FAILED), end="\n\n")
+            if cursor is None:
+                break
 
 def console_edit_password(user: User):
     clear_screen()
     try:
-        with Session(engine) as session:
+        with unit_of_work("console_edit_password") as session:
             password_id = input("ID du mot de passe à modifier: ")
             password = Password.get_by_id(password_id, session=session)
             if password is None:
@@ -89,7 +99,7 @@ def console_edit_password(user: User):
 def console_delete_password(user: User):
     clear_screen()
     try:
-        with Session(engine) as session:
+        with unit_of_work("console_delete_password") as session:
             password_id = input("ID du mot de passe à supprimer: ")
             password = Password.get_by_id(password_id, session=session)
             if password is None:
@@ -113,18 +123,14 @@ def console_delete_password(user: User):
 def console_search_password(user: User):
     clear_screen()
     try:
-        with Session(engine) as session:
+        with unit_of_work("console_search_password") as session:
             user = User.get_by_id(user.id, session=session)
             search_term = input("Terme de recherche: ")
-            listed_passwords = similar_passwords(user.passwords, search_term)
-            if not listed_passwords:
+            nearest_passwords = search_passwords(user=user, session=session, query=search_term, load_user=True)
+            if not nearest_passwords:
                 clear_screen()
                 print(f"Aucun mot de passe ne correspond à la recherche \"{search_term}\".", end="\n\n")
                 return
-            nearest_url = listed_passwords[0].url
-            nearest_domaine_name=str(nearest_url).split("/")[2]
-            statement = select(Password).where(Password.url.like(f'%{nearest_domaine_name}%') & Password.user_id == user.id)
-            nearest_passwords = session.exec(statement).fetchall()
 
             clear_screen()
             print(f"""\nInformations de connections similaires à la recherche\n-> Recherche: "{search_term}"\n\n""")
@@ -142,8 +148,8 @@ def console_export_passwords(user: User):
     clear_screen()
     try:
         file_path = Path(input("""Entrez le chemin du fichier CSV à exporter ("passwords_export.csv" par défaut): """) or r"passwords_export.csv")
-        with Session(engine) as session:
-            export_passwords_service(
+        with unit_of_work("console_export_passwords") as session:
+            failed_ids = export_passwords_service(
                 session=session,
                 user=user,
                 file_path=file_path
@@ -151,6 +157,8 @@ def console_export_passwords(user: User):
 
         clear_screen()
         print(f"Exportation réussie dans {file_path}", end="\n\n")
+        if failed_ids:
+            print(f"Mots de passe impossibles à déchiffrer (exportés sans mot de passe): {', '.join(map(str, failed_ids))}", end="\n\n")
     except Exception as e:
         print(f"Erreur lors de l'exportation des mots de passes: {e}", end="\n\n")
     finally:
@@ -163,9 +171,15 @@ def console_import_passwords(user: User):
     clear_screen()
     try:
         file_path = Path(input("Entrez le chemin du fichier CSV à importer: ") or r"passwords_export.csv")
-        import_passwords_service(user, file_path)
+        summary = import_passwords_service(
+            user,
+            file_path,
+            on_progress=lambda summary: print(f"\r{summary.processed} lignes traitées...", end="")
+        )
 
         clear_screen()
-        print("Importation réussie!", end="\n\n")
+        print(f"Importation terminée: {summary.inserted} ajoutés, {summary.skipped} doublons ignorés, {len(summary.failed)} en échec.", end="\n\n")
+        for line, reason in summary.failed:
+            print(f"  Ligne {line}: {reason}")
     except Exception as e:
         print(f"Erreur lors de l'importation du fichier CSV: {e}", end="\n\n")
\ No newline at end of file
@@ -1,12 +1,12 @@
 # pg.controller.user.py
 import getpass
-from sqlmodel import Session
 
 from ..utils.visual import clear_screen
-from ..utils.security import supported_algorithms
+from ..utils.security import supported_algorithms, DEFAULT_KDF
 
-from ..data.database import engine
+from ..data.database import unit_of_work
 from ..data.models import User
+from ..data.vault import unlock
 
 from .home import home
 
@@ -14,26 +14,26 @@ from .home import home
 def console_create_user():
     clear_screen()
     try:
-        with Session(engine) as session:
+        username = input("Nom d'utilisateur: ")
+        password = getpass.getpass("Mot de passe: ")
+        hash_algorithm = input(f"\nAlgorithme de hashage à utiliser\n-> {', '.join(supported_algorithms())}\n(optionnel, {DEFAULT_KDF} par défaut): ") or DEFAULT_KDF
+        with unit_of_work("console_create_user") as session:
             user = User.create(
                 session=session,
-                username=input("Nom d'utilisateur: "),
-                password=getpass.getpass("Mot de passe: "),
-                hash_algorithm=input(f"\nAlgorithme de hashage à utiliser\n-> {', '.join(supported_algorithms())}\n(optionnel): ") or "sha256"
+                username=username,
+                password=password,
+                hash_algorithm=hash_algorithm
             )
-            # clear_screen()
-            # print(f"Utilisateur {user.username} créé avec succès!")
-            home(user)
+        # clear_screen()
+        # print(f"Utilisateur {user.username} créé avec succès!")
     except Exception as e:
         clear_screen()
         print(f"Une erreur est survenue: {e}")
-    finally:
-        try:
-            session.close()
-        except Exception:
-            pass
+        return
+    unlock(user)
+    home(user)
 
-def create_user(username: str, password: str, hash_algorithm: str = "sha256") -> User|None:
+def create_user(username: str, password: str, hash_algorithm: str = DEFAULT_KDF) -> User|None:
     return User.create(
         username=username,
         password=password,
@@ -0,0 +1,182 @@
+# pg.data.async_database.py
+"""
+Accès asynchrone (asyncio) à la base de données : pendant des helpers de `pg.data.database`,
+pour intégrer PG dans un service asyncio sans bloquer la boucle d'événements.
+
+Repose sur le pilote optionnel aiosqlite (`pip install aiosqlite`), importé au premier usage seulement.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Awaitable, Callable, TypeVar, TYPE_CHECKING
+
+from sqlmodel import SQLModel
+from sqlmodel.main import is_table_model_class
+from sqlmodel.orm.session import Select, _TSelectParam
+from sqlalchemy import Engine, insert as sql_insert
+
+from .database import engine, apply_sqlite_profile, detached_copy, FetchMode
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+T = TypeVar("T")
+
+# Threads dédiés au chiffrement et au hachage, pour ne pas occuper l'exécuteur par défaut de la boucle
+CRYPTO_WORKERS = 4
+
+_async_engines: dict[Engine, "AsyncEngine"] = {}
+_crypto_executor: ThreadPoolExecutor | None = None
+
+
+def get_async_engine(sync_engine: Engine = engine) -> "AsyncEngine":
+    """
+    Retourne le moteur asynchrone pointant sur la même base que `sync_engine` (créé au premier appel),
+    avec le même profil SQLite
+    """
+    if (async_engine := _async_engines.get(sync_engine)) is not None:
+        return async_engine
+    try:
+        import aiosqlite  # noqa: F401
+    except ImportError as e:
+        raise ImportError("L'accès asynchrone nécessite le paquet aiosqlite (pip install aiosqlite)") from e
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    async_engine = create_async_engine(sync_engine.url.set(drivername="sqlite+aiosqlite"))
+    apply_sqlite_profile(async_engine.sync_engine)
+    return _async_engines.setdefault(sync_engine, async_engine)
+
+def sync_engine_of(bind: Engine) -> Engine:
+    """
+    Retourne le moteur synchrone d'origine d'une connexion ouverte par un moteur asynchrone (`bind` lui-même sinon)
+    """
+    return next((sync_engine for sync_engine, async_engine in _async_engines.items() if async_engine.sync_engine is bind), bind)
+
+async def dispose_async_engines():
+    """
+    Ferme les connexions des moteurs asynchrones (à appeler à l'arrêt du service)
+    """
+    while _async_engines:
+        _, async_engine = _async_engines.popitem()
+        await async_engine.dispose()
+
+def async_session(sync_engine: Engine = engine) -> "AsyncSession":
+    """
+    Ouvre une session asynchrone. Les objets restent lisibles après validation :
+    un chargement paresseux est impossible en asynchrone.
+    """
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    return AsyncSession(get_async_engine(sync_engine), expire_on_commit=False)
+
+async def run_blocking(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Exécute un traitement bloquant (chiffrement, hachage) dans un thread, sans bloquer la boucle
+    """
+    global _crypto_executor
+    if _crypto_executor is None:
+        _crypto_executor = ThreadPoolExecutor(max_workers=CRYPTO_WORKERS, thread_name_prefix="pg-crypto")
+    return await asyncio.get_running_loop().run_in_executor(_crypto_executor, partial(func, *args, **kwargs))
+
+async def aexecute(func: Callable[..., Awaitable[Any]], engine: Engine = engine, session: "AsyncSession | None" = None, **kwargs):
+    if session is not None:
+        return await func(session=session, **kwargs)
+    async with async_session(engine) as session:
+        return await func(session=session, **kwargs)
+
+async def aquery(statement: Select[_TSelectParam], engine: Engine = engine, session: "AsyncSession | None" = None, fetch_mode: FetchMode = FetchMode.ONE):
+    async def request(session: "AsyncSession"):
+        tmp = await session.exec(statement)
+        match fetch_mode:
+            case FetchMode.ALL:
+                return list(tmp.all())
+            case FetchMode.ONE:
+                return tmp.first()
+
+    return await aexecute(
+        engine=engine,
+        session=session,
+        func=request
+    )
+
+async def ainsert(orm_instance: SQLModel, engine: Engine = engine, session: "AsyncSession | None" = None, on_commit: Callable[[SQLModel], None] | None = None):
+    """
+    Enregistre l'instance et valide la transaction ; `on_commit` reçoit l'instance enregistrée une fois la
+    validation réussie (pendant asynchrone de `after_commit`, jamais appelé si la validation échoue)
+    """
+    if not is_table_model_class(orm_instance.__class__):
+        raise ValueError("Instance is not a SQLModel instance")
+
+    async def request(session: "AsyncSession"):
+        session.add(orm_instance)
+        await session.commit()
+        await session.refresh(orm_instance)
+        saved = detached_copy(orm_instance)
+        if on_commit is not None:
+            on_commit(saved)
+        return saved
+
+    return await aexecute(
+        engine=engine,
+        session=session,
+        func=request
+    )
+
+async def ainsert_many(model: type[SQLModel], rows: list[dict], engine: Engine = engine, session: "AsyncSession | None" = None) -> list[int]:
+    """
+    Pendant asynchrone de `insert_many` : une seule requête et une seule transaction pour tout le lot
+    """
+    if not is_table_model_class(model):
+        raise ValueError("Model is not a SQLModel table")
+
+    async def request(session: "AsyncSession"):
+        if not rows:
+            return []
+        try:
+            ids = list(await session.scalars(sql_insert(model).returning(model.id, sort_by_parameter_order=True), rows))
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        return ids
+
+    return await aexecute(
+        engine=engine,
+        session=session,
+        func=request
+    )
+
+async def aupdate(orm_instance: SQLModel, engine: Engine = engine, session: "AsyncSession | None" = None):
+    if not is_table_model_class(orm_instance.__class__):
+        raise ValueError("Instance is not a SQLModel instance")
+
+    async def request(session: "AsyncSession"):
+        session.add(orm_instance)
+        await session.commit()
+        await session.refresh(orm_instance)
+
+    return await aexecute(
+        engine=engine,
+        session=session,
+        func=request
+    )
+
+async def adelete(orm_instance: SQLModel, engine: Engine = engine, session: "AsyncSession | None" = None, on_commit: Callable[[], None] | None = None):
+    """
+    Supprime l'instance et valide la transaction ; `on_commit` est appelé une fois la validation réussie
+    """
+    if not is_table_model_class(orm_instance.__class__):
+        raise ValueError("Instance is not a SQLModel instance")
+
+    async def request(session: "AsyncSession"):
+        await session.delete(orm_instance)
+        await session.commit()
+        if on_commit is not None:
+            on_commit()
+
+    return await aexecute(
+        engine=engine,
+        session=session,
+        func=request
+    )
@@ -0,0 +1,118 @@
+# pg.data.cache.py
+"""
+Cache en mémoire borné (LRU) à durée de vie limitée, utilisé pour les lectures fréquentes des utilisateurs
+"""
+
+import os
+import time
+from collections import OrderedDict
+from threading import RLock
+from typing import Any, Callable, Hashable, NamedTuple
+
+
+USER_CACHE_SIZE = int(os.environ.get("PG_USER_CACHE_SIZE", 256))
+USER_CACHE_TTL = float(os.environ.get("PG_USER_CACHE_TTL", 300))  # En secondes
+
+MISSING = object()
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.0
+
+
+class TTLCache:
+    """
+    Cache borné : au-delà de `max_size` entrées, la moins récemment utilisée est évincée ;
+    une entrée plus ancienne que `ttl` secondes est considérée absente. Utilisable depuis plusieurs threads.
+    """
+
+    def __init__(self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        if max_size <= 0:
+            raise ValueError("La taille du cache doit être positive")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = RLock()
+        self._hits = self._misses = self._evictions = self._expirations = self._invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """
+        Retourne la valeur associée à `key`, ou `default` si elle est absente ou expirée
+        """
+        with self._lock:
+            if (entry := self._entries.get(key)) is None:
+                self._misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._invalidations += 1
+
+    def invalidate_matching(self, predicate: Callable[[Hashable], bool]):
+        """
+        Retire toutes les entrées dont la clé vérifie `predicate`
+        """
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+                self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions, self._expirations, self._invalidations, len(self._entries))
+
+    def reset_stats(self):
+        with self._lock:
+            self._hits = self._misses = self._evictions = self._expirations = self._invalidations = 0
+
+
+# Colonnes des utilisateurs par (moteur, identifiant), et identifiant par (moteur, nom d'utilisateur)
+user_cache = TTLCache(max_size=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+username_cache = TTLCache(max_size=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+def user_cache_stats() -> CacheStats:
+    """
+    Statistiques du cache des utilisateurs (recherches par identifiant et par nom confondues)
+    """
+    by_id, by_name = user_cache.stats(), username_cache.stats()
+    return CacheStats(*(a + b for a, b in zip(by_id[:-1], by_name[:-1])), by_id.size)
+
+def clear_user_cache():
+    user_cache.clear()
+    username_cache.clear()
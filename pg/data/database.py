@@ -4,11 +4,187 @@ from typing_extensions import deprecated
 from sqlmodel import create_engine, Session, SQLModel
 from sqlmodel.main import is_table_model_class
 from sqlmodel.orm.session import Select, _TSelectParam
-from sqlalchemy import Engine
-from typing import Callable
+from sqlalchemy import Engine, event, inspect, insert as sql_insert
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Iterator
+from weakref import WeakSet
+import os
 
 
-engine = create_engine('sqlite:///password_manager.db')
+from .sqlite_profiles import SQLITE_PROFILES, DEFAULT_SQLITE_PROFILE
+
+_sqlite_profile = os.environ.get("PG_SQLITE_PROFILE", DEFAULT_SQLITE_PROFILE)
+
+def get_sqlite_profile() -> str:
+    """
+    Retourne le nom du profil SQLite appliqué aux nouvelles connexions du moteur par défaut
+    """
+    return _sqlite_profile
+
+def set_sqlite_profile(profile: str):
+    """
+    Change le profil SQLite du moteur par défaut ; les connexions déjà ouvertes sont recyclées
+    """
+    global _sqlite_profile
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Profil SQLite inconnu: {profile} (disponibles: {', '.join(SQLITE_PROFILES)})")
+    _sqlite_profile = profile
+    engine.dispose()
+
+def apply_sqlite_profile(engine: Engine, profile: str | None = None) -> Engine:
+    """
+    Applique un profil SQLite à chaque connexion ouverte par le moteur.
+    Sans profil explicite, le profil courant du moteur par défaut (voir `set_sqlite_profile`) est utilisé.
+    """
+    if profile is not None and profile not in SQLITE_PROFILES:
+        raise ValueError(f"Profil SQLite inconnu: {profile} (disponibles: {', '.join(SQLITE_PROFILES)})")
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, value in SQLITE_PROFILES[profile or _sqlite_profile].items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+        cursor.close()
+
+    return engine
+
+if _sqlite_profile not in SQLITE_PROFILES:
+    raise ValueError(f"Profil SQLite inconnu: {_sqlite_profile} (variable d'environnement PG_SQLITE_PROFILE)")
+
+engine = apply_sqlite_profile(create_engine('sqlite:///password_manager.db'))
+
+
+@dataclass
+class ActionStats:
+    """
+    Compteurs cumulés d'une action (unité de travail nommée)
+    """
+    calls: int = 0
+    sessions: int = 0
+    transactions: int = 0
+
+class UnitOfWork:
+    """
+    Unité de travail : une session et une transaction partagées par tous les accès à la base d'une action utilisateur.
+    Les helpers de ce module (et donc les méthodes des modèles) l'utilisent automatiquement quand aucune session
+    ne leur est passée ; ils se contentent alors d'un `flush`, la validation a lieu à la sortie de l'unité.
+    """
+
+    def __init__(self, name: str, engine: Engine):
+        self.name = name
+        self.engine = engine
+        # Les objets restent lisibles après la validation et la fermeture de la session
+        self.session = Session(engine, expire_on_commit=False)
+        self.transactions = 0
+        self._sessions: WeakSet[Session] = WeakSet()
+        self._sessions_opened = 0
+        self._after_commit: list[Callable[[], None]] = []
+
+    @property
+    def sessions(self) -> int:
+        """
+        Nombre de sessions ayant ouvert une transaction pendant l'unité (1 si tout est passé par l'unité)
+        """
+        return self._sessions_opened
+
+    def _track(self, session: Session):
+        self.transactions += 1
+        if session not in self._sessions:
+            self._sessions.add(session)
+            self._sessions_opened += 1
+
+    def after_commit(self, callback: Callable[[], None]):
+        """
+        Diffère `callback` jusqu'à la validation de l'unité (abandonné en cas d'annulation)
+        """
+        self._after_commit.append(callback)
+
+_current_unit: ContextVar[UnitOfWork | None] = ContextVar("pg_unit_of_work", default=None)
+
+_action_stats: dict[str, ActionStats] = {}
+_action_stats_lock = Lock()
+
+@event.listens_for(Session, "after_begin")
+def _count_transaction(session, transaction, connection):
+    if (unit := _current_unit.get()) is not None:
+        unit._track(session)
+
+def current_unit(engine: Engine = engine) -> UnitOfWork | None:
+    """
+    Retourne l'unité de travail en cours sur `engine` dans le contexte courant, ou None
+    """
+    unit = _current_unit.get()
+    return unit if unit is not None and unit.engine is engine else None
+
+def active_unit() -> UnitOfWork | None:
+    """
+    Retourne l'unité de travail en cours dans le contexte courant, quel que soit son moteur, ou None
+    """
+    return _current_unit.get()
+
+@contextmanager
+def unit_of_work(name: str = "action", engine: Engine = engine) -> Iterator[Session]:
+    """
+    Exécute un bloc dans une unité de travail : une seule session et une seule transaction, validée à la sortie
+    du bloc ou annulée s'il lève une exception. Une unité ouverte dans une unité sur le même moteur réutilise celle-ci.
+
+    Le contexte est propre au thread (ou à la tâche asyncio) : un traitement lancé dans un thread de travail
+    doit ouvrir sa propre unité.
+    """
+    if (unit := current_unit(engine)) is not None:
+        yield unit.session
+        return
+
+    unit = UnitOfWork(name, engine)
+    token = _current_unit.set(unit)
+    try:
+        with unit.session:
+            try:
+                yield unit.session
+                unit.session.commit()
+            except BaseException:
+                unit.session.rollback()
+                raise
+    finally:
+        _current_unit.reset(token)
+        with _action_stats_lock:
+            stats = _action_stats.setdefault(name, ActionStats())
+            stats.calls += 1
+            stats.sessions += unit.sessions
+            stats.transactions += unit.transactions
+    for callback in unit._after_commit:
+        callback()
+
+def after_commit(callback: Callable[[], None], engine: Engine = engine, session: Session | None = None):
+    """
+    Exécute `callback` après la validation de l'unité de travail en cours si la modification y a été faite
+    (`session` absente ou session de l'unité), immédiatement sinon
+    """
+    if (unit := current_unit(engine)) is not None and session in (None, unit.session):
+        unit.after_commit(callback)
+    else:
+        callback()
+
+def action_stats() -> dict[str, ActionStats]:
+    """
+    Retourne, par nom d'action, le nombre d'exécutions et les sessions et transactions ouvertes au total
+    """
+    with _action_stats_lock:
+        return {name: ActionStats(**vars(stats)) for name, stats in _action_stats.items()}
+
+def reset_action_stats():
+    with _action_stats_lock:
+        _action_stats.clear()
+
+def _commit(session: Session, engine: Engine):
+    # Dans l'unité de travail, la validation est différée à sa sortie
+    if (unit := current_unit(engine)) is not None and session is unit.session:
+        session.flush()
+    else:
+        session.commit()
 
 from enum import Enum
 
@@ -33,6 +209,8 @@ def interact(statement: Select[_TSelectParam], engine: Engine = engine, session:
     return result
 
 def execute(func: Callable, engine: Engine = engine, session: Session | None = None, **kwargs):
+    if session is None and (unit := current_unit(engine)) is not None:
+        session = unit.session
     if (must_be_closed := session is None):
         session = Session(engine)
 
@@ -57,15 +235,53 @@ def query(statement: Select[_TSelectParam], engine: Engine = engine, session: Se
         func=request
     )
 
+def detached_copy(orm_instance: SQLModel) -> SQLModel:
+    """
+    Copie des seules colonnes de l'instance : recopier les relations les chargerait et rattacherait la copie
+    à la session. Les informations notées sur l'instance (base d'origine) suivent la copie.
+    """
+    copy = orm_instance.__class__.model_validate(orm_instance.model_dump())
+    inspect(copy).info.update(inspect(orm_instance).info)
+    return copy
+
 def insert(orm_instance: SQLModel, engine: Engine = engine, session: Session | None = None):
     if not is_table_model_class(orm_instance.__class__):
         raise ValueError("Instance is not a SQLModel instance")
 
     def request(session: Session):
         session.add(orm_instance)
-        session.commit()
+        _commit(session, engine)
         session.refresh(orm_instance)
-        return orm_instance.__class__.model_validate(orm_instance)
+        return detached_copy(orm_instance)
+
+    return execute(
+        engine=engine,
+        session=session,
+        func=request
+    )
+
+def insert_many(model: type[SQLModel], rows: list[dict], engine: Engine = engine, session: Session | None = None) -> list[int]:
+    """
+    Insère plusieurs lignes en une seule requête (executemany) et une seule transaction,
+    et retourne leurs identifiants dans l'ordre des lignes.
+    En cas d'erreur, la transaction est annulée et aucune ligne du lot n'est insérée
+    (dans une unité de travail, l'erreur remonte et c'est l'unité qui est annulée).
+    """
+    if not is_table_model_class(model):
+        raise ValueError("Model is not a SQLModel table")
+
+    def request(session: Session):
+        if not rows:
+            return []
+        try:
+            ids = list(session.scalars(sql_insert(model).returning(model.id, sort_by_parameter_order=True), rows))
+            _commit(session, engine)
+        except Exception:
+            # Dans une unité de travail, c'est l'unité entière qui est annulée à sa sortie
+            if (unit := current_unit(engine)) is None or session is not unit.session:
+                session.rollback()
+            raise
+        return ids
 
     return execute(
         engine=engine,
@@ -79,7 +295,7 @@ def update(orm_instance: SQLModel, engine: Engine = engine, session: Session | N
     
     def request(session: Session):
         session.add(orm_instance)
-        session.commit()
+        _commit(session, engine)
         session.refresh(orm_instance)
 
     return execute(
@@ -94,7 +310,7 @@ def delete(orm_instance: SQLModel, engine: Engine = engine, session: Session | N
     
     def request(session: Session):
         session.delete(orm_instance)
-        session.commit()
+        _commit(session, engine)
 
     return execute(
         engine=engine,
@@ -0,0 +1,64 @@
+# pg.data.events.py
+"""
+Notifications de modification des mots de passe (création, modification, suppression)
+"""
+
+import warnings
+from enum import StrEnum
+from threading import Lock
+from typing import Callable, NamedTuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sqlalchemy import Engine
+    from .models.password import Password
+
+
+class ChangeKind(StrEnum):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+class PasswordChange(NamedTuple):
+    """
+    Modification d'un mot de passe, avec la ligne concernée (état après modification, ou avant suppression)
+    et le moteur de la base modifiée (plusieurs bases peuvent avoir les mêmes identifiants)
+    """
+    kind: ChangeKind
+    user_id: int
+    password_id: int
+    password: "Password"
+    engine: "Engine | None" = None
+
+Listener = Callable[[list[PasswordChange]], None]
+
+_listeners: list[Listener] = []
+_listeners_lock = Lock()
+
+def subscribe(listener: Listener) -> Callable[[], None]:
+    """
+    Abonne une fonction aux modifications ; elle reçoit toujours une liste (un lot lors d'un import).
+    Retourne la fonction de désabonnement.
+    """
+    with _listeners_lock:
+        _listeners.append(listener)
+
+    def unsubscribe():
+        with _listeners_lock:
+            if listener in _listeners:
+                _listeners.remove(listener)
+
+    return unsubscribe
+
+def emit(*changes: PasswordChange):
+    """
+    Notifie un lot de modifications à tous les abonnés
+    """
+    if not changes:
+        return
+    with _listeners_lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(list(changes))
+        except Exception as e:
+            warnings.warn(f"Erreur dans l'abonné {listener!r} aux modifications de mots de passe: {e}", RuntimeWarning)
@@ -0,0 +1,83 @@
+# pg.data.fulltext.py
+"""
+Index plein texte SQLite (FTS5) des informations de connexion : site, identifiant, description et email
+"""
+
+import re
+
+from sqlalchemy import Connection, Engine, MetaData, Table, Column, Integer, String, text
+
+
+FTS_TABLE = "password_fts"
+
+# Table externe : le contenu reste dans `password`, l'index est tenu à jour par les déclencheurs
+password_fts = Table(
+    FTS_TABLE,
+    MetaData(),  # Métadonnées séparées pour que `create_all` ne tente pas de créer la table virtuelle
+    Column("rowid", Integer, primary_key=True),
+    Column(FTS_TABLE, String),  # Colonne cachée portant le nom de la table, cible de MATCH
+    Column("rank"),
+    Column("url", String),
+    Column("key", String),
+    Column("description", String),
+    Column("email", String),
+)
+
+_DDL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        url, key, description, email,
+        content='password', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS password_fts_insert AFTER INSERT ON password BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, url, key, description, email)
+        VALUES (new.id, new.url, new.key, new.description, new.email);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS password_fts_delete AFTER DELETE ON password BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, url, key, description, email)
+        VALUES ('delete', old.id, old.url, old.key, old.description, old.email);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS password_fts_update AFTER UPDATE OF url, key, description, email ON password BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, url, key, description, email)
+        VALUES ('delete', old.id, old.url, old.key, old.description, old.email);
+        INSERT INTO {FTS_TABLE}(rowid, url, key, description, email)
+        VALUES (new.id, new.url, new.key, new.description, new.email);
+    END""",
+)
+
+def create_search_index(connection: Connection) -> bool:
+    """
+    Crée l'index plein texte et ses déclencheurs s'ils n'existent pas encore.
+    Un index créé sur une base existante est aussitôt reconstruit à partir des mots de passe déjà enregistrés.
+
+    Returns:
+        bool: True si l'index vient d'être créé
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": FTS_TABLE}
+    ).first() is not None
+    for statement in _DDL:
+        connection.exec_driver_sql(statement)
+    if not exists:
+        connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return not exists
+
+def rebuild_search_index(engine: Engine):
+    """
+    Reconstruit entièrement l'index plein texte à partir de la table `password`
+    """
+    with engine.begin() as connection:
+        create_search_index(connection)
+        connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+def match_expression(search: str) -> str | None:
+    """
+    Convertit une saisie libre en expression FTS5 sûre : chaque mot devient un préfixe entre guillemets,
+    tous les mots doivent être présents. Retourne None si la saisie ne contient aucun mot.
+    """
+    tokens = re.findall(r"\w+", search)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
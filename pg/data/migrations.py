@@ -0,0 +1,130 @@
+# pg.data.migrations.py
+"""
+Migrations versionnées du schéma : `SQLModel.metadata.create_all` crée les tables manquantes mais ne modifie
+jamais une table existante ; les étapes ci-dessous amènent les bases déjà en service au schéma courant
+"""
+
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import Connection, Engine, text
+from sqlalchemy.exc import OperationalError
+
+from .fulltext import create_search_index
+from ..utils.security import legacy_ciphertext
+
+
+SCHEMA_TABLE = "schema_version"
+
+Migration = tuple[int, str, Callable[[Connection], None]]
+
+def _hot_path_indexes(connection: Connection):
+    # Listes par utilisateur, tri et pagination par site, identifiant ou date (voir `Password.page`)
+    connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_password_user_id ON password (user_id)")
+    for column in ("url", "key", "date_added", "date_updated"):
+        connection.exec_driver_sql(f'CREATE INDEX IF NOT EXISTS ix_password_user_{column} ON password (user_id, "{column}")')
+    connection.exec_driver_sql("ANALYZE password")
+
+def _full_text_index(connection: Connection):
+    create_search_index(connection)
+
+CIPHERTEXT_BATCH_SIZE = 5000
+
+def _binary_ciphertexts(connection: Connection):
+    # Jetons Fernet texte (base64) -> enveloppe binaire (en-tête 0x80), sans déchiffrer ; la colonne garde son
+    # type déclaré sur les bases existantes (affinité TEXT de SQLite : les valeurs binaires sont stockées telles quelles)
+    last_id = 0
+    while (rows := connection.exec_driver_sql(
+        "SELECT id, password_encrypted FROM password "
+        "WHERE typeof(password_encrypted) = 'text' AND id > ? ORDER BY id LIMIT ?",
+        (last_id, CIPHERTEXT_BATCH_SIZE)
+    ).all()):
+        connection.exec_driver_sql(
+            "UPDATE password SET password_encrypted = ? WHERE id = ?",
+            [(legacy_ciphertext(token), password_id) for password_id, token in rows]
+        )
+        last_id = rows[-1][0]
+
+def _key_rotation_checkpoints(connection: Connection):
+    # Une rotation en cours par utilisateur : nouvelle clé et dernier mot de passe rechiffré (voir `services.rotation`)
+    connection.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS key_rotation ("
+        'user_id INTEGER PRIMARY KEY REFERENCES "user" (id) ON DELETE CASCADE, '
+        "new_key TEXT NOT NULL, "
+        "algorithm INTEGER NOT NULL, "
+        "last_password_id INTEGER NOT NULL DEFAULT 0, "
+        "rows_done INTEGER NOT NULL DEFAULT 0, "
+        "started_at TEXT NOT NULL, "
+        "updated_at TEXT NOT NULL)"
+    )
+
+def _key_rotation_rewind(connection: Connection):
+    # Un mot de passe écrit pendant une rotation derrière le point de reprise (modification par un coffre resté sur
+    # l'ancienne clé, identifiant réutilisé) fait reculer le point de reprise : il sera rechiffré avant la bascule
+    for event in ("INSERT", "UPDATE OF password_encrypted"):
+        name = "key_rotation_rewind_" + event.split()[0].lower()
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON password BEGIN "
+            "UPDATE key_rotation SET last_password_id = NEW.id - 1 "
+            "WHERE user_id = NEW.user_id AND last_password_id >= NEW.id; "
+            "END"
+        )
+
+# Étapes ordonnées ; une étape publiée ne doit plus être modifiée, on en ajoute une nouvelle
+MIGRATIONS: list[Migration] = [
+    (1, "Index des requêtes par utilisateur, site et date", _hot_path_indexes),
+    (2, "Index plein texte des mots de passe", _full_text_index),
+    (3, "Mots de passe chiffrés stockés en binaire", _binary_ciphertexts),
+    (4, "Points de reprise des rotations de clé", _key_rotation_checkpoints),
+    (5, "Retour du point de reprise d'une rotation sur écriture concurrente", _key_rotation_rewind),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def _ensure_schema_table(connection: Connection):
+    connection.exec_driver_sql(
+        f"CREATE TABLE IF NOT EXISTS {SCHEMA_TABLE} ("
+        "version INTEGER PRIMARY KEY, "
+        "description TEXT NOT NULL, "
+        "applied_at TEXT NOT NULL)"
+    )
+
+def current_version(connection: Connection) -> int:
+    """
+    Retourne la version du schéma de la base (0 si aucune migration n'a été appliquée)
+    """
+    _ensure_schema_table(connection)
+    return connection.execute(text(f"SELECT COALESCE(MAX(version), 0) FROM {SCHEMA_TABLE}")).scalar_one()
+
+def schema_is_current(engine: Engine) -> bool:
+    """
+    Indique si la base est déjà à la dernière version du schéma, par une seule lecture et sans rien créer :
+    permet au démarrage d'éviter `create_all` et les migrations
+    """
+    try:
+        with engine.connect() as connection:
+            return connection.execute(text(f"SELECT COALESCE(MAX(version), 0) FROM {SCHEMA_TABLE}")).scalar_one() >= LATEST_VERSION
+    except OperationalError:  # Base neuve : la table des versions n'existe pas encore
+        return False
+
+def migrate(engine: Engine) -> list[int]:
+    """
+    Applique, dans l'ordre, les migrations pas encore appliquées, chacune dans sa propre transaction
+
+    Returns:
+        list[int]: Les versions appliquées
+    """
+    applied = []
+    with engine.begin() as connection:
+        version = current_version(connection)
+    for migration_version, description, step in MIGRATIONS:
+        if migration_version <= version:
+            continue
+        with engine.begin() as connection:
+            step(connection)
+            connection.execute(
+                text(f"INSERT INTO {SCHEMA_TABLE} (version, description, applied_at) VALUES (:version, :description, :applied_at)"),
+                {"version": migration_version, "description": description, "applied_at": datetime.now().isoformat()}
+            )
+        applied.append(migration_version)
+    return applied
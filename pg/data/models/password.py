@@ -4,17 +4,37 @@ Modèles de données pour les mots de passe
 """
 
 from pydantic_extra_types.phone_numbers import PhoneNumber
-from pydantic import EmailStr, ValidationError, HttpUrl
+from pydantic import EmailStr, ValidationError, HttpUrl, field_validator
 from datetime import datetime
+from typing import TYPE_CHECKING
 
 from sqlmodel import SQLModel, Field, Relationship, Column, Session, select
-from sqlalchemy import Engine
+from sqlalchemy import Engine, Index, event, inspect, literal, tuple_
+from sqlalchemy.orm import joinedload, selectinload
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import InvalidToken
 
 from ...utils.debugging import AutoStrRepr
-from ...utils.type import HttpUrlType
+from ...utils.type import HttpUrlType, CiphertextType
 from ...utils.security import encrypt_password, decrypt_password
 
-from ..database import engine, query, insert, delete
+from ..database import engine, execute, query, insert, delete, after_commit, FetchMode
+from ..fulltext import password_fts, match_expression
+from ..vault import get_vault
+from ..rotation import pending_rotation
+from ..async_database import aquery, ainsert, adelete, run_blocking, sync_engine_of
+from ..events import ChangeKind, PasswordChange, emit
+
+if TYPE_CHECKING:
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from .user import User
+
+
+def _bind(engine: Engine, session: Session|None) -> Engine:
+    """
+    Moteur réellement modifié : celui de la session donnée, sinon `engine` (directement ou via l'unité de travail)
+    """
+    return session.get_bind() if session is not None else engine
 
 
 class PasswordBase(SQLModel, AutoStrRepr):
@@ -22,11 +42,19 @@ class PasswordBase(SQLModel, AutoStrRepr):
     url: HttpUrl = Field(sa_column=Column(HttpUrlType), description="URL du site / service")
     description: str | None = Field(None, description="Description par l'utilisateur du site / service")
     key: str = Field(description="Clé / identifiant")
-    password_encrypted: str = Field(None, description="Mot de passe chiffré")
+    password_encrypted: bytes | None = Field(None, sa_column=Column(CiphertextType), description="Mot de passe chiffré (enveloppe binaire)")
     email: EmailStr | None = Field(None, description="Email associé")
     phone: PhoneNumber | None = Field(None, description="Numéro de téléphone associé")
 
+# Colonnes proposées pour le tri paginé, chacune couverte par un index (user_id, colonne)
+PAGE_ORDERS = ("id", "url", "key", "date_added", "date_updated")
+
 class Password(PasswordBase, table=True):
+    __table_args__ = (
+        Index("ix_password_user_id", "user_id"),
+        *(Index(f"ix_password_user_{column}", "user_id", column) for column in PAGE_ORDERS if column != "id"),
+    )
+
     id: int = Field(default=None, primary_key=True , description="Identifiant de l'enregistrement d'informations de connection")
     date_added: datetime = Field(default_factory=datetime.now, description="Date de création du mot de passe")
     date_updated: datetime = Field(default_factory=datetime.now, description="Date de dernière modification du mot de passe")
@@ -34,67 +62,259 @@ class Password(PasswordBase, table=True):
     # Relationship to the User model, setting up a one-to-many relationship
     user: "User" = Relationship(back_populates="passwords")
 
+    def _user_if_loaded(self) -> "User | None":
+        """
+        Retourne la relation `user` si elle est déjà chargée (chargement anticipé, accès précédent), sans requête
+        """
+        state = inspect(self)
+        if "user" in state.unloaded:
+            return None
+        return state.dict.get("user")
+
     @property
-    def loaded_user(self):
+    def loaded_user(self) -> "User":
         """
-        Retourne l'utilisateur complet (contournement de l'import paresseux depuis la base de données)
+        Retourne l'utilisateur complet : la relation déjà chargée si possible, sinon par `User.get_by_id`
+        (session du mot de passe, cache, puis requête) plutôt que par un chargement paresseux
         """
+        if (user := self._user_if_loaded()) is not None:
+            return user
         from ..models.user import User
-        # TODO : trouver une manière de vérifier si l'import est passeux
-        # if isinstance(self.user, User):  # Si l'utilisateur est déjà chargé, on le retourne directement
-        #     return self.user
-        return User.get_by_id(self.user_id)
+        return User.get_by_id(self.user_id, engine=self._engine(), session=inspect(self).session)
+
+    def _engine(self) -> Engine:
+        """
+        Base d'où vient le mot de passe : celle de sa session, sinon celle notée au chargement ou à l'insertion
+        (objet détaché), sinon la base par défaut
+        """
+        state = inspect(self)
+        if state.session is not None:
+            return sync_engine_of(state.session.get_bind())
+        return state.info.get("engine", engine)
     
     @property
     def password(self):
         """
-        Retourne le mot de passe en clair
+        Retourne le mot de passe en clair (via le coffre ouvert de l'utilisateur s'il est connecté)
         """
-        return decrypt_password(self.password_encrypted, self.loaded_user.encryption_key)
+        if (vault := get_vault(self.user_id, self._engine())):
+            return vault.decrypt(self.password_encrypted)
+        try:
+            return decrypt_password(self.password_encrypted, self.loaded_user.encryption_key)
+        except (InvalidTag, InvalidToken):
+            # Rotation de clé en cours : le mot de passe a peut-être déjà été rechiffré avec la nouvelle clé
+            rotation = pending_rotation(self.user_id, engine=self._engine(), session=inspect(self).session)
+            if rotation is None:
+                raise
+            return decrypt_password(self.password_encrypted, rotation.new_key)
     
     @password.setter
     def password(self, password: str):
         """
-        Définit le mot de passe en clair
+        Définit le mot de passe en clair (via le coffre ouvert de l'utilisateur s'il est connecté)
         """
+        if (vault := get_vault(self.user_id, self._engine())):
+            self.password_encrypted = vault.encrypt(password)
+            return
         self.password_encrypted = encrypt_password(password, self.loaded_user.encryption_key)
+
+    async def aget_password(self, engine: Engine=engine) -> str:
+        """
+        Version asynchrone de la lecture de `password` : le déchiffrement s'exécute hors de la boucle d'événements
+        """
+        if (vault := get_vault(self.user_id, engine)):
+            return await run_blocking(vault.decrypt, self.password_encrypted)
+        from ..models.user import User
+        user = self._user_if_loaded() or await User.aget_by_id(self.user_id, engine=engine)
+        try:
+            return await run_blocking(decrypt_password, self.password_encrypted, user.encryption_key)
+        except (InvalidTag, InvalidToken):
+            # Rotation de clé en cours : le mot de passe a peut-être déjà été rechiffré avec la nouvelle clé
+            rotation = await run_blocking(pending_rotation, self.user_id, engine)
+            if rotation is None:
+                raise
+            return await run_blocking(decrypt_password, self.password_encrypted, rotation.new_key)
+
+    async def aset_password(self, password: str, engine: Engine=engine):
+        """
+        Version asynchrone de l'affectation de `password` : le chiffrement s'exécute hors de la boucle d'événements
+        """
+        if (vault := get_vault(self.user_id, engine)):
+            self.password_encrypted = await run_blocking(vault.encrypt, password)
+            return
+        from ..models.user import User
+        user = self._user_if_loaded() or await User.aget_by_id(self.user_id, engine=engine)
+        self.password_encrypted = await run_blocking(encrypt_password, password, user.encryption_key)
     
     def refresh(self, engine: Engine=engine, session: Session=None):
         """
         Rafraîchit les données de l'utilisateur à partir de la base de données
         """
-        if not session:
-            with Session(engine) as session:
-                session.refresh(self)
-        else:
-            session.refresh(self)
+        execute(engine=engine, session=session, func=lambda session: session.refresh(self))
 
     @staticmethod
-    def get_by_id(id: int, engine: Engine=engine, session: Session|None=None) -> "Password":
+    def with_user(statement, load_user: bool, many: bool=False):
+        """
+        Ajoute le chargement anticipé de l'utilisateur : une jointure pour une seule ligne,
+        une seule requête `IN` supplémentaire pour une liste (quel que soit le nombre de lignes)
         """
-        Retourne un mot de passe à partir de son identifiant
+        if not load_user:
+            return statement
+        return statement.options(selectinload(Password.user) if many else joinedload(Password.user))
+
+    @staticmethod
+    def get_by_id(id: int, engine: Engine=engine, session: Session|None=None, load_user: bool=False) -> "Password":
+        """
+        Retourne un mot de passe à partir de son identifiant (avec son utilisateur si `load_user`)
         """
         return query(
             engine=engine,
             session=session,
-            statement = select(Password).where(Password.id == id)
+            statement = Password.with_user(select(Password).where(Password.id == id), load_user)
+        )
+
+    @staticmethod
+    async def aget_by_id(id: int, engine: Engine=engine, session: "AsyncSession|None"=None, load_user: bool=False) -> "Password":
+        """
+        Version asynchrone de `get_by_id`
+        """
+        return await aquery(
+            engine=engine,
+            session=session,
+            statement = Password.with_user(select(Password).where(Password.id == id), load_user)
         )
+
+    @staticmethod
+    def _url_condition(url: str | HttpUrl, user_id: int|None):
+        condition = (Password.url.contains(str(url))) | (Password.key.contains(str(url)))
+        if user_id is not None:
+            condition = (Password.user_id == user_id) & condition
+        return condition
     
     @staticmethod
-    def get_by_url(url: str | HttpUrl, engine: Engine=engine, session: Session|None=None) -> "Password":
+    def get_by_url(url: str | HttpUrl, user_id: int|None=None, engine: Engine=engine, session: Session|None=None, load_user: bool=False) -> "Password":
         """
-        Retourne un mot de passe à partir de l'URL du site / service
+        Retourne un mot de passe à partir de l'URL du site / service (restreint à l'utilisateur s'il est précisé)
         """
         return query(
             engine=engine,
             session=session,
-            statement = select(
-                Password
-            ).where(
-                # TODO : prendre en compte l'utilisateur...
-                # (Password.user_id == user_id) &
-                ((Password.url.contains(url)) | (Password.key.contains(url)))
-            )
+            statement = Password.with_user(select(Password).where(Password._url_condition(url, user_id)), load_user)
+        )
+
+    @staticmethod
+    async def aget_by_url(url: str | HttpUrl, user_id: int|None=None, engine: Engine=engine, session: "AsyncSession|None"=None, load_user: bool=False) -> "Password":
+        """
+        Version asynchrone de `get_by_url`
+        """
+        return await aquery(
+            engine=engine,
+            session=session,
+            statement = Password.with_user(select(Password).where(Password._url_condition(url, user_id)), load_user)
+        )
+
+    @staticmethod
+    def _page_statement(user_id: int, order_by: str, after: tuple|None, limit: int, load_user: bool=False):
+        descending = order_by.startswith("-")
+        if (column_name := order_by.lstrip("-")) not in PAGE_ORDERS:
+            raise ValueError(f"Tri non supporté: {order_by} (disponibles: {', '.join(PAGE_ORDERS)})")
+        # L'identifiant départage les valeurs égales et rend l'ordre total
+        columns = [Password.id] if column_name == "id" else [getattr(Password, column_name), Password.id]
+
+        if after is not None and len(after) != len(columns):
+            raise ValueError(f"Curseur incompatible avec le tri {order_by}: {len(columns)} valeur(s) attendue(s), {len(after)} reçue(s)")
+
+        statement = select(Password).where(Password.user_id == user_id)
+        if after is not None:
+            key = tuple_(*columns)
+            cursor = tuple_(*(literal(value, column.type) for column, value in zip(columns, after)))
+            statement = statement.where(key < cursor if descending else key > cursor)
+        statement = statement.order_by(
+            *(column.desc() if descending else column.asc() for column in columns)
+        ).limit(limit + 1)
+        return Password.with_user(statement, load_user, many=True), columns
+
+    @staticmethod
+    def _page_result(passwords: list["Password"], columns: list, limit: int) -> tuple[list["Password"], tuple|None]:
+        if len(passwords) <= limit:
+            return passwords, None
+        last = passwords[limit - 1]
+        return passwords[:limit], tuple(getattr(last, column.key) for column in columns)
+
+    @staticmethod
+    def page(user_id: int, order_by: str="id", after: tuple|None=None, limit: int=100, engine: Engine=engine, session: Session|None=None, load_user: bool=False) -> tuple[list["Password"], tuple|None]:
+        """
+        Retourne une page des mots de passe de l'utilisateur triés par `order_by` (une colonne de `PAGE_ORDERS`,
+        précédée de "-" pour l'ordre décroissant) et le curseur de la page suivante, ou None s'il s'agit de la dernière.
+
+        La pagination se fait par clé (les lignes situées après le curseur `after`) et non par décalage :
+        grâce aux index composites (user_id, colonne), la page 500 coûte autant que la première.
+        Avec `load_user`, l'utilisateur est chargé en une requête pour toute la page (voir `loaded_user`).
+        """
+        statement, columns = Password._page_statement(user_id, order_by, after, limit, load_user)
+        passwords = query(
+            engine=engine,
+            session=session,
+            fetch_mode=FetchMode.ALL,
+            statement=statement
+        )
+        return Password._page_result(passwords, columns, limit)
+
+    @staticmethod
+    async def apage(user_id: int, order_by: str="id", after: tuple|None=None, limit: int=100, engine: Engine=engine, session: "AsyncSession|None"=None, load_user: bool=False) -> tuple[list["Password"], tuple|None]:
+        """
+        Version asynchrone de `page`
+        """
+        statement, columns = Password._page_statement(user_id, order_by, after, limit, load_user)
+        passwords = await aquery(
+            engine=engine,
+            session=session,
+            fetch_mode=FetchMode.ALL,
+            statement=statement
+        )
+        return Password._page_result(passwords, columns, limit)
+
+    @staticmethod
+    def _search_statement(user_id: int, expression: str, limit: int, load_user: bool=False):
+        statement = select(
+            Password
+        ).join(
+            password_fts, password_fts.c.rowid == Password.id
+        ).where(
+            password_fts.c.password_fts.match(expression),
+            Password.user_id == user_id
+        ).order_by(
+            password_fts.c.rank
+        ).limit(limit)
+        return Password.with_user(statement, load_user, many=True)
+
+    @staticmethod
+    def search(user_id: int, search: str, limit: int=50, engine: Engine=engine, session: Session|None=None, load_user: bool=False) -> list["Password"]:
+        """
+        Recherche plein texte (FTS5) dans le site, l'identifiant, la description et l'email des mots de passe
+        de l'utilisateur, par pertinence décroissante. Chaque mot saisi est cherché comme préfixe.
+        """
+        if (expression := match_expression(search)) is None:
+            return []
+        return query(
+            engine=engine,
+            session=session,
+            fetch_mode=FetchMode.ALL,
+            statement=Password._search_statement(user_id, expression, limit, load_user)
+        )
+
+    @staticmethod
+    async def asearch(user_id: int, search: str, limit: int=50, engine: Engine=engine, session: "AsyncSession|None"=None, load_user: bool=False) -> list["Password"]:
+        """
+        Version asynchrone de `search`
+        """
+        if (expression := match_expression(search)) is None:
+            return []
+        return await aquery(
+            engine=engine,
+            session=session,
+            fetch_mode=FetchMode.ALL,
+            statement=Password._search_statement(user_id, expression, limit, load_user)
         )
     
     @staticmethod
@@ -105,12 +325,16 @@ class Password(PasswordBase, table=True):
         try:
             PasswordCreate.model_validate(data)
             password = Password(**data)
+            inspect(password).info["engine"] = _bind(engine, session)  # Coffre de l'utilisateur sur cette base
             password.password = data.get("password")
-            return insert(
+            password = insert(
                 engine=engine,
                 session=session,
                 orm_instance=password
             )
+            change = PasswordChange(ChangeKind.CREATED, password.user_id, password.id, password, _bind(engine, session))
+            after_commit(lambda: emit(change), engine, session)  # Notifié une fois la modification validée
+            return password
         except ValidationError as e:
             raise ValueError(str(e))
     
@@ -120,16 +344,60 @@ class Password(PasswordBase, table=True):
         """
         try:
             PasswordUpdate.model_validate(data)
+            inspect(self).info["engine"] = _bind(engine, session)  # Coffre de l'utilisateur sur cette base
             for key, value in data.items():
                 if key == "password":
                     self.password = value
                 else:
                     setattr(self, key, value)
-            return insert(
+            password = insert(
                 engine=engine,
                 session=session,
                 orm_instance=self
             )
+            change = PasswordChange(ChangeKind.UPDATED, password.user_id, password.id, password, _bind(engine, session))
+            after_commit(lambda: emit(change), engine, session)  # Notifié une fois la modification validée
+            return password
+        except ValidationError as e:
+            raise ValueError(str(e))
+    
+    @staticmethod
+    async def acreate(engine: Engine=engine, session: "AsyncSession|None"=None, **data: "PasswordCreate") -> "Password":
+        """
+        Version asynchrone de `create`
+        """
+        try:
+            PasswordCreate.model_validate(data)
+            password = Password(**data)
+            await password.aset_password(data.get("password"), engine=engine)
+            return await ainsert(
+                engine=engine,
+                session=session,
+                orm_instance=password,
+                # Notifié une fois la modification validée
+                on_commit=lambda password: emit(PasswordChange(ChangeKind.CREATED, password.user_id, password.id, password, engine))
+            )
+        except ValidationError as e:
+            raise ValueError(str(e))
+
+    async def aupdate(self, engine: Engine=engine, session: "AsyncSession|None"=None, **data: "PasswordUpdate") -> "Password":
+        """
+        Version asynchrone de `update`
+        """
+        try:
+            PasswordUpdate.model_validate(data)
+            for key, value in data.items():
+                if key == "password":
+                    await self.aset_password(value, engine=engine)
+                else:
+                    setattr(self, key, value)
+            return await ainsert(
+                engine=engine,
+                session=session,
+                orm_instance=self,
+                # Notifié une fois la modification validée
+                on_commit=lambda password: emit(PasswordChange(ChangeKind.UPDATED, password.user_id, password.id, password, engine))
+            )
         except ValidationError as e:
             raise ValueError(str(e))
     
@@ -138,18 +406,33 @@ class Password(PasswordBase, table=True):
         """
         Met à jour un mot de passe existant à partir de son identifiant
         """
-        password = Password.get_by_id(id, engine=engine)
+        password = Password.get_by_id(id, engine=engine, session=session)
         return password.update(engine=engine, session=session, **data)
     
     def delete(self, engine: Engine=engine, session: Session|None=None):
         """
         Supprime un mot de passe
         """
-        return delete(
+        result = delete(
             orm_instance=self,
             engine=engine,
             session=session
         )
+        change = PasswordChange(ChangeKind.DELETED, self.user_id, self.id, self, _bind(engine, session))
+        after_commit(lambda: emit(change), engine, session)  # Notifié une fois la modification validée
+        return result
+    
+    async def adelete(self, engine: Engine=engine, session: "AsyncSession|None"=None):
+        """
+        Version asynchrone de `delete`
+        """
+        change = PasswordChange(ChangeKind.DELETED, self.user_id, self.id, self, engine)
+        return await adelete(
+            orm_instance=self,
+            engine=engine,
+            session=session,
+            on_commit=lambda: emit(change)  # Notifié une fois la modification validée
+        )
     
     @staticmethod
     def delete_by_id(id: int, engine: Engine=engine, session: Session|None=None):
@@ -157,18 +440,33 @@ class Password(PasswordBase, table=True):
         Supprime un mot de passe à partir de son identifiant
         """
         password = Password.get_by_id(id=id, engine=engine, session=session)
-        return password.delete(engine=engine)
+        return password.delete(engine=engine, session=session)
     
-    def __str__(self):
+    def to_text(self, password: str) -> str:
+        """
+        Retourne la fiche lisible du mot de passe, avec le mot de passe en clair déjà déchiffré
+        """
         return  f"Site web: {self.url} (id: {self.id})\n" \
                 f"Description: {self.description or 'Non spécifié'}\n" \
                 f"Identifiant: {self.key}\n" \
-                f"Mot de passe: {self.password}\n" \
+                f"Mot de passe: {password}\n" \
                 f"Email: {self.email or 'Non spécifié'}\n" \
                 f"Téléphone: {(self.phone or '    Non spécifié')[4:]}\n" \
                 f"Date de création: {self.date_added}\n" \
                 f"Date de dernière modification: {self.date_updated}"
 
+    def __str__(self):
+        return self.to_text(self.password)
+
+# La base d'origine reste connue une fois la session fermée, pour retrouver le coffre de l'utilisateur sur cette base
+@event.listens_for(Password, "load")
+def _remember_loaded_engine(password: Password, context):
+    inspect(password).info["engine"] = sync_engine_of(context.session.get_bind())
+
+@event.listens_for(Password, "after_insert")
+def _remember_inserted_engine(mapper, connection, password: Password):
+    inspect(password).info["engine"] = sync_engine_of(connection.engine)
+
 class PasswordCreate(PasswordBase):
     ...
 
@@ -176,6 +474,16 @@ class PasswordUpdate(SQLModel, AutoStrRepr):
     """Modèle pour la mise à jour d'un mot de passe (sans `site`)"""
     description: str | None = None
     key: str | None = None
-    password_encrypted: str | None = None
+    password_encrypted: bytes | None = None
     email: EmailStr | None = None
     phone: PhoneNumber | None = None
+
+    @field_validator("key")
+    @classmethod
+    def _not_null(cls, value: str | None) -> str:
+        """
+        Champ facultatif dans une mise à jour, mais obligatoire en base : il ne peut pas être vidé
+        """
+        if value is None:
+            raise ValueError("Ce champ obligatoire ne peut pas être nul")
+        return value
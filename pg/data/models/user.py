@@ -3,14 +3,25 @@
 Modèles de données pour les utilisateurs
 """
 
+from typing import TYPE_CHECKING
+
 from sqlmodel import SQLModel, Field, Relationship, Session, select
 from sqlalchemy import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
 from pydantic import ValidationError
+import warnings
 
-from ...utils.security import generate_key, hash_password, supported_algorithms
+from ...utils.security import generate_key, hash_password, verify_password as verify_hash, needs_rehash, supported_algorithms, DEFAULT_KDF
 from ...utils.debugging import AutoStrRepr
 
-from ..database import engine, query, insert, delete
+from ..database import engine, execute, query, insert, delete, after_commit, current_unit
+from ..async_database import aquery, aupdate, run_blocking
+from ..cache import user_cache, username_cache, MISSING
+
+if TYPE_CHECKING:
+    from sqlmodel.ext.asyncio.session import AsyncSession
 
 
 class UserBase(SQLModel, AutoStrRepr):
@@ -19,55 +30,182 @@ class UserBase(SQLModel, AutoStrRepr):
 class User(UserBase, table = True):
     id: int = Field(default=None, primary_key=True, description="L'identifiant unique d'un utilisateur")
     password_hash: str = Field(description="Le mot de passe haché")
-    hash_algorithm: str = Field(default="sha256", description="Le nom de l'algorith de cryptage à utiliser pour cet utilisateur", allow_mutation=False)
-    encryption_key: str = Field(default_factory=generate_key, description="La clef de hachage à utiliser pour cet utilisateur", allow_mutation=False)
+    hash_algorithm: str = Field(default=DEFAULT_KDF, description="Le nom de l'algorith de cryptage à utiliser pour cet utilisateur (ou l'algorithme hashlib d'une ancienne empreinte)")
+    encryption_key: str = Field(default_factory=generate_key, description="La clef de chiffrement des mots de passe de cet utilisateur (remplacée par `services.rotation`)")
 
     # Relationship to the Password model, setting up a one-to-many relationship
     passwords: list["Password"] = Relationship(back_populates="user")
 
     def set_password(self, password: str):
         """
-        Définit le mot de passe en clair
+        Définit le mot de passe en clair (une ancienne empreinte hashlib passe à la fonction de dérivation par défaut)
         """
+        if self.hash_algorithm not in supported_algorithms():
+            self.hash_algorithm = DEFAULT_KDF
         self.password_hash = hash_password(password, self.hash_algorithm)
+        self._forget()
     
     def refresh(self, engine: Engine=engine, session: Session=None):
         """
         Rafraîchit les données de l'utilisateur à partir de la base de données
         """
-        if not session:
-            with Session(engine) as session:
-                session.refresh(self)
-        else:
-            session.refresh(self)
+        execute(engine=engine, session=session, func=lambda session: session.refresh(self))
 
     def verify_password(self, password: str) -> bool:
         """
         Vérifie si le mot de passe fourni correspond à celui enregistré pour cet utilisateur
+        (lève `KdfUnavailableError` si son algorithme n'est pas disponible sur cette installation)
+        """
+        return verify_hash(password, self.password_hash, legacy_algorithm=self.hash_algorithm)
+
+    async def averify_password(self, password: str) -> bool:
+        """
+        Version asynchrone de `verify_password` : le hachage s'exécute hors de la boucle d'événements
+        """
+        return await run_blocking(self.verify_password, password)
+
+    @property
+    def needs_rehash(self) -> bool:
+        """
+        Le hachage enregistré est obsolète (ancienne empreinte hashlib ou coût inférieur au minimum)
+        """
+        algorithm = self.hash_algorithm if self.hash_algorithm in supported_algorithms() else DEFAULT_KDF
+        return needs_rehash(self.password_hash, algorithm)
+
+    def check_password(self, password: str, engine: Engine=engine, session: Session|None=None) -> bool:
         """
-        return hash_password(password, self.hash_algorithm) == self.password_hash
+        Vérifie le mot de passe à la connexion et, s'il est correct, remplace un hachage obsolète
+        (le mot de passe en clair n'est disponible qu'à ce moment)
+        """
+        if not self.verify_password(password):
+            return False
+        if self.needs_rehash:
+            try:
+                self.set_password(password)
+                insert(orm_instance=self, engine=engine, session=session)
+                self._forget(engine)
+                after_commit(lambda: self._forget(engine), engine, session)
+            except SQLAlchemyError as e:
+                # La connexion reste valide ; le hachage sera refait à la prochaine
+                warnings.warn(f"Impossible de mettre à jour le hachage de l'utilisateur {self.username}: {e}", RuntimeWarning)
+        return True
+
+    async def acheck_password(self, password: str, engine: Engine=engine) -> bool:
+        """
+        Version asynchrone de `check_password` : hachages hors de la boucle d'événements
+        """
+        if not await run_blocking(self.verify_password, password):
+            return False
+        if self.needs_rehash:
+            try:
+                await run_blocking(self.set_password, password)
+                await aupdate(self, engine=engine)
+                self._forget(engine)
+            except SQLAlchemyError as e:
+                warnings.warn(f"Impossible de mettre à jour le hachage de l'utilisateur {self.username}: {e}", RuntimeWarning)
+        return True
     
+    @staticmethod
+    def _cached(user_id: int, engine: Engine, session: "Session|AsyncSession|None") -> "User | None":
+        """
+        Retourne l'utilisateur sans requête s'il est déjà dans la session ou dans le cache, None sinon.
+        Avec une session, l'utilisateur en cache y est rattaché comme s'il venait d'y être chargé.
+        """
+        session = getattr(session, "sync_session", session)  # Session sous-jacente d'une session asynchrone
+        if session is not None and (user := session.identity_map.get(identity_key(User, user_id))) is not None:
+            return user
+        if (columns := user_cache.get((engine, user_id))) is MISSING:
+            return None
+        user = User.model_validate(columns)  # Nouvelle instance à chaque fois : le cache ne peut pas être modifié
+        # Instance détachée, comme après une requête : l'enregistrer la met à jour au lieu de l'insérer
+        make_transient_to_detached(user)
+        if session is not None:
+            session.add(user)
+        return user
+
+    @staticmethod
+    def _remember(user: "User", engine: Engine):
+        user_cache.put((engine, user.id), user.model_dump())
+        username_cache.put((engine, user.username), user.id)
+
+    def _forget(self, engine: Engine|None=None):
+        """
+        Retire l'utilisateur du cache (pour tous les moteurs si `engine` n'est pas précisé)
+        """
+        if engine is None:
+            user_cache.invalidate_matching(lambda key: key[1] == self.id)
+            username_cache.invalidate_matching(lambda key: key[1] == self.username)
+        else:
+            user_cache.invalidate((engine, self.id))
+            username_cache.invalidate((engine, self.username))
+
     @staticmethod
     def get_by_id(id: int, engine: Engine=engine, session: Session|None=None) -> "User":
         """
-        Retourne un utilisateur à partir de son identifiant
+        Retourne un utilisateur à partir de son identifiant (depuis la session ou le cache si possible)
         """
-        return query(
+        if session is None and (unit := current_unit(engine)) is not None:
+            session = unit.session
+        if (user := User._cached(id, engine, session)) is not None:
+            return user
+        user = query(
             engine=engine,
             session=session,
             statement = select(User).where(User.id == id)
         )
+        if user is not None:
+            User._remember(user, engine)
+        return user
 
     @staticmethod
     def get_by_username(username: str, engine: Engine=engine, session: Session|None=None) -> "User":
         """
-        Retourne un utilisateur à partir de son nom d'utilisateur
+        Retourne un utilisateur à partir de son nom d'utilisateur (depuis la session ou le cache si possible)
+        """
+        if session is None and (unit := current_unit(engine)) is not None:
+            session = unit.session
+        if (user_id := username_cache.get((engine, username))) is not MISSING and (user := User._cached(user_id, engine, session)) is not None:
+            return user
+        user = query(
+            engine=engine,
+            session=session,
+            statement = select(User).where(User.username == username)
+        )
+        if user is not None:
+            User._remember(user, engine)
+        return user
+    
+    @staticmethod
+    async def aget_by_id(id: int, engine: Engine=engine, session: "AsyncSession|None"=None) -> "User":
+        """
+        Version asynchrone de `get_by_id`
+        """
+        if (user := User._cached(id, engine, session)) is not None:
+            return user
+        user = await aquery(
+            engine=engine,
+            session=session,
+            statement = select(User).where(User.id == id)
+        )
+        if user is not None:
+            User._remember(user, engine)
+        return user
+
+    @staticmethod
+    async def aget_by_username(username: str, engine: Engine=engine, session: "AsyncSession|None"=None) -> "User":
+        """
+        Version asynchrone de `get_by_username`
         """
-        return query(
+        if (user_id := username_cache.get((engine, username))) is not MISSING and (user := User._cached(user_id, engine, session)) is not None:
+            return user
+        user = await aquery(
             engine=engine,
             session=session,
             statement = select(User).where(User.username == username)
         )
+        if user is not None:
+            User._remember(user, engine)
+        return user
     
     @staticmethod
     def create(engine: Engine=engine, session: Session|None=None, **data: "UserCreate") -> "User":
@@ -78,8 +216,8 @@ class User(UserBase, table = True):
             user_data = UserCreate.model_validate(data).model_dump()
             if User.get_by_username(user_data["username"], engine, session):
                 raise ValueError(f"Username {user_data['username']} already exists")
-            if data["hash_algorithm"] not in supported_algorithms():
-                raise ValueError(f"Hash algorithm {data['hash_algorithm']} is not supported")
+            if user_data["hash_algorithm"] not in supported_algorithms():
+                raise ValueError(f"Hash algorithm {user_data['hash_algorithm']} is not supported (available: {', '.join(supported_algorithms())})")
             user_data["password_hash"] = hash_password(user_data.pop("password"), user_data["hash_algorithm"])
             return insert(
                 orm_instance=User(**user_data),
@@ -98,11 +236,15 @@ class User(UserBase, table = True):
                 UserUpdate.model_validate(data)
                 for key, value in data.items():
                     setattr(self, key, value)
-                return insert(
+                user = insert(
                     orm_instance=self,
                     session=session,
                     engine=engine
                 )
+                self._forget(engine)
+                # Une lecture concurrente a pu remettre l'ancienne version en cache avant la validation
+                after_commit(lambda: self._forget(engine), engine, session)
+                return user
             except ValidationError as e:
                 raise ValueError(f"Invalid data: {e}")
     
@@ -125,6 +267,8 @@ class User(UserBase, table = True):
             session=session,
             engine=engine
         )
+        self._forget(engine)
+        after_commit(lambda: self._forget(engine), engine, session)
     
     @staticmethod
     def delete_by_id(id: int, engine: Engine=engine, session: Session|None=None):
@@ -140,7 +284,7 @@ class UserLogin(UserBase):
     password: str = Field(regex=r'^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[\W_]).{8,}$', min_length=8, description="Mot de passe en clair (sera haché)")
 
 class UserCreate(UserLogin):
-    hash_algorithm: str = Field(default="sha256", description="Le nom de l'algorith de cryptage à utiliser pour cet utilisateur")
+    hash_algorithm: str = Field(default=DEFAULT_KDF, description="Le nom de l'algorith de cryptage à utiliser pour cet utilisateur")
 
 class UserUpdate(SQLModel, AutoStrRepr):
     password: str | None = Field(regex=r'^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[\W_]).{8,}$', min_length=8, description="Mot de passe en clair (sera haché)")
@@ -0,0 +1,41 @@
+# pg.data.rotation.py
+"""
+Rotations de clé en cours (table `key_rotation`, écrite par `services.rotation`) : un coffre ouvert pendant
+une rotation doit chiffrer avec la nouvelle clé et déchiffrer avec les deux
+"""
+
+from dataclasses import dataclass
+
+from sqlalchemy import Engine, text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+
+from .database import engine, execute
+
+
+@dataclass
+class RotationCheckpoint:
+    """
+    Rotation en cours d'un utilisateur
+    """
+    user_id: int
+    new_key: str
+    algorithm: int
+    last_password_id: int = 0
+    rows_done: int = 0
+
+def pending_rotation(user_id: int, engine: Engine=engine, session: Session|None=None) -> RotationCheckpoint | None:
+    """
+    Retourne la rotation en cours de l'utilisateur, ou None
+    """
+    def request(session: Session):
+        try:
+            row = session.execute(
+                text("SELECT new_key, algorithm, last_password_id, rows_done FROM key_rotation WHERE user_id = :user_id"),
+                {"user_id": user_id}
+            ).first()
+        except OperationalError:  # Base pas encore migrée : aucune rotation possible
+            return None
+        return RotationCheckpoint(user_id, *row) if row is not None else None
+
+    return execute(engine=engine, session=session, func=request)
@@ -0,0 +1,29 @@
+# pg.data.sqlite_profiles.py
+"""
+Profils de performance SQLite, sans dépendance : importables sans charger SQLAlchemy (options de la ligne de commande)
+"""
+
+# Profils de connexion SQLite, appliqués par PRAGMA à chaque nouvelle connexion
+SQLITE_PROFILES: dict[str, dict[str, str | int]] = {
+    # Réglages par défaut de SQLite (journal de rollback, synchronisation complète)
+    "legacy": {},
+    # Journal WAL sans compromis sur la durabilité : chaque commit est synchronisé sur disque
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16_000,  # 16 Mio (valeur négative = en Kio)
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5_000,
+    },
+    # Journal WAL, synchronisation aux checkpoints uniquement : un crash du système peut perdre les dernières transactions
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64_000,  # 64 Mio
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5_000,
+    },
+}
+DEFAULT_SQLITE_PROFILE = "durable"
@@ -0,0 +1,171 @@
+# pg.data.vault.py
+"""
+Coffre déverrouillé : l'utilisateur connecté et son objet de chiffrement, construits une seule fois à la connexion
+"""
+
+from collections.abc import Iterable, Iterator
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Engine
+from sqlmodel import Session
+
+from ..utils.search_engine import drop_index
+from ..utils.security import PasswordCipher, get_cipher, decrypt_many, DecryptionResult, DECRYPT_CHUNK_SIZE, DEFAULT_CIPHER
+from .cache import user_cache, username_cache
+from .database import engine
+from .rotation import RotationCheckpoint, pending_rotation
+
+if TYPE_CHECKING:
+    from .models.user import User
+
+
+class VaultLockedError(RuntimeError):
+    """Le coffre a été verrouillé, il n'est plus possible de chiffrer ou déchiffrer"""
+
+
+class Vault:
+    """
+    Coffre d'un utilisateur connecté.
+
+    Garde en mémoire l'utilisateur et un objet de chiffrement prêt à l'emploi, de sorte que chiffrer ou
+    déchiffrer un mot de passe ne déclenche ni requête SQL ni reconstruction de la clé.
+    """
+
+    def __init__(self, user: "User", rotation: RotationCheckpoint | None = None, engine: Engine = engine):
+        self.engine = engine
+        self.user_id: int = user.id
+        self.username: str = user.username
+        self._user = user
+        self._key: str | None = user.encryption_key
+        self._cipher: PasswordCipher | None = get_cipher(self._key)
+        if rotation is not None:
+            self.begin_rotation(rotation.new_key, rotation.algorithm)
+
+    @property
+    def user(self) -> "User":
+        self._check_unlocked()
+        return self._user
+
+    @property
+    def locked(self) -> bool:
+        return self._cipher is None
+
+    def _check_unlocked(self):
+        if self._cipher is None:
+            raise VaultLockedError(f"Le coffre de l'utilisateur {self.username} est verrouillé")
+
+    def encrypt(self, password: str) -> bytes:
+        """
+        Chiffre un mot de passe en clair avec la clé de l'utilisateur (enveloppe AES-GCM)
+        """
+        self._check_unlocked()
+        return self._cipher.encrypt(password)
+
+    def decrypt(self, encrypted_password: bytes | str) -> str:
+        """
+        Déchiffre un mot de passe avec la clé de l'utilisateur, quel que soit son format
+        """
+        self._check_unlocked()
+        return self._cipher.decrypt(encrypted_password)
+
+    def decrypt_many(self, encrypted_passwords: Iterable[bytes | str], chunk_size: int = DECRYPT_CHUNK_SIZE, workers: int | None = None, use_processes: bool = False) -> Iterator[DecryptionResult]:
+        """
+        Déchiffre un lot de mots de passe par paquets (voir `utils.security.decrypt_many`)
+        """
+        self._check_unlocked()
+        return decrypt_many(
+            encrypted_passwords,
+            key=self._key,
+            chunk_size=chunk_size,
+            workers=workers,
+            use_processes=use_processes,
+            cipher=self._cipher
+        )
+
+    def begin_rotation(self, new_key: str, algorithm: int = DEFAULT_CIPHER):
+        """
+        Rotation de clé en cours : chiffre avec la nouvelle clé et déchiffre avec la nouvelle puis l'ancienne,
+        les mots de passe n'étant pas encore tous rechiffrés
+        """
+        self._check_unlocked()
+        self._cipher = get_cipher(new_key, algorithm, previous_keys=(self._key,))
+
+    def finish_rotation(self, user: "User"):
+        """
+        Rotation terminée : l'utilisateur (avec sa nouvelle clé) et sa clé remplacent les anciens
+        """
+        self._check_unlocked()
+        self._user = user
+        self._key = user.encryption_key
+        self._cipher = get_cipher(self._key, self._cipher.algorithm)
+
+    def lock(self):
+        """
+        Verrouille le coffre : oublie l'objet de chiffrement et l'utilisateur (y compris dans le cache
+        des utilisateurs, qui contient la clé, et l'index de recherche, qui contient les URL), et le retire du registre
+        """
+        self._cipher = None
+        self._key = None
+        self._user = None
+        with _registry_lock:
+            if _vaults.get((self.engine, self.user_id)) is self:
+                del _vaults[(self.engine, self.user_id)]
+        user_cache.invalidate((self.engine, self.user_id))
+        username_cache.invalidate((self.engine, self.username))
+        drop_index(self.user_id, self.engine)
+
+    def __enter__(self) -> "Vault":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.lock()
+
+    def __repr__(self):
+        return f"Vault(user_id={self.user_id}, locked={self.locked})"
+
+
+# Clé (moteur, identifiant) comme le cache des utilisateurs : deux bases peuvent avoir un utilisateur de même identifiant
+_vaults: dict[tuple[Engine, int], Vault] = {}
+_registry_lock = Lock()
+
+def unlock(user: "User", engine: Engine=engine) -> Vault:
+    """
+    Ouvre (ou rouvre) le coffre de l'utilisateur après une connexion réussie et l'enregistre pour la session
+    (en tenant compte d'une rotation de clé interrompue)
+    """
+    vault = Vault(user, pending_rotation(user.id, engine), engine)
+    with _registry_lock:
+        previous = _vaults.get((engine, user.id))
+        _vaults[(engine, user.id)] = vault
+    if previous is not None:
+        previous.lock()
+    return vault
+
+def get_vault(user_id: int, engine: Engine=engine) -> Vault | None:
+    """
+    Retourne le coffre ouvert de l'utilisateur sur cette base, ou None s'il n'est pas connecté
+    """
+    return _vaults.get((engine, user_id))
+
+def vault_for(user: "User", engine: Engine=engine, session: Session|None=None) -> Vault:
+    """
+    Retourne le coffre ouvert de l'utilisateur, ou un coffre temporaire (non enregistré) s'il n'est pas connecté
+    """
+    if session is not None:
+        engine = session.get_bind()
+    return get_vault(user.id, engine) or Vault(user, pending_rotation(user.id, engine, session), engine)
+
+def lock(user_id: int | None = None, engine: Engine | None = None):
+    """
+    Verrouille le coffre d'un utilisateur (sur toutes les bases, ou seulement sur `engine`),
+    ou tous les coffres ouverts si aucun identifiant n'est donné
+    """
+    with _registry_lock:
+        vaults = [
+            vault for (vault_engine, vault_user_id), vault in _vaults.items()
+            if (user_id is None or vault_user_id == user_id) and (engine is None or vault_engine is engine)
+        ]
+    for vault in vaults:
+        vault.lock()
+    drop_index(user_id, engine)  # Y compris les index construits sans coffre ouvert (coffre temporaire de `vault_for`)
@@ -0,0 +1,449 @@
+# pg.server.py
+"""
+Serveur HTTP local (API JSON) : plusieurs clients partagent la même base SQLite à travers un seul processus.
+
+Chaque requête est traitée dans son propre thread et sa propre unité de travail (une session, une transaction) ;
+les threads se partagent le pool de connexions du moteur. Authentification par jeton :
+`POST /api/login` retourne un jeton à envoyer dans l'en-tête `Authorization: Bearer <jeton>`.
+
+    POST   /api/login                      {"username", "password"} -> {"token", "user_id"}
+    POST   /api/logout
+    GET    /api/passwords?order_by=&after=&limit=    page de mots de passe et curseur de la page suivante
+    GET    /api/passwords/search?q=&limit=
+    GET    /api/passwords/<id>?reveal=1
+    POST   /api/passwords                  {"url", "key", "password", ...}
+    PATCH  /api/passwords/<id>             {"key", "password", "description", ...}
+    DELETE /api/passwords/<id>
+    POST   /api/import                     corps CSV -> bilan de l'import
+    GET    /api/export                     -> fichier CSV
+
+Erreurs : 400 (corps invalide, champ non autorisé), 401, 404 (route ou mot de passe inconnu),
+405 (méthode non acceptée sur une route connue, en-tête `Allow`), 409 (enregistrement déjà existant),
+503 (connexion d'un compte dont le hachage nécessite argon2-cffi, absent du serveur).
+"""
+
+import base64
+import json
+import re
+import secrets
+import sys
+import tempfile
+import time
+import traceback
+from datetime import datetime
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from threading import Lock
+from typing import Any
+from urllib.parse import urlsplit, parse_qs
+
+from pydantic import ValidationError
+from sqlalchemy import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from .data.database import engine as default_engine, unit_of_work
+from .data.models import User, Password
+from .data.vault import unlock, lock, get_vault
+from .services.password import import_passwords, export_passwords, search_passwords
+from .utils.security import KdfUnavailableError
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8157
+TOKEN_TTL = 3600           # Durée de validité d'un jeton sans activité, en secondes
+MAX_PAGE_SIZE = 1000
+MAX_BODY_SIZE = 50 * 1024 * 1024
+UPDATABLE_FIELDS = {"description", "key", "password", "email", "phone"}
+CREATABLE_FIELDS = UPDATABLE_FIELDS | {"url"}  # Identifiant, utilisateur, mot de passe chiffré et dates : fixés par le serveur
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class TokenStore:
+    """
+    Jetons d'accès des clients connectés. Le coffre d'un utilisateur reste ouvert tant qu'il a au moins un jeton valide.
+    """
+
+    def __init__(self, engine: Engine = default_engine, ttl: float = TOKEN_TTL):
+        self.engine = engine
+        self.ttl = ttl
+        self._tokens: dict[str, tuple[int, float]] = {}
+        self._lock = Lock()
+
+    def issue(self, user: User) -> str:
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self._tokens[token] = (user.id, time.monotonic() + self.ttl)
+        if get_vault(user.id, self.engine) is None:
+            unlock(user, self.engine)
+        return token
+
+    def resolve(self, token: str) -> int | None:
+        """
+        Retourne l'utilisateur du jeton (et prolonge sa validité), ou None s'il est inconnu ou expiré
+        """
+        now = time.monotonic()
+        with self._lock:
+            if (entry := self._tokens.get(token)) is None:
+                return None
+            user_id, expires_at = entry
+            if expires_at <= now:
+                del self._tokens[token]
+                expired = True
+            else:
+                self._tokens[token] = (user_id, now + self.ttl)
+                expired = False
+        if expired:
+            self._lock_if_unused(user_id)
+            return None
+        return user_id
+
+    def revoke(self, token: str):
+        with self._lock:
+            entry = self._tokens.pop(token, None)
+        if entry is not None:
+            self._lock_if_unused(entry[0])
+
+    def purge(self):
+        """
+        Oublie les jetons expirés et verrouille les coffres qui ne sont plus utilisés
+        """
+        now = time.monotonic()
+        with self._lock:
+            expired = [token for token, (_, expires_at) in self._tokens.items() if expires_at <= now]
+            user_ids = {self._tokens.pop(token)[0] for token in expired}
+        for user_id in user_ids:
+            self._lock_if_unused(user_id)
+
+    def _lock_if_unused(self, user_id: int):
+        with self._lock:
+            if any(owner == user_id for owner, _ in self._tokens.values()):
+                return
+        lock(user_id, self.engine)
+
+    def clear(self):
+        with self._lock:
+            user_ids = {user_id for user_id, _ in self._tokens.values()}
+            self._tokens.clear()
+        for user_id in user_ids:
+            lock(user_id, self.engine)
+
+
+def serialize_password(password: Password, clear_password: str | None = None) -> dict:
+    data = {
+        "id": password.id,
+        "url": str(password.url),
+        "key": password.key,
+        "description": password.description,
+        "email": password.email,
+        "phone": password.phone,
+        "date_added": password.date_added.isoformat(),
+        "date_updated": password.date_updated.isoformat(),
+    }
+    if clear_password is not None:
+        data["password"] = clear_password
+    return data
+
+def encode_cursor(cursor: tuple | None, order_by: str) -> str | None:
+    """
+    Curseur de pagination opaque (base64 du tri et des valeurs JSON) : il n'est valable que pour le même tri
+    """
+    if cursor is None:
+        return None
+    values = [value.isoformat() if isinstance(value, datetime) else value if isinstance(value, int) else str(value) for value in cursor]
+    return base64.urlsafe_b64encode(json.dumps({"order_by": order_by, "values": values}).encode()).decode()
+
+def decode_cursor(cursor: str | None, order_by: str) -> tuple | None:
+    if not cursor:
+        return None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        values = data["values"]
+        if data["order_by"] != order_by:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Curseur obtenu avec un autre tri ({data['order_by']}), à réutiliser avec le même order_by")
+        # Types attendus : valeur de la colonne de tri, puis l'identifiant qui départage les valeurs égales
+        column = order_by.lstrip("-")
+        types = (int,) if column == "id" else (datetime if column in ("date_added", "date_updated") else str, int)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError
+        values = [datetime.fromisoformat(value) if expected is datetime else value for value, expected in zip(values, types)]
+        if not all(isinstance(value, expected) and not isinstance(value, bool) for value, expected in zip(values, types)):
+            raise ValueError
+        return tuple(values)
+    except (ValueError, TypeError, KeyError):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Curseur invalide")
+
+def is_conflict(error: IntegrityError) -> bool:
+    """
+    Violation d'unicité (enregistrement déjà existant) ; les autres contraintes (NOT NULL, clés étrangères...)
+    relèvent de la validation et ne sont pas des conflits
+    """
+    return str(error.orig).startswith("UNIQUE constraint failed")
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    server: "PGServer"
+    protocol_version = "HTTP/1.1"  # Connexions persistantes
+    disable_nagle_algorithm = True  # En-têtes et corps sont écrits séparément : sans cela, +40 ms par réponse
+
+    # (méthode, chemin, fonction, authentification requise)
+    routes: list[tuple[str, re.Pattern, str, bool]] = [
+        ("POST", re.compile(r"/api/login"), "login", False),
+        ("POST", re.compile(r"/api/logout"), "logout", True),
+        ("GET", re.compile(r"/api/passwords"), "list_passwords", True),
+        ("GET", re.compile(r"/api/passwords/search"), "search", True),
+        ("GET", re.compile(r"/api/passwords/(?P<password_id>\d+)"), "get_password", True),
+        ("POST", re.compile(r"/api/passwords"), "create_password", True),
+        ("PATCH", re.compile(r"/api/passwords/(?P<password_id>\d+)"), "update_password", True),
+        ("DELETE", re.compile(r"/api/passwords/(?P<password_id>\d+)"), "delete_password", True),
+        ("POST", re.compile(r"/api/import"), "import_csv", True),
+        ("GET", re.compile(r"/api/export"), "export_csv", True),
+    ]
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_request(self, code: int | str = "-", size: int | str = "-"):
+        # Seul le journal des accès est désactivable ; les erreurs (`log_error`) sont toujours journalisées
+        if self.server.verbose:
+            super().log_request(code, size)
+
+    # --- Infrastructure ---
+
+    def _dispatch(self, method: str):
+        url = urlsplit(self.path)
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self.user = None
+        try:
+            body = self._read_body()
+            allowed = []
+            for route_method, pattern, name, authenticated in self.routes:
+                if (match := pattern.fullmatch(url.path)) is None:
+                    continue
+                if route_method != method:
+                    allowed.append(route_method)
+                    continue
+                engine = self.server.engine
+                with unit_of_work(f"api.{name}", engine=engine) as self.session:
+                    if authenticated:
+                        self.user = self._authenticate(engine)
+                    response = getattr(self, name)(body, **match.groupdict())
+                return self._send(*response)  # Réponse envoyée une fois la transaction validée
+            if allowed:
+                return self._send(HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"Méthode non autorisée: {method} {url.path}"}, {"Allow": ", ".join(allowed)})
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Route inconnue: {method} {url.path}")
+        except HTTPError as e:
+            self._send(e.status, {"error": str(e)})
+        except (ValueError, ValidationError) as e:
+            self._send(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+        except IntegrityError as e:
+            if not is_conflict(e):
+                self.log_error("Contrainte non respectée: %r", e.orig)
+                return self._send(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Erreur interne du serveur"})
+            self._send(HTTPStatus.CONFLICT, {"error": f"Conflit avec un enregistrement existant: {e.orig}"})
+        except Exception as e:
+            self.log_error("Erreur interne: %r", e)
+            traceback.print_exc(file=sys.stderr)  # `log_error` échappe les retours à la ligne
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Erreur interne du serveur"})
+
+    def _read_body(self) -> bytes:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True  # Fin du corps inconnue : la connexion ne peut pas être réutilisée
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "En-tête Content-Length invalide")
+        if length > MAX_BODY_SIZE:
+            self.close_connection = True  # Le corps n'est pas lu
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Corps de requête trop volumineux")
+        return self.rfile.read(length) if length else b""
+
+    def _json(self, body: bytes) -> dict:
+        try:
+            data = json.loads(body or b"{}")
+        except json.JSONDecodeError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"JSON invalide: {e}")
+        if not isinstance(data, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Un objet JSON est attendu")
+        return data
+
+    def _token(self) -> str | None:
+        scheme, _, token = (self.headers.get("Authorization") or "").partition(" ")
+        return token.strip() if scheme.lower() == "bearer" and token else None
+
+    def _authenticate(self, engine: Engine) -> User:
+        if (token := self._token()) is None or (user_id := self.server.tokens.resolve(token)) is None:
+            raise HTTPError(HTTPStatus.UNAUTHORIZED, "Authentification requise")
+        if (user := User.get_by_id(user_id, engine=engine)) is None:
+            self.server.tokens.revoke(token)
+            raise HTTPError(HTTPStatus.UNAUTHORIZED, "Utilisateur inconnu")
+        return user
+
+    def _send(self, status: HTTPStatus, payload: Any, headers: dict[str, str] | None = None):
+        """
+        Envoie la réponse : `payload` est sérialisé en JSON, sauf s'il s'agit déjà d'octets
+        """
+        headers = {"Content-Type": "application/json; charset=utf-8", **(headers or {})}
+        if payload is None:
+            body = b""
+        elif isinstance(payload, bytes):
+            body = payload
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _fields(self, body: bytes, allowed: set[str]) -> dict:
+        """
+        Corps JSON limité aux champs qu'un client peut fixer ; un mot de passe fourni doit être une chaîne non vide
+        """
+        data = self._json(body)
+        if (forbidden := set(data) - allowed):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Champs non modifiables: {', '.join(sorted(forbidden))}")
+        if "password" in data and not (isinstance(data["password"], str) and data["password"]):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Le mot de passe doit être une chaîne non vide")
+        return data
+
+    def _owned_password(self, password_id: str) -> Password:
+        password = Password.get_by_id(int(password_id), engine=self.server.engine)
+        if password is None or password.user_id != self.user.id:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Mot de passe {password_id} introuvable")
+        return password
+
+    def _limit(self, default: int) -> int:
+        try:
+            return max(1, min(int(self.query.get("limit", default)), MAX_PAGE_SIZE))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Paramètre limit invalide")
+
+    # --- Routes ---
+
+    def login(self, body: bytes):
+        data = self._json(body)
+        user = User.get_by_username(str(data.get("username", "")), engine=self.server.engine)
+        try:
+            if user is None or not user.check_password(str(data.get("password", "")), engine=self.server.engine):
+                raise HTTPError(HTTPStatus.UNAUTHORIZED, "Identifiants invalides")
+        except KdfUnavailableError as e:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, f"Connexion impossible sur ce serveur: {e}")
+        return HTTPStatus.OK, {"token": self.server.tokens.issue(user), "user_id": user.id}
+
+    def logout(self, body: bytes):
+        self.server.tokens.revoke(self._token())
+        return HTTPStatus.NO_CONTENT, None
+
+    def list_passwords(self, body: bytes):
+        order_by = self.query.get("order_by", "id")
+        passwords, cursor = Password.page(
+            self.user.id,
+            order_by=order_by,
+            after=decode_cursor(self.query.get("after"), order_by),
+            limit=self._limit(100),
+            engine=self.server.engine
+        )
+        return HTTPStatus.OK, {"items": [serialize_password(password) for password in passwords], "next": encode_cursor(cursor, order_by)}
+
+    def search(self, body: bytes):
+        passwords = search_passwords(self.user, self.session, self.query.get("q", ""), limit=self._limit(10))
+        return HTTPStatus.OK, {"items": [serialize_password(password) for password in passwords]}
+
+    def get_password(self, body: bytes, password_id: str):
+        password = self._owned_password(password_id)
+        reveal = self.query.get("reveal", "0").lower() in ("1", "true", "yes")
+        return HTTPStatus.OK, serialize_password(password, password.password if reveal else None)
+
+    def create_password(self, body: bytes):
+        data = self._fields(body, CREATABLE_FIELDS)
+        if "password" not in data:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Champ obligatoire manquant: password")
+        data["user_id"] = self.user.id
+        password = Password.create(engine=self.server.engine, **data)
+        return HTTPStatus.CREATED, serialize_password(password)
+
+    def update_password(self, body: bytes, password_id: str):
+        data = self._fields(body, UPDATABLE_FIELDS)
+        password = self._owned_password(password_id).update(engine=self.server.engine, **data)
+        return HTTPStatus.OK, serialize_password(password)
+
+    def delete_password(self, body: bytes, password_id: str):
+        self._owned_password(password_id).delete(engine=self.server.engine)
+        return HTTPStatus.NO_CONTENT, None
+
+    def import_csv(self, body: bytes):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = Path(directory) / "import.csv"
+            file_path.write_bytes(body)
+            # Session propre à l'import : chaque lot est validé dès qu'il est inséré
+            with Session(self.server.engine) as session:
+                summary = import_passwords(self.user, file_path, session=session)
+        return HTTPStatus.OK, {
+            "inserted": summary.inserted,
+            "skipped": summary.skipped,
+            "failed": [{"line": line, "reason": reason} for line, reason in summary.failed],
+        }
+
+    def export_csv(self, body: bytes):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = Path(directory) / "export.csv"
+            failed_ids = export_passwords(self.user, file_path, session=self.session)
+            content = file_path.read_bytes()
+        headers = {
+            "Content-Type": "text/csv; charset=utf-8",
+            "Content-Disposition": 'attachment; filename="passwords_export.csv"',
+        }
+        if failed_ids:
+            headers["X-Decryption-Failed"] = ",".join(map(str, failed_ids))
+        return HTTPStatus.OK, content, headers
+
+
+class PGServer(ThreadingHTTPServer):
+    """
+    Serveur HTTP multi-thread : un thread par connexion, une unité de travail par requête
+    """
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], engine: Engine = default_engine, verbose: bool = True):
+        super().__init__(address, RequestHandler)
+        self.engine = engine
+        self.verbose = verbose
+        self.tokens = TokenStore(engine)
+
+    def service_actions(self):
+        self.tokens.purge()
+
+    def server_close(self):
+        super().server_close()
+        self.tokens.clear()
+
+
+def run_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, engine: Engine = default_engine, verbose: bool = True):
+    """
+    Démarre le serveur et traite les requêtes jusqu'à l'interruption (Ctrl+C)
+    """
+    server = PGServer((host, port), engine=engine, verbose=verbose)
+    print(f"Serveur Password Gestion à l'écoute sur http://{host}:{server.server_port}/api (Ctrl+C pour arrêter)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -2,51 +2,196 @@
 import csv
 from pathlib import Path
 from datetime import datetime
-from sqlmodel import Session
-from fuzzywuzzy import process
-
-from ..data.models import User, Password
-
-
-def import_passwords(user: User, file_path: str | Path, session: Session=None) -> None:
-    with open(file_path, mode='r', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-
-        for record in reader:
-            Password.create(
-                session=session,
-                user_id=user.id,
-                url=record["url"],
-                description=record["description"] or None,
-                key=record["key"],
-                password=record["password"],
-                email=record["email"] or None,
-                phone=record["phone"] or None,
-                # Convertion les chaînes de caractères en objets datetime (à cause du format ISO utilisé par le CSV)
-                date_added=datetime.fromisoformat(record["date_added"]),
-                date_updated=datetime.fromisoformat(record["date_updated"])
+from dataclasses import dataclass, field
+from typing import Callable
+from sqlmodel import Session, select
+from pydantic import ValidationError
+
+from ..data.database import engine, insert_many
+from ..data.models import User, Password, PasswordCreate
+from ..data.vault import vault_for
+from ..data.events import ChangeKind, PasswordChange, emit, subscribe
+from ..utils.search_engine import user_index, index_changes
+
+IMPORT_CHUNK_SIZE = 500
+
+@dataclass
+class ImportSummary:
+    """
+    Bilan d'un import CSV
+    """
+    inserted: int = 0
+    skipped: int = 0
+    failed: list[tuple[int, str]] = field(default_factory=list)  # (numéro de ligne, raison)
+
+    @property
+    def processed(self) -> int:
+        return self.inserted + self.skipped + len(self.failed)
+
+def _parse_record(record: dict, user_id: int) -> dict:
+    """
+    Valide une ligne du CSV et retourne les colonnes à insérer (mot de passe encore en clair)
+    """
+    now = datetime.now()
+    data = {
+        "user_id": user_id,
+        "url": record["url"],
+        "description": record.get("description") or None,
+        "key": record["key"],
+        "email": record.get("email") or None,
+        "phone": record.get("phone") or None,
+        # Convertion les chaînes de caractères en objets datetime (à cause du format ISO utilisé par le CSV)
+        "date_added": datetime.fromisoformat(record["date_added"]) if record.get("date_added") else now,
+        "date_updated": datetime.fromisoformat(record["date_updated"]) if record.get("date_updated") else now,
+    }
+    if not record.get("password"):
+        raise ValueError("Mot de passe manquant")
+    validated = PasswordCreate.model_validate(data)
+    data.update(url=str(validated.url), email=validated.email, phone=validated.phone)
+    return data
+
+def import_passwords(user: User, file_path: str | Path, session: Session=None, chunk_size: int=IMPORT_CHUNK_SIZE, on_progress: Callable[[ImportSummary], None] | None=None) -> ImportSummary:
+    """
+    Importe les mots de passe d'un fichier CSV par lots : chaque lot est validé, chiffré puis inséré
+    en une seule requête et une seule transaction. Les doublons (même site et même identifiant) sont ignorés ;
+    si l'insertion d'un lot échoue, seul ce lot est annulé et ses lignes sont comptées en échec.
+    """
+    if session is None:
+        with Session(engine) as session:
+            return import_passwords(user, file_path, session=session, chunk_size=chunk_size, on_progress=on_progress)
+
+    vault = vault_for(user, session=session)
+    summary = ImportSummary()
+    changes: list[PasswordChange] = []
+    known = {
+        (str(url), key)
+        for url, key in session.exec(select(Password.url, Password.key).where(Password.user_id == user.id))
+    }
+    session.commit()  # Termine la transaction de lecture avant les lots d'écriture
+
+    def flush(chunk: list[tuple[int, dict]]):
+        rows = [data for _, data in chunk]
+        try:
+            ids = insert_many(Password, rows, session=session)
+        except Exception as e:
+            summary.failed.extend((line, f"Lot annulé: {e}") for line, _ in chunk)
+            known.difference_update((data["url"], data["key"]) for data in rows)
+        else:
+            summary.inserted += len(ids)
+            changes.extend(
+                PasswordChange(ChangeKind.CREATED, user.id, password_id, Password(id=password_id, **data), session.get_bind())
+                for password_id, data in zip(ids, rows)
             )
+        if on_progress:
+            on_progress(summary)
+
+    try:
+        with open(file_path, mode='r', encoding='utf-8') as csvfile:
+            reader = csv.DictReader(csvfile)
+            chunk: list[tuple[int, dict]] = []
+            for record in reader:
+                line = reader.line_num
+                try:
+                    data = _parse_record(record, user.id)
+                except (ValidationError, ValueError, KeyError) as e:
+                    summary.failed.append((line, str(e)))
+                    continue
+                if (data["url"], data["key"]) in known:
+                    summary.skipped += 1
+                    continue
+                known.add((data["url"], data["key"]))
+                data["password_encrypted"] = vault.encrypt(record["password"])
+                chunk.append((line, data))
+                if len(chunk) >= chunk_size:
+                    flush(chunk)
+                    chunk = []
+            if chunk:
+                flush(chunk)
+            elif on_progress:
+                on_progress(summary)
+    finally:
+        # Les lignes importées (y compris avant une interruption) sont notifiées en un seul lot
+        emit(*changes)
+    return summary
 
-def export_passwords(user: User, file_path: str | Path, session: Session) -> None:
-    user = User.get_by_id(user.id, session=session)
-    
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FIELDS = ("url", "description", "key", "password", "email", "phone", "date_added", "date_updated")
+
+def export_passwords(user: User, file_path: str | Path, session: Session=None, batch_size: int=EXPORT_BATCH_SIZE, on_progress: Callable[[int], None] | None=None) -> list[int]:
+    """
+    Exporte les mots de passe de l'utilisateur dans un fichier CSV et retourne
+    les identifiants des mots de passe qui n'ont pas pu être déchiffrés.
+
+    Les lignes sont lues par paquets de `batch_size` via un curseur (`yield_per`), déchiffrées avec
+    le chiffrement en cache du coffre puis écrites directement : la mémoire utilisée ne dépend pas
+    de la taille du coffre.
+    """
+    if session is None:
+        with Session(engine) as session:
+            return export_passwords(user, file_path, session=session, batch_size=batch_size, on_progress=on_progress)
+
+    vault = vault_for(user, session=session)
+    statement = select(
+        Password.id,
+        Password.url,
+        Password.description,
+        Password.key,
+        Password.password_encrypted,
+        Password.email,
+        Password.phone,
+        Password.date_added,
+        Password.date_updated
+    ).where(
+        Password.user_id == user.id
+    ).order_by(
+        Password.id
+    ).execution_options(yield_per=batch_size)
+
+    failed_ids = []
+    written = 0
     with open(file_path, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames={*Password.__fields__.keys(), "password"} - {"id", "user_id", "password_encrypted"})
-        writer.writeheader()
-        for password in user.passwords:
-            password_data: dict = password.model_dump(exclude=("id", "user_id", "password_encrypted"))
-            password_data["password"] = password.password
-            writer.writerow(password_data)
-
-def similar_passwords(user: User, session: Session, query: str, limit: int=10) -> list[Password]:
-    user = User.get_by_id(user.id, session=session)
-
-    # Trouver les correspondances avec leurs scores
-    correspondances = process.extract(query=query, choices=[pwd.url for pwd in user.passwords], limit=limit)
-
-    # Trier les objets en fonction des scores
-    return sorted(
-        user.passwords,
-        key=lambda obj: next(score for url, score in correspondances if url == obj.url),
-        reverse=True
-    )
\ No newline at end of file
+        writer = csv.writer(csvfile)
+        writer.writerow(EXPORT_FIELDS)
+        for batch in session.exec(statement).partitions():
+            decrypted = vault.decrypt_many([row.password_encrypted for row in batch], chunk_size=batch_size, workers=1, use_processes=False)
+            rows = []
+            for row, result in zip(batch, decrypted):
+                if not result.ok:
+                    failed_ids.append(row.id)
+                rows.append((row.url, row.description, row.key, result.password, row.email, row.phone, row.date_added, row.date_updated))
+            writer.writerows(rows)
+            written += len(rows)
+            if on_progress:
+                on_progress(written)
+    return failed_ids
+
+def _load_search_entries(user_id: int, session: Session):
+    return lambda: session.exec(select(Password.id, Password.url).where(Password.user_id == user_id)).all()
+
+# Les index déjà construits suivent les créations, modifications et suppressions
+subscribe(lambda changes: index_changes(changes, text=lambda password: password.url))
+
+def similar_passwords(user: User, session: Session, query: str, limit: int=10, load_user: bool=False) -> list[Password]:
+    """
+    Retourne les `limit` mots de passe dont l'URL est la plus proche de la recherche, par similarité décroissante
+    """
+    index = user_index(session.get_bind(), user.id, loader=_load_search_entries(user.id, session))
+    ranks = {password_id: rank for rank, (password_id, _) in enumerate(index.search(query, limit=limit))}
+    if not ranks:
+        return []
+    passwords = session.exec(Password.with_user(select(Password).where(Password.id.in_(ranks)), load_user, many=True)).all()
+    return sorted(passwords, key=lambda password: ranks[password.id])
+
+def search_passwords(user: User, session: Session, query: str, limit: int=10, load_user: bool=False) -> list[Password]:
+    """
+    Recherche les mots de passe de l'utilisateur : d'abord dans l'index plein texte,
+    puis par similarité approximative si aucun mot ne correspond (fautes de frappe)
+    """
+    return Password.search(user.id, query, limit=limit, session=session, load_user=load_user) or similar_passwords(
+        user=user,
+        session=session,
+        query=query,
+        limit=limit,
+        load_user=load_user
+    )
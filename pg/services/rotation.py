@@ -0,0 +1,166 @@
+# pg.services.rotation.py
+"""
+Rotation de la clé de chiffrement d'un utilisateur (ou changement de format de chiffrement).
+
+Les mots de passe sont lus par lots dans l'ordre des identifiants, déchiffrés avec l'ancienne clé et rechiffrés
+avec la nouvelle ; chaque lot est validé avec son point de reprise (table `key_rotation`), de sorte qu'une rotation
+interrompue reprend au lot suivant. La nouvelle clé ne remplace l'ancienne qu'à la fin, dans une seule transaction.
+
+Pendant la rotation, un coffre ouvert dans ce processus ou ouvert après son début (voir `data.vault.unlock`) chiffre
+avec la nouvelle clé et déchiffre avec les deux. Un mot de passe écrit derrière le point de reprise, par exemple par
+un coffre ouvert ailleurs avant le début de la rotation, fait reculer ce point (déclencheurs de la migration 5) :
+il est rechiffré avant la bascule. Un coffre ouvert avant le début de la rotation doit être rouvert après la bascule.
+"""
+
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import text, update
+from sqlmodel import Session, select
+
+from ..data.cache import user_cache
+from ..data.database import engine
+from ..data.models import User, Password
+from ..data.rotation import RotationCheckpoint, pending_rotation
+from ..data.vault import get_vault
+from ..utils.security import PasswordCipher, DEFAULT_CIPHER, generate_key, get_cipher, reencrypt_many
+
+ROTATION_BATCH_SIZE = 1000
+
+
+@dataclass
+class RotationReport:
+    """
+    Bilan d'une exécution de `rotate_encryption_key`
+    """
+    user_id: int
+    resumed: bool = False
+    rows: int = 0  # Mots de passe rechiffrés par cette exécution
+    total_rows: int = 0  # Depuis le début de la rotation, reprises comprises
+    batches: int = 0
+    failed: list[int] = field(default_factory=list)  # Identifiants illisibles avec l'une et l'autre clé, laissés tels quels
+    seconds: float = 0.0
+    completed: bool = False
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+def _save_checkpoint(session: Session, checkpoint: RotationCheckpoint, created: bool = False):
+    now = datetime.now().isoformat()
+    if created:
+        session.execute(
+            text(
+                "INSERT INTO key_rotation (user_id, new_key, algorithm, last_password_id, rows_done, started_at, updated_at) "
+                "VALUES (:user_id, :new_key, :algorithm, 0, 0, :now, :now)"
+            ),
+            {"user_id": checkpoint.user_id, "new_key": checkpoint.new_key, "algorithm": checkpoint.algorithm, "now": now}
+        )
+        return
+    session.execute(
+        text("UPDATE key_rotation SET last_password_id = :last_password_id, rows_done = :rows_done, updated_at = :now WHERE user_id = :user_id"),
+        {"user_id": checkpoint.user_id, "last_password_id": checkpoint.last_password_id, "rows_done": checkpoint.rows_done, "now": now}
+    )
+
+def _reencrypt_batch(session: Session, checkpoint: RotationCheckpoint, cipher: PasswordCipher, report: RotationReport, batch_size: int, workers: int, pool: Executor | None) -> int:
+    """
+    Rechiffre le lot suivant le point de reprise (sans valider) et retourne son nombre de lignes
+    """
+    # Écriture d'abord : le verrou en écriture est pris avant de lire le lot, aucune modification concurrente ne peut
+    # s'intercaler ; le point de reprise est relu, une écriture concurrente a pu le faire reculer (déclencheurs)
+    session.execute(
+        text("UPDATE key_rotation SET updated_at = :now WHERE user_id = :user_id"),
+        {"user_id": checkpoint.user_id, "now": datetime.now().isoformat()}
+    )
+    checkpoint.last_password_id = session.execute(
+        text("SELECT last_password_id FROM key_rotation WHERE user_id = :user_id"),
+        {"user_id": checkpoint.user_id}
+    ).scalar_one()
+    rows = session.exec(
+        select(Password.id, Password.password_encrypted)
+        .where(Password.user_id == checkpoint.user_id, Password.id > checkpoint.last_password_id)
+        .order_by(Password.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return 0
+    results = reencrypt_many(
+        [row.password_encrypted for row in rows],
+        cipher,
+        chunk_size=max(1, -(-len(rows) // max(workers, 1))),
+        workers=workers,
+        executor=pool
+    )
+    updates = []
+    for row, result in zip(rows, results):
+        if result.ok:
+            updates.append({"id": row.id, "password_encrypted": result.encrypted_password})
+        else:
+            report.failed.append(row.id)
+    if updates:
+        session.execute(update(Password), updates)
+    checkpoint.last_password_id = rows[-1].id
+    checkpoint.rows_done += len(updates)
+    _save_checkpoint(session, checkpoint)
+    report.rows += len(updates)
+    report.total_rows = checkpoint.rows_done
+    report.batches += 1
+    return len(rows)
+
+def rotate_encryption_key(user: User, new_key: str | None = None, algorithm: int = DEFAULT_CIPHER, session: Session = None, batch_size: int = ROTATION_BATCH_SIZE, workers: int = 1, use_processes: bool = True, on_progress: Callable[[RotationReport], None] | None = None) -> RotationReport:
+    """
+    Rechiffre tous les mots de passe de l'utilisateur avec une nouvelle clé (générée si `new_key` n'est pas donnée ;
+    passer la clé actuelle ne change que le format), un lot et une transaction à la fois, puis bascule sur la nouvelle
+    clé. Une rotation interrompue reprend là où elle s'était arrêtée, avec la clé et le format choisis au départ.
+    """
+    if session is None:
+        with Session(engine) as session:
+            return rotate_encryption_key(user, new_key, algorithm, session, batch_size, workers, use_processes, on_progress)
+
+    start = time.perf_counter()
+    # Clé actuelle relue en base : l'objet `user` peut dater d'avant une rotation terminée ailleurs
+    old_key = session.exec(select(User.encryption_key).where(User.id == user.id)).one()
+    resumed = (checkpoint := pending_rotation(user.id, session=session)) is not None
+    if resumed:
+        if new_key is not None and new_key != checkpoint.new_key:
+            raise ValueError(f"Une rotation vers une autre clé est en cours pour l'utilisateur {user.username}, elle doit d'abord être terminée")
+    else:
+        checkpoint = RotationCheckpoint(user.id, new_key or generate_key(), algorithm)
+        get_cipher(checkpoint.new_key, checkpoint.algorithm)  # Clé et format valides avant d'enregistrer quoi que ce soit
+        _save_checkpoint(session, checkpoint, created=True)
+    session.commit()
+
+    report = RotationReport(user.id, resumed=resumed, total_rows=checkpoint.rows_done)
+    cipher = get_cipher(checkpoint.new_key, checkpoint.algorithm, previous_keys=(old_key,))
+    if (vault := get_vault(user.id, session.get_bind())) is not None:
+        vault.begin_rotation(checkpoint.new_key, checkpoint.algorithm)
+
+    pool_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with (pool_class(workers) if workers > 1 else nullcontext()) as pool:
+        while _reencrypt_batch(session, checkpoint, cipher, report, batch_size, workers, pool):
+            session.commit()
+            report.seconds = time.perf_counter() - start
+            if on_progress:
+                on_progress(report)
+
+        # Bascule : la nouvelle clé est écrite en premier (verrou en écriture de la base), puis les mots de passe
+        # ajoutés depuis le dernier lot sont rechiffrés et le point de reprise supprimé, dans la même transaction
+        session.execute(update(User).where(User.id == user.id).values(encryption_key=checkpoint.new_key))
+        while _reencrypt_batch(session, checkpoint, cipher, report, batch_size, workers, pool):
+            pass
+        session.execute(text("DELETE FROM key_rotation WHERE user_id = :user_id"), {"user_id": user.id})
+        session.commit()
+
+    user_cache.invalidate_matching(lambda key: key[1] == user.id)
+    user.encryption_key = checkpoint.new_key
+    if vault is not None and not vault.locked:
+        vault.finish_rotation(user)
+    report.seconds = time.perf_counter() - start
+    report.completed = True
+    if on_progress:
+        on_progress(report)
+    return report
@@ -0,0 +1,222 @@
+# pg.utils.profiling.py
+"""
+Instrumentation à la demande (variable d'environnement PG_PROFILE=1) : requêtes SQL, lignes lues et opérations
+cryptographiques comptées par action (nom de l'unité de travail), avec détection des requêtes répétées en boucle (N+1).
+
+Le rapport est affiché sur la sortie d'erreur à la fin du programme, ou écrit en JSON dans le fichier désigné
+par PG_PROFILE_OUTPUT. Les déchiffrements faits dans des processus de travail (`decrypt_many` sur de très gros lots)
+ne sont pas comptés.
+"""
+
+import atexit
+import json
+import os
+import re
+import sys
+import threading
+import time
+import warnings
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import wraps
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import Engine, event
+
+from . import security
+from ..data.database import active_unit, action_stats
+
+PROFILE_OUTPUT = os.environ.get("PG_PROFILE_OUTPUT")
+# Exécutions d'une même forme de requête dans une action à partir desquelles un N+1 est signalé
+N_PLUS_ONE_THRESHOLD = int(os.environ.get("PG_PROFILE_N_PLUS_ONE", 5))
+
+OUTSIDE_ACTION = "(hors action)"
+CRYPTO_OPERATIONS = ("hash", "cipher", "encrypt", "decrypt")
+
+
+class NPlusOneWarning(RuntimeWarning):
+    """Une même requête est exécutée de nombreuses fois dans une action : chargement ligne à ligne probable"""
+
+
+@dataclass
+class ActionProfile:
+    """
+    Mesures cumulées d'une action
+    """
+    statements: int = 0
+    seconds: float = 0.0
+    rows: int = 0
+    crypto: Counter = field(default_factory=Counter)
+    shapes: Counter = field(default_factory=Counter)
+    n_plus_one: dict[str, int] = field(default_factory=dict)  # Forme de requête -> répétitions maximales
+
+    def to_dict(self) -> dict:
+        return {
+            "statements": self.statements,
+            "sql_ms": self.seconds * 1000,
+            "rows": self.rows,
+            "crypto": {operation: self.crypto[operation] for operation in CRYPTO_OPERATIONS},
+            "top_statements": self.shapes.most_common(5),
+            "n_plus_one": self.n_plus_one,
+        }
+
+
+_profiles: dict[str, ActionProfile] = {}
+_lock = threading.Lock()
+# Formes de requêtes vues par exécution d'une unité de travail ; hors unité, répétitions consécutives par thread
+_unit_shapes: "WeakKeyDictionary[object, Counter]" = WeakKeyDictionary()
+_outside = threading.local()
+_enabled = False
+
+_IN_LIST = re.compile(r"\bIN \(\?(?:, \?)+\)", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+def statement_shape(statement: str) -> str:
+    """
+    Forme d'une requête : espaces normalisés et listes `IN (?, ?, ...)` ramenées à une seule valeur
+    """
+    return _IN_LIST.sub("IN (?)", _SPACES.sub(" ", statement).strip())
+
+def _current_action() -> tuple[str, object | None]:
+    unit = active_unit()
+    return (unit.name, unit) if unit is not None else (OUTSIDE_ACTION, None)
+
+def _profile(name: str) -> ActionProfile:
+    if (profile := _profiles.get(name)) is None:
+        profile = _profiles[name] = ActionProfile()
+    return profile
+
+
+class _CountingCursor:
+    """
+    Curseur DB-API qui compte les lignes lues par SQLAlchemy
+    """
+
+    def __init__(self, cursor, profile: ActionProfile):
+        self._cursor = cursor
+        self._profile = profile
+
+    def _count(self, rows):
+        with _lock:
+            self._profile.rows += len(rows)
+        return rows
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._count((row,))
+        return row
+
+    def fetchmany(self, *args):
+        return self._count(self._cursor.fetchmany(*args))
+
+    def fetchall(self):
+        return self._count(self._cursor.fetchall())
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("pg_profile_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["pg_profile_start"].pop()
+    name, unit = _current_action()
+    shape = statement_shape(statement)
+    with _lock:
+        profile = _profile(name)
+        profile.statements += 1
+        profile.seconds += elapsed
+        profile.shapes[shape] += 1
+        if unit is not None:
+            repeats = _unit_shapes.setdefault(unit, Counter())
+            repeats[shape] += 1
+            count = repeats[shape]
+        else:
+            count = _outside.repeats + 1 if getattr(_outside, "shape", None) == shape else 1
+            _outside.shape, _outside.repeats = shape, count
+        reported = profile.n_plus_one.get(shape)
+        if count >= N_PLUS_ONE_THRESHOLD:
+            profile.n_plus_one[shape] = max(count, reported or 0)
+    if count == N_PLUS_ONE_THRESHOLD and reported is None:
+        warnings.warn(f"N+1 probable dans l'action {name!r}: {count} exécutions de {shape!r}", NPlusOneWarning, stacklevel=2)
+    # Les lignes sont comptées à leur lecture par SQLAlchemy, après cet évènement
+    if context is not None and cursor.description is not None:
+        context.cursor = _CountingCursor(cursor, profile)
+
+def _count_crypto(operation: str, func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        name, _ = _current_action()
+        with _lock:
+            _profile(name).crypto[operation] += 1
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def enable_profiling():
+    """
+    Installe l'instrumentation (une seule fois). À appeler avant l'import des modèles, qui importent
+    les fonctions de `utils.security` par leur nom : c'est le cas depuis `pg/__init__.py` avec PG_PROFILE=1.
+    """
+    global _enabled
+    if _enabled:
+        return
+    _enabled = True
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    security.hash_password = _count_crypto("hash", security.hash_password)
+    security.verify_password = _count_crypto("hash", security.verify_password)
+    security.get_cipher = _count_crypto("cipher", security.get_cipher)
+    security.PasswordCipher.encrypt = _count_crypto("encrypt", security.PasswordCipher.encrypt)
+    security.PasswordCipher.decrypt = _count_crypto("decrypt", security.PasswordCipher.decrypt)
+    atexit.register(write_report)
+
+def profile_report() -> dict:
+    """
+    Retourne les mesures par action, avec le nombre d'exécutions et de transactions des unités de travail
+    """
+    units = action_stats()
+    with _lock:
+        report = {}
+        for name, profile in sorted(_profiles.items(), key=lambda item: -item[1].statements):
+            stats = units.get(name)
+            report[name] = {
+                "calls": stats.calls if stats else None,
+                "transactions": stats.transactions if stats else None,
+                **profile.to_dict(),
+            }
+        return report
+
+def reset_profile():
+    with _lock:
+        _profiles.clear()
+        _unit_shapes.clear()
+
+def format_report(report: dict) -> str:
+    lines = [
+        "Profil PG (PG_PROFILE=1)",
+        f"{'action':<32} {'exéc.':>6} {'requêtes':>9} {'lignes':>8} {'SQL (ms)':>9} {'hach.':>6} {'clés':>6} {'chiffr.':>8} {'déchiffr.':>9}",
+    ]
+    for name, action in report.items():
+        crypto = action["crypto"]
+        lines.append(
+            f"{name[:32]:<32} {action['calls'] if action['calls'] is not None else '-':>6} {action['statements']:>9} {action['rows']:>8} "
+            f"{action['sql_ms']:>9.1f} {crypto['hash']:>6} {crypto['cipher']:>6} {crypto['encrypt']:>8} {crypto['decrypt']:>9}"
+        )
+    for name, action in report.items():
+        for shape, count in action["n_plus_one"].items():
+            lines.append(f"N+1 probable dans {name!r} ({count} exécutions): {shape}")
+    return "\n".join(lines)
+
+def write_report():
+    """
+    Affiche le rapport sur la sortie d'erreur, ou l'écrit dans le fichier PG_PROFILE_OUTPUT (JSON)
+    """
+    report = profile_report()
+    if PROFILE_OUTPUT:
+        with open(PROFILE_OUTPUT, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+    elif report:
+        print(format_report(report), file=sys.stderr)
@@ -1,27 +1,151 @@
 # pg.utils.search_engine.py
-from fuzzywuzzy import process
+"""
+Moteur de recherche approximative en mémoire : index de trigrammes par utilisateur
+"""
 
-from ..data.models import Password
+import heapq
+from collections import Counter, defaultdict
+from threading import RLock
+from typing import Callable, Hashable, Iterable, TypeVar
 
-def similar_passwords(liste_objets: Password, cible: str) -> list[Password]:
+T = TypeVar("T")
+
+# Nombre de candidats (ceux qui partagent le plus de trigrammes avec la recherche) réellement notés
+CANDIDATES = 200
+
+def normalize(text: str) -> str:
     """
-    Trouve les objets dont l'attribut .url est le plus proche de la chaîne cible.
+    Normalise un texte indexé ou recherché (minuscules, sans schéma ni "www.")
+    """
+    text = str(text).lower()
+    for prefix in ("https://", "http://"):
+        if text.startswith(prefix):
+            text = text[len(prefix):]
+            break
+    if text.startswith("www."):
+        text = text[4:]
+    return text.rstrip("/")
 
-    :param liste_objets: Liste d'objets avec un attribut .url
-    :param cible: La chaîne de référence
-    :return: Liste des objets triés par similarité décroissante
+def trigrams(text: str) -> set[str]:
+    """
+    Retourne les trigrammes d'un texte normalisé (avec bourrage pour que les textes courts en aient)
+    """
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SearchIndex:
+    """
+    Index de trigrammes : les candidats sont présélectionnés par trigrammes communs avant d'être notés,
+    au lieu de noter tout le coffre. Mis à jour élément par élément.
+    """
+
+    def __init__(self, entries: Iterable[tuple[int, str]] = ()):
+        self._texts: dict[int, str] = {}
+        self._postings: defaultdict[str, set[int]] = defaultdict(set)
+        self._lock = RLock()
+        for entry_id, text in entries:
+            self.add(entry_id, text)
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __contains__(self, entry_id: int) -> bool:
+        return entry_id in self._texts
+
+    def add(self, entry_id: int, text: str):
+        """
+        Indexe (ou réindexe) un élément
+        """
+        with self._lock:
+            if entry_id in self._texts:
+                self.remove(entry_id)
+            text = normalize(text)
+            self._texts[entry_id] = text
+            for trigram in trigrams(text):
+                self._postings[trigram].add(entry_id)
+
+    update = add
+
+    def remove(self, entry_id: int):
+        """
+        Retire un élément de l'index (sans erreur s'il est absent)
+        """
+        with self._lock:
+            if (text := self._texts.pop(entry_id, None)) is None:
+                return
+            for trigram in trigrams(text):
+                postings = self._postings.get(trigram)
+                if postings is not None:
+                    postings.discard(entry_id)
+                    if not postings:
+                        del self._postings[trigram]
+
+    def search(self, query: str, limit: int = 10, candidates: int = CANDIDATES) -> list[tuple[int, int]]:
+        """
+        Retourne les `limit` meilleurs éléments sous la forme (identifiant, score de 0 à 100), par score décroissant
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        from fuzzywuzzy import fuzz  # Importé à la première recherche : coûteux au démarrage
+
+        with self._lock:
+            overlap = Counter()
+            for trigram in trigrams(query):
+                overlap.update(self._postings.get(trigram, ()))
+            shortlist = heapq.nlargest(candidates, overlap, key=overlap.__getitem__)
+            # À score égal, l'élément qui partage le plus de trigrammes avec la recherche passe devant
+            scored = ((fuzz.WRatio(query, self._texts[entry_id]), overlap[entry_id], entry_id) for entry_id in shortlist)
+            return [(entry_id, score) for score, _, entry_id in heapq.nlargest(limit, scored) if score > 0]
+
+# Index par (moteur, utilisateur) : deux bases peuvent avoir un utilisateur de même identifiant
+_indexes: dict[tuple[Hashable, int], SearchIndex] = {}
+_indexes_lock = RLock()
+
+def user_index(engine: Hashable, user_id: int, loader: Callable[[], Iterable[tuple[int, str]]]) -> SearchIndex:
+    """
+    Retourne l'index de l'utilisateur sur la base `engine`, construit au premier appel à partir de `loader`
+    (couples identifiant / texte) puis tenu à jour par `index_changes`
+    """
+    with _indexes_lock:
+        if (index := _indexes.get((engine, user_id))) is None:
+            index = _indexes[engine, user_id] = SearchIndex(loader())
+        return index
+
+def drop_index(user_id: int | None = None, engine: Hashable | None = None):
     """
-    # Créer une liste des URLs à comparer
-    urls = [obj.url for obj in liste_objets]
+    Oublie les index d'un utilisateur (sur toutes les bases, ou seulement sur `engine`), ou tous les index
+    """
+    with _indexes_lock:
+        for key in [
+            key for key in _indexes
+            if (user_id is None or key[1] == user_id) and (engine is None or key[0] is engine)
+        ]:
+            del _indexes[key]
 
-    # Trouver les correspondances avec leurs scores
-    correspondances = process.extract(cible, urls, limit=len(urls))
+def index_changes(changes: list, text: Callable[[object], str]):
+    """
+    Répercute des modifications de mots de passe (voir `pg.data.events`) sur les index déjà construits
+    """
+    for change in changes:
+        if (index := _indexes.get((change.engine, change.user_id))) is None:
+            continue
+        if change.kind == "deleted":
+            index.remove(change.password_id)
+        else:
+            index.add(change.password_id, text(change.password))
 
-    # Trier les objets en fonction des scores
-    objets_triés = sorted(
-        liste_objets,
-        key=lambda obj: next(score for url, score in correspondances if url == obj.url),
-        reverse=True
-    )
+def similar_passwords(liste_objets: list[T], cible: str) -> list[T]:
+    """
+    Trouve les objets dont l'attribut .url est le plus proche de la chaîne cible.
 
-    return objets_triés
\ No newline at end of file
+    :param liste_objets: Liste d'objets avec un attribut .url
+    :param cible: La chaîne de référence
+    :return: Liste de tous les objets, triés par similarité décroissante
+    """
+    index = SearchIndex((position, obj.url) for position, obj in enumerate(liste_objets))
+    # Tous les éléments partageant un trigramme avec la cible sont notés, pas seulement la présélection
+    ranked = [position for position, _ in index.search(cible, limit=len(liste_objets), candidates=len(liste_objets))]
+    # Les objets sans aucune ressemblance suivent, dans leur ordre d'origine : aucun n'est écarté
+    matched = set(ranked)
+    return [liste_objets[position] for position in ranked] + [obj for position, obj in enumerate(liste_objets) if position not in matched]
@@ -4,26 +4,155 @@ Module de gestion de la sécurité
 """
 
 import hashlib
+import hmac
 import base64
 import string
 import os
 import re
-from cryptography.fernet import Fernet
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from importlib.util import find_spec
+from itertools import islice
+from threading import Lock
+from typing import Callable, NamedTuple
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 
 
-def hash_password(password: str, algorithm: str = "sha256"):
+# Fonctions de dérivation de clé (KDF) acceptées pour les nouveaux mots de passe maîtres, stockées au format
+# auto-descriptif "$algorithme$paramètres$sel$empreinte" ; argon2id nécessite le paquet optionnel argon2-cffi
+KDF_ALGORITHMS = ("scrypt", "pbkdf2_sha256", "argon2id")
+DEFAULT_KDF = "scrypt"
+# Durée de vérification visée par la calibration, en millisecondes (variable d'environnement PG_KDF_TARGET_MS)
+KDF_TARGET_SECONDS = float(os.environ.get("PG_KDF_TARGET_MS", 250)) / 1000
+KDF_MAX_MEMORY = 128 * 1024 * 1024  # Mémoire maximale d'un hachage scrypt ou argon2, en octets
+
+# Enveloppe des mots de passe chiffrés (binaire) : le premier octet désigne le format
+CIPHER_AES_GCM = 0x01  # 0x01 | nonce (12 octets) | texte chiffré | tag (16 octets), clé dérivée par HKDF
+CIPHER_FERNET = 0x80  # Jeton Fernet décodé, dont l'octet de version 0x80 sert d'en-tête (format historique)
+CIPHER_ALGORITHMS = (CIPHER_AES_GCM, CIPHER_FERNET)
+DEFAULT_CIPHER = CIPHER_AES_GCM
+_AES_GCM_HEADER = bytes((CIPHER_AES_GCM,))
+_FERNET_HEADER = bytes((CIPHER_FERNET,))
+_AES_GCM_NONCE_SIZE = 12
+_AES_GCM_INFO = b"pg/password/aes-256-gcm/v1"
+
+# Coûts minimaux, quelle que soit la machine : en dessous, le hachage est considéré obsolète
+KDF_MINIMUM_PARAMETERS = {
+    "scrypt": {"ln": 15, "r": 8, "p": 1},
+    "pbkdf2_sha256": {"i": 600_000},
+    "argon2id": {"m": 65_536, "t": 2, "p": 1},
+}
+_PHC_IDENTIFIERS = {"scrypt": "scrypt", "pbkdf2_sha256": "pbkdf2-sha256", "argon2id": "argon2id"}
+_SALT_SIZE = 16
+_HASH_SIZE = 32
+
+_calibrated: dict[str, dict[str, int]] = {}
+_calibration_lock = Lock()
+
+
+class KdfUnavailableError(RuntimeError):
+    """
+    La fonction de dérivation d'un hachage enregistré n'est pas disponible sur cette installation
+    (argon2id sans le paquet optionnel argon2-cffi) : le mot de passe ne peut pas être vérifié
+    """
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode().rstrip("=")
+
+def _b64decode(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+def _argon2():
+    try:
+        import argon2
+    except ImportError as e:
+        raise KdfUnavailableError("L'algorithme argon2id nécessite le paquet argon2-cffi (pip install argon2-cffi)") from e
+    return argon2
+
+def _scrypt(password: str, salt: bytes, ln: int, r: int, p: int) -> bytes:
+    n = 1 << ln
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=256 * r * (n + p + 2), dklen=_HASH_SIZE)
+
+def _pbkdf2(password: str, salt: bytes, i: int) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, i, dklen=_HASH_SIZE)
+
+def _parse_hash(password_hash: str) -> tuple[str, dict[str, int], bytes, bytes]:
+    """
+    Décompose un hachage "$algorithme$k=v,...$sel$empreinte" (scrypt et PBKDF2 uniquement)
+    """
+    _, identifier, parameters, salt, digest = password_hash.split("$")
+    algorithm = {value: key for key, value in _PHC_IDENTIFIERS.items()}[identifier]
+    return algorithm, {key: int(value) for key, value in (item.split("=") for item in parameters.split(","))}, _b64decode(salt), _b64decode(digest)
+
+def hash_algorithm_of(password_hash: str) -> str | None:
+    """
+    Retourne l'algorithme d'un hachage auto-descriptif, ou None pour une ancienne empreinte hexadécimale
+
+    Args:
+        password_hash (str): Le hachage enregistré
+
+    Returns:
+        str | None: Le nom de l'algorithme (voir KDF_ALGORITHMS)
+    """
+    if not password_hash.startswith("$"):
+        return None
+    identifier = password_hash.split("$")[1]
+    return next((name for name, value in _PHC_IDENTIFIERS.items() if value == identifier), identifier)
+
+def _hash_parameters(password_hash: str) -> dict[str, int]:
+    if hash_algorithm_of(password_hash) == "argon2id":
+        parameters = password_hash.split("$")[3]
+        return {key: int(value) for key, value in (item.split("=") for item in parameters.split(","))}
+    return _parse_hash(password_hash)[1]
+
+def hash_password(password: str, algorithm: str = DEFAULT_KDF, parameters: dict[str, int] | None = None) -> str:
+    """
+    Hache le mot de passe maître avec une fonction de dérivation de clé salée et coûteuse
+
+    Args:
+        password (str): Le mot de passe à hacher
+        algorithm (str, optional): La fonction de dérivation (voir KDF_ALGORITHMS). Defaults to DEFAULT_KDF.
+        parameters (dict[str, int] | None, optional): Les paramètres de coût. Par défaut, ceux calibrés
+            pour cette machine (voir `kdf_parameters`).
+
+    Raises:
+        ValueError: L'algorithme spécifié n'est pas supporté
+
+    Returns:
+        str: Le hachage au format auto-descriptif "$algorithme$paramètres$sel$empreinte"
+    """
+    if algorithm not in supported_algorithms():
+        raise ValueError("Algorithme non supporté")
+    parameters = parameters or kdf_parameters(algorithm)
+    if algorithm == "argon2id":
+        hasher = _argon2().PasswordHasher(time_cost=parameters["t"], memory_cost=parameters["m"], parallelism=parameters["p"], hash_len=_HASH_SIZE, salt_len=_SALT_SIZE)
+        return hasher.hash(password)
+    salt = os.urandom(_SALT_SIZE)
+    digest = _scrypt(password, salt, **parameters) if algorithm == "scrypt" else _pbkdf2(password, salt, **parameters)
+    encoded_parameters = ",".join(f"{key}={value}" for key, value in parameters.items())
+    return f"${_PHC_IDENTIFIERS[algorithm]}${encoded_parameters}${_b64encode(salt)}${_b64encode(digest)}"
+
+def legacy_hash_password(password: str, algorithm: str = "sha256") -> str:
     """
-    Hache le mot de passe avec l'algorithme spécifié
+    Ancienne empreinte non salée (un seul condensé hashlib), conservée uniquement pour vérifier les comptes
+    créés avant les fonctions de dérivation de clé
 
     Args:
         password (str): Le mot de passe à hacher
-        algorithm (str, optional): L'algorithme de hachage à utiliser. Defaults to "sha256".
+        algorithm (str, optional): L'algorithme hashlib. Defaults to "sha256".
 
     Raises:
         ValueError: L'algorithme spécifié n'est pas supporté
 
     Returns:
-        str: Le mot de passe haché
+        str: L'empreinte hexadécimale
     """
     if algorithm not in hashlib.algorithms_available:
         raise ValueError("Algorithme non supporté")
@@ -31,6 +160,118 @@ def hash_password(password: str, algorithm: str = "sha256"):
     hasher.update(password.encode('utf-8'))
     return hasher.hexdigest()
 
+def verify_password(password: str, password_hash: str, legacy_algorithm: str = "sha256") -> bool:
+    """
+    Vérifie un mot de passe contre son hachage, en temps constant
+
+    Args:
+        password (str): Le mot de passe en clair
+        password_hash (str): Le hachage enregistré (auto-descriptif, ou ancienne empreinte hexadécimale)
+        legacy_algorithm (str, optional): L'algorithme hashlib d'une ancienne empreinte. Defaults to "sha256".
+
+    Raises:
+        KdfUnavailableError: Le hachage utilise argon2id et le paquet argon2-cffi n'est pas installé
+
+    Returns:
+        bool: Le mot de passe est correct
+    """
+    match hash_algorithm_of(password_hash):
+        case None:
+            try:
+                expected = legacy_hash_password(password, legacy_algorithm)
+            except ValueError:
+                return False
+            return hmac.compare_digest(expected, password_hash)
+        case "argon2id":
+            argon2 = _argon2()
+            try:
+                return argon2.PasswordHasher().verify(password_hash, password)
+            except (argon2.exceptions.VerificationError, argon2.exceptions.InvalidHashError):
+                return False
+        case "scrypt" | "pbkdf2_sha256":
+            try:
+                algorithm, parameters, salt, digest = _parse_hash(password_hash)
+            except (ValueError, KeyError, TypeError):  # Hachage altéré
+                return False
+            derived = _scrypt(password, salt, **parameters) if algorithm == "scrypt" else _pbkdf2(password, salt, **parameters)
+            return hmac.compare_digest(derived, digest)
+        case _:
+            return False
+
+def needs_rehash(password_hash: str, algorithm: str = DEFAULT_KDF) -> bool:
+    """
+    Indique si un hachage doit être refait à la prochaine connexion : ancienne empreinte, autre algorithme,
+    ou coût inférieur au minimum (la calibration n'est pas relancée pour cette vérification)
+
+    Args:
+        password_hash (str): Le hachage enregistré
+        algorithm (str, optional): L'algorithme voulu. Defaults to DEFAULT_KDF.
+
+    Returns:
+        bool: Le hachage est obsolète (ou ses paramètres sont illisibles)
+    """
+    if hash_algorithm_of(password_hash) != algorithm:
+        return True
+    try:
+        parameters = _hash_parameters(password_hash)
+    except (ValueError, KeyError, IndexError):  # Hachage altéré : à refaire s'il est néanmoins vérifié
+        return True
+    return any(parameters.get(key, 0) < minimum for key, minimum in KDF_MINIMUM_PARAMETERS[algorithm].items())
+
+def _timed(func, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+def calibrate(algorithm: str = DEFAULT_KDF, target_seconds: float = KDF_TARGET_SECONDS, max_memory: int = KDF_MAX_MEMORY) -> dict[str, int]:
+    """
+    Mesure la machine et choisit les paramètres de coût dont la vérification dure environ `target_seconds`,
+    sans descendre sous KDF_MINIMUM_PARAMETERS
+
+    Args:
+        algorithm (str, optional): La fonction de dérivation. Defaults to DEFAULT_KDF.
+        target_seconds (float, optional): La durée visée. Defaults to KDF_TARGET_SECONDS.
+        max_memory (int, optional): La mémoire maximale d'un hachage, en octets. Defaults to KDF_MAX_MEMORY.
+
+    Returns:
+        dict[str, int]: Les paramètres à passer à `hash_password`
+    """
+    minimum = KDF_MINIMUM_PARAMETERS[algorithm]
+    salt = os.urandom(_SALT_SIZE)
+    if algorithm == "pbkdf2_sha256":
+        probe = 100_000
+        per_iteration = _timed(_pbkdf2, "calibration", salt, probe) / probe
+        return {"i": max(minimum["i"], int(round(target_seconds / per_iteration, -3)))}
+    if algorithm == "argon2id":
+        memory = max(minimum["m"], min(max_memory // 1024, 65_536))
+        hasher = _argon2().PasswordHasher(time_cost=1, memory_cost=memory, parallelism=minimum["p"])
+        per_pass = _timed(hasher.hash, "calibration")
+        return {"m": memory, "t": max(minimum["t"], round(target_seconds / per_pass)), "p": minimum["p"]}
+    # scrypt : la mémoire (2^ln) augmente jusqu'à la durée visée ou au plafond, puis le parallélisme (p) prend le relais
+    r = minimum["r"]
+    ln, elapsed = minimum["ln"], _timed(_scrypt, "calibration", salt, minimum["ln"], r, 1)
+    while elapsed < target_seconds and 128 * r * (1 << (ln + 1)) <= max_memory:
+        next_elapsed = _timed(_scrypt, "calibration", salt, ln + 1, r, 1)
+        if next_elapsed > target_seconds and next_elapsed - target_seconds > target_seconds - elapsed:
+            break
+        ln, elapsed = ln + 1, next_elapsed
+    return {"ln": ln, "r": r, "p": max(1, round(target_seconds / elapsed))}
+
+def kdf_parameters(algorithm: str = DEFAULT_KDF) -> dict[str, int]:
+    """
+    Retourne les paramètres de coût de cette machine, calibrés au premier appel puis conservés
+
+    Args:
+        algorithm (str, optional): La fonction de dérivation. Defaults to DEFAULT_KDF.
+
+    Returns:
+        dict[str, int]: Les paramètres à passer à `hash_password`
+    """
+    with _calibration_lock:
+        if (parameters := _calibrated.get(algorithm)) is None:
+            parameters = _calibrated[algorithm] = calibrate(algorithm)
+        return dict(parameters)
+
 def generate_key() -> str:
     """
     Génère une clé de chiffrement aléatoire
@@ -40,51 +281,268 @@ def generate_key() -> str:
     """
     return base64.urlsafe_b64encode(os.urandom(32)).decode()
 
-def get_cipher(key: bytes | str) -> Fernet:
+class PasswordCipher:
+    """
+    Objet de chiffrement des mots de passe d'un utilisateur, construit une fois à partir de sa clé.
+
+    Chiffre au format `algorithm` (AES-GCM par défaut) et déchiffre les deux formats de l'enveloppe,
+    y compris les jetons Fernet historiques (texte base64 ou binaire). Pendant une rotation de clé,
+    les anciennes clés (`previous_keys`) servent seulement à déchiffrer ce qui n'a pas encore été rechiffré.
     """
-    Retourne un objet de chiffrement Fernet à partir de la clé de chiffrement
-    
+
+    def __init__(self, key: bytes | str, algorithm: int = DEFAULT_CIPHER, previous_keys: Iterable[bytes | str] = ()):
+        if algorithm not in CIPHER_ALGORITHMS:
+            raise ValueError(f"Format de chiffrement inconnu: {algorithm:#04x}")
+        self._key = key.encode() if isinstance(key, str) else key
+        self.algorithm = algorithm
+        self._fernet = Fernet(self._key)
+        # Clé AES dérivée de la clé Fernet (signature et chiffrement) : aucune nouvelle clé à stocker
+        hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=_AES_GCM_INFO)
+        self._aesgcm = AESGCM(hkdf.derive(base64.urlsafe_b64decode(self._key)))
+        self._previous_keys = tuple(previous_keys)
+        self._previous = [PasswordCipher(previous_key, algorithm) for previous_key in self._previous_keys]
+
+    def __reduce__(self):
+        # Reconstruit à partir des clés dans les processus de travail (les objets AES et Fernet ne sont pas sérialisables)
+        return PasswordCipher, (self._key, self.algorithm, self._previous_keys)
+
+    def encrypt(self, password: str) -> bytes:
+        """
+        Chiffre un mot de passe et retourne son enveloppe binaire
+        """
+        if self.algorithm == CIPHER_AES_GCM:
+            nonce = os.urandom(_AES_GCM_NONCE_SIZE)
+            return _AES_GCM_HEADER + nonce + self._aesgcm.encrypt(nonce, password.encode(), _AES_GCM_HEADER)
+        return base64.urlsafe_b64decode(self._fernet.encrypt(password.encode()))
+
+    def decrypt(self, encrypted_password: bytes | str) -> str:
+        """
+        Déchiffre une enveloppe binaire, ou un jeton Fernet texte, avec la clé puis avec les anciennes clés
+        """
+        if isinstance(encrypted_password, str):
+            encrypted_password = legacy_ciphertext(encrypted_password)
+        try:
+            return self._decrypt(encrypted_password)
+        except (InvalidTag, InvalidToken):
+            for previous in self._previous:
+                try:
+                    return previous._decrypt(encrypted_password)
+                except (InvalidTag, InvalidToken):
+                    continue
+            raise
+
+    def _decrypt(self, encrypted_password: bytes) -> str:
+        header = encrypted_password[:1]
+        if header == _AES_GCM_HEADER:
+            nonce = encrypted_password[1:1 + _AES_GCM_NONCE_SIZE]
+            return self._aesgcm.decrypt(nonce, encrypted_password[1 + _AES_GCM_NONCE_SIZE:], header).decode()
+        if header == _FERNET_HEADER:
+            return self._fernet.decrypt(base64.urlsafe_b64encode(encrypted_password)).decode()
+        raise ValueError(f"En-tête de mot de passe chiffré inconnu: {header.hex() or 'vide'}")
+
+def legacy_ciphertext(token: str) -> bytes:
+    """
+    Convertit un jeton Fernet texte (base64, format historique) en enveloppe binaire : le jeton décodé
+    commence par son octet de version 0x80, qui sert d'en-tête
+
+    Args:
+        token (str): Le jeton Fernet
+
     Returns:
-        Fernet: L'objet de chiffrement
+        bytes: L'enveloppe binaire (le texte tel quel s'il n'est pas en base64, son déchiffrement échouera)
+    """
+    try:
+        return base64.urlsafe_b64decode(token)
+    except ValueError:
+        return token.encode()
+
+def ciphertext_algorithm(encrypted_password: bytes | str) -> int | None:
     """
-    return Fernet(key.encode())
+    Retourne le format d'un mot de passe chiffré (CIPHER_AES_GCM ou CIPHER_FERNET), None s'il est inconnu
+    """
+    if isinstance(encrypted_password, str):
+        return CIPHER_FERNET
+    header = encrypted_password[0] if encrypted_password else None
+    return header if header in CIPHER_ALGORITHMS else None
 
-def encrypt_password(password: str, key: bytes) -> str:
+def get_cipher(key: bytes | str, algorithm: int = DEFAULT_CIPHER, previous_keys: Iterable[bytes | str] = ()) -> PasswordCipher:
+    """
+    Retourne un objet de chiffrement à partir de la clé de chiffrement
+
+    Args:
+        key (bytes | str): La clé de chiffrement
+        algorithm (int, optional): Le format des nouveaux chiffrements. Defaults to DEFAULT_CIPHER.
+        previous_keys (Iterable[bytes | str], optional): Anciennes clés acceptées au déchiffrement (rotation en cours).
+
+    Returns:
+        PasswordCipher: L'objet de chiffrement
+    """
+    return PasswordCipher(key, algorithm, previous_keys)
+
+def encrypt_password(password: str, key: bytes | str, algorithm: int = DEFAULT_CIPHER) -> bytes:
     """
     Chiffre le mot de passe avec la clé de chiffrement
 
     Args:
         password (str): Le mot de passe à chiffrer
-        key (bytes): La clé de chiffrement
+        key (bytes | str): La clé de chiffrement
+        algorithm (int, optional): Le format de chiffrement. Defaults to DEFAULT_CIPHER.
 
     Returns:
-        str: Le mot de passe chiffré
+        bytes: Le mot de passe chiffré (enveloppe binaire)
     """
-    cipher = get_cipher(key)
-    return cipher.encrypt(password.encode()).decode()
+    return get_cipher(key, algorithm).encrypt(password)
 
-def decrypt_password(encrypted_password: str, key: bytes) -> str:
+def decrypt_password(encrypted_password: bytes | str, key: bytes | str) -> str:
     """
     Déchiffre le mot de passe avec la clé de chiffrement
 
     Args:
-        encrypted_password (str): Le mot de passe chiffré
-        key (bytes): La clé de chiffrement
+        encrypted_password (bytes | str): Le mot de passe chiffré (enveloppe binaire ou jeton Fernet texte)
+        key (bytes | str): La clé de chiffrement
 
     Returns:
         str: Le mot de passe déchiffré
     """
-    cipher = get_cipher(key)
-    return cipher.decrypt(encrypted_password.encode()).decode()
+    return get_cipher(key).decrypt(encrypted_password)
+
+class DecryptionResult(NamedTuple):
+    """
+    Résultat du déchiffrement d'une ligne par `decrypt_many`
+    """
+    index: int
+    password: str | None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+DECRYPT_CHUNK_SIZE = 1000
+PARALLEL_DECRYPT_THRESHOLD = 50_000
+
+def _decrypt_chunk(cipher: PasswordCipher | bytes | str, start: int, chunk: list[bytes | str]) -> list[DecryptionResult]:
+    """
+    Déchiffre un paquet de mots de passe, sans interrompre le paquet si une ligne échoue
+    """
+    if not isinstance(cipher, PasswordCipher):
+        cipher = get_cipher(cipher)
+    results = []
+    for index, encrypted_password in enumerate(chunk, start):
+        try:
+            results.append(DecryptionResult(index, cipher.decrypt(encrypted_password)))
+        except Exception as e:
+            results.append(DecryptionResult(index, None, e))
+    return results
+
+def _chunks(items: Iterable[bytes | str], chunk_size: int) -> Iterator[tuple[int, list[bytes | str]]]:
+    iterator = iter(items)
+    start = 0
+    while (chunk := list(islice(iterator, chunk_size))):
+        yield start, chunk
+        start += len(chunk)
+
+def _map_chunks(function: Callable, cipher: PasswordCipher, chunks: Iterator[tuple[int, list]], workers: int, use_processes: bool, executor: Executor | None = None) -> Iterator:
+    """
+    Applique `function(cipher, start, chunk)` à chaque paquet, sur place ou dans un groupe de travailleurs
+    (`executor`, ou un groupe créé pour l'appel), et retourne les résultats dans l'ordre des paquets
+    """
+    if executor is None and workers <= 1:
+        for start, chunk in chunks:
+            yield from function(cipher, start, chunk)
+        return
+
+    # Les processus reçoivent l'objet de chiffrement sérialisé (ses clés) ; les threads partagent l'objet
+    pool: Executor = executor or (ProcessPoolExecutor(workers) if use_processes else ThreadPoolExecutor(workers))
+    try:
+        # Nombre borné de paquets en vol pour garder une mémoire constante sur un flux
+        pending = deque()
+        for start, chunk in chunks:
+            pending.append(pool.submit(function, cipher, start, chunk))
+            if len(pending) >= max(workers, 1) * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        if executor is None:
+            pool.shutdown()
+
+def decrypt_many(encrypted_passwords: Iterable[bytes | str], key: bytes | str, chunk_size: int = DECRYPT_CHUNK_SIZE, workers: int | None = None, use_processes: bool = False, cipher: PasswordCipher | None = None) -> Iterator[DecryptionResult]:
+    """
+    Déchiffre une liste (ou un flux) de mots de passe par paquets, en conservant l'ordre d'entrée
+
+    Args:
+        encrypted_passwords (Iterable[bytes | str]): Les mots de passe chiffrés
+        key (bytes | str): La clé de chiffrement
+        chunk_size (int, optional): La taille des paquets. Defaults to DECRYPT_CHUNK_SIZE.
+        workers (int | None, optional): Le nombre de travailleurs. Par défaut, les listes de plus de
+            PARALLEL_DECRYPT_THRESHOLD éléments sont réparties sur tous les cœurs, le reste est déchiffré sur place.
+        use_processes (bool, optional): Utiliser des processus plutôt que des threads, à réserver aux programmes
+            sans autres threads (pas depuis l'interface Tk ni le serveur HTTP). Defaults to False.
+        cipher (PasswordCipher | None, optional): Un objet de chiffrement déjà construit (prioritaire sur `key`).
+
+    Returns:
+        Iterator[DecryptionResult]: Un résultat par ligne, dans l'ordre d'entrée ; une ligne illisible
+            porte son erreur au lieu d'interrompre le lot
+    """
+    if workers is None:
+        sized = hasattr(encrypted_passwords, "__len__")
+        workers = (os.cpu_count() or 1) if sized and len(encrypted_passwords) >= PARALLEL_DECRYPT_THRESHOLD else 1
+    return _map_chunks(_decrypt_chunk, cipher or get_cipher(key), _chunks(encrypted_passwords, chunk_size), workers, use_processes)
+
+class ReencryptionResult(NamedTuple):
+    """
+    Résultat du rechiffrement d'une ligne par `reencrypt_many`
+    """
+    index: int
+    encrypted_password: bytes | None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def _reencrypt_chunk(cipher: PasswordCipher, start: int, chunk: list[bytes | str]) -> list[ReencryptionResult]:
+    """
+    Rechiffre un paquet de mots de passe, sans interrompre le paquet si une ligne échoue
+    """
+    results = []
+    for index, encrypted_password in enumerate(chunk, start):
+        try:
+            results.append(ReencryptionResult(index, cipher.encrypt(cipher.decrypt(encrypted_password))))
+        except Exception as e:
+            results.append(ReencryptionResult(index, None, e))
+    return results
+
+def reencrypt_many(encrypted_passwords: Iterable[bytes | str], cipher: PasswordCipher, chunk_size: int = DECRYPT_CHUNK_SIZE, workers: int = 1, use_processes: bool = True, executor: Executor | None = None) -> Iterator[ReencryptionResult]:
+    """
+    Rechiffre une liste (ou un flux) de mots de passe par paquets, en conservant l'ordre d'entrée : chaque mot de
+    passe est déchiffré par `cipher` (clé ou anciennes clés) puis chiffré avec sa clé et son format
+
+    Args:
+        encrypted_passwords (Iterable[bytes | str]): Les mots de passe chiffrés
+        cipher (PasswordCipher): L'objet de chiffrement cible, construit avec les anciennes clés (`previous_keys`)
+        chunk_size (int, optional): La taille des paquets. Defaults to DECRYPT_CHUNK_SIZE.
+        workers (int, optional): Le nombre de travailleurs (1 : sur place). Defaults to 1.
+        use_processes (bool, optional): Utiliser des processus plutôt que des threads. Defaults to True.
+        executor (Executor | None, optional): Un groupe de `workers` travailleurs déjà démarré, réutilisé d'un appel
+            à l'autre (il n'est pas arrêté à la fin).
+
+    Returns:
+        Iterator[ReencryptionResult]: Un résultat par ligne, dans l'ordre d'entrée ; une ligne illisible
+            porte son erreur au lieu d'interrompre le lot
+    """
+    return _map_chunks(_reencrypt_chunk, cipher, _chunks(encrypted_passwords, chunk_size), workers, use_processes, executor)
 
 def supported_algorithms() -> list[str]:
     """
-    Retourne la liste des algorithmes de hachage supportés
+    Retourne la liste des fonctions de dérivation acceptées pour les mots de passe maîtres
+    (argon2id uniquement si le paquet argon2-cffi est installé)
 
     Returns:
         list[str]: La liste des algorithmes de hachage supportés
     """
-    return sorted(hashlib.algorithms_available)
+    return [algorithm for algorithm in KDF_ALGORITHMS if algorithm != "argon2id" or find_spec("argon2") is not None]
 
 def validate_password_strength(password: str) -> str:
     """
@@ -1,8 +1,11 @@
-from sqlalchemy.types import TypeDecorator, String
+from sqlalchemy.types import TypeDecorator, String, LargeBinary
 from pydantic import HttpUrl
 
+from .security import legacy_ciphertext
+
 class HttpUrlType(TypeDecorator):
     impl = String
+    cache_ok = True
 
     def process_bind_param(self, value, dialect):
         if isinstance(value, HttpUrl):
@@ -15,3 +18,21 @@ class HttpUrlType(TypeDecorator):
         if value is not None:
             return HttpUrl(value)
         return None
+
+class CiphertextType(TypeDecorator):
+    """
+    Mot de passe chiffré stocké en binaire (enveloppe de `utils.security`) ; les jetons Fernet texte
+    des bases pas encore migrées sont convertis à la lecture comme à l'écriture
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str):
+            return legacy_ciphertext(value)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, str):
+            return legacy_ciphertext(value)
+        return value
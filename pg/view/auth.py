@@ -3,8 +3,11 @@ from tkinter import Tk, messagebox
 from tkinter.ttk import Entry, Button, Label, Frame
 
 from ..data.models import User
+from ..data.vault import unlock
+from ..utils.security import KdfUnavailableError
 
 from . import clear_screen
+from .tasks import get_runner
 
 
 def create_login_screen(root: Tk):
@@ -21,7 +24,8 @@ def create_login_screen(root: Tk):
     password_entry = Entry(frame, show="*")
     password_entry.grid(row=1, column=1, pady=5)
     
-    Button(frame, text="Connexion", command=lambda: login(root, username_entry.get(), password_entry.get())).grid(row=2, column=0, columnspan=2, pady=10)
+    login_button = Button(frame, text="Connexion", command=lambda: login(root, username_entry.get(), password_entry.get(), busy=(login_button,)))
+    login_button.grid(row=2, column=0, columnspan=2, pady=10)
     Button(frame, text="Inscription", command=lambda: create_register_screen(root)).grid(row=3, column=0, columnspan=2, pady=5)
 
 def create_register_screen(root: Tk):
@@ -38,29 +42,53 @@ def create_register_screen(root: Tk):
     new_password_entry = Entry(frame, show="*")
     new_password_entry.grid(row=1, column=1, pady=5)
     
-    Button(frame, text="Créer un compte", command=lambda: register(root, new_username_entry.get(), new_password_entry.get())).grid(row=2, column=0, columnspan=2, pady=10)
+    register_button = Button(frame, text="Créer un compte", command=lambda: register(root, new_username_entry.get(), new_password_entry.get(), busy=(register_button,)))
+    register_button.grid(row=2, column=0, columnspan=2, pady=10)
     Button(frame, text="Retour", command=lambda: create_login_screen(root)).grid(row=3, column=0, columnspan=2, pady=5)
 
-def login(root: Tk, username: str, password: str):
-    if (user := User.get_by_username(username)):
-        if user.verify_password(password):
-            from .home import create_home_screen
-            create_home_screen(root, user)
-        else:
-            messagebox.showerror("Erreur", "Mot de passe incorrect")
-    else:
-        messagebox.showerror("Erreur", "Utilisateur inconnu")
+def login(root: Tk, username: str, password: str, busy=()):
+    def authenticate(task) -> User | None:
+        # Recherche et hachage (coûteux par conception) hors de la boucle Tk
+        if (user := User.get_by_username(username)) is None:
+            raise ValueError("Utilisateur inconnu")
+        try:
+            if not user.check_password(password):
+                raise ValueError("Mot de passe incorrect")
+        except KdfUnavailableError as e:
+            raise ValueError(f"Connexion impossible sur cette installation: {e}")
+        unlock(user)
+        return user
 
-def register(root: Tk, username: str, password: str):
-    try:
+    def on_done(user: User):
+        from .home import create_home_screen
+        create_home_screen(root, user)
+
+    get_runner(root).submit(
+        authenticate,
+        name="connexion",
+        on_done=on_done,
+        on_error=lambda e: messagebox.showerror("Erreur", str(e)),
+        busy=busy
+    )
+
+def register(root: Tk, username: str, password: str, busy=()):
+    def create(task) -> User:
         user = User.create(
             username=username,
-            password=password,
-            hash_algorithm="sha256"
+            password=password
         )
+        unlock(user)
+        return user
+
+    def on_done(user: User):
         messagebox.showinfo("Succès", "Compte créé avec succès")
         from .home import create_home_screen
         create_home_screen(root, user)
-    except Exception as e:
-        messagebox.showerror("Erreur", f"Une erreur est survenue: {e}")
-    create_home_screen(root, user)
+
+    get_runner(root).submit(
+        create,
+        name="inscription",
+        on_done=on_done,
+        on_error=lambda e: messagebox.showerror("Erreur", f"Une erreur est survenue: {e}"),
+        busy=busy
+    )
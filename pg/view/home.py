@@ -4,12 +4,17 @@ from tkinter.ttk import Frame, Button, Label, Entry
 from tkinter import messagebox
 
 from ..data.models import User
+from ..data.vault import lock
 
 from .auth import create_login_screen
+from .search import LiveSearch
+from .tasks import get_runner, StatusBar, Task
 from . import clear_screen
 from .password import (
     add_password_tree,
-    load_passwords,
+    PasswordPager,
+    TreeSync,
+    refresh_passwords,
     toggle_password_visibility,
     create_add_password_window,
     create_edit_password_window,
@@ -28,7 +33,7 @@ def create_home_screen(root: Tk, user: User):
     
     # TODO : déplacer les bouttons d'import et export ici
 
-    Button(menu, text="Déconnexion", command=lambda: create_login_screen(root)).pack(side="right", padx=5, pady=5)
+    Button(menu, text="Déconnexion", command=lambda: logout(root, user)).pack(side="right", padx=5, pady=5)
     Button(menu, text="À propos", command=lambda: messagebox.showinfo("À propos", f"Application de gestion de mots de passe\nVersion: {__version__}\nÉditeur: {__author__}\nEmail de contact: {__email__}\nPage web: {__project_page__}\nLogiciel sous licence {__license__}")).pack(side="right", padx=5, pady=5)
     
     Label(root, text=f"Bienvenue {user.username}", font=("Arial", 14)).pack(pady=10)
@@ -41,18 +46,11 @@ def create_home_screen(root: Tk, user: User):
     search_entry.pack(side="left", padx=5)
 
     tree = add_password_tree(root)
-    load_passwords(
-        user=user,
-        tree=tree,
-        limit=10000
-    )
+    PasswordPager(tree, user).reset()
+    TreeSync(tree, user)
 
-    Button(search_frame, text="OK", command=lambda: load_passwords(
-        user=user,
-        tree=tree,
-        query=search_entry.get().strip(),
-        limit=10000
-    )).pack(side="left")
+    live_search = LiveSearch(root, search_entry, tree, user, limit=10000)
+    Button(search_frame, text="OK", command=live_search.search_now).pack(side="left")
     
     button_frame = Frame(root)
     button_frame.pack(pady=5)
@@ -61,32 +59,48 @@ def create_home_screen(root: Tk, user: User):
     Button(button_frame, text="Modifier le mot de passe", command=lambda: create_edit_password_window(root, user, tree)).pack(side="left", padx=5)
     Button(button_frame, text="Afficher/Masquer mot de passe", command=lambda: toggle_password_visibility(tree)).pack(side="left", padx=5)
     Button(button_frame, text="Supprimer le mot de passe", command=lambda: delete_selected_password(user, tree)).pack(side="left", padx=5)
+    Button(button_frame, text="Actualiser", command=lambda: reload_passwords(search_entry, live_search, tree, user)).pack(side="left", padx=5)
+    root.bind("<F5>", lambda event: reload_passwords(search_entry, live_search, tree, user))
     
     add_import_export_buttons(root, tree, user)
 
+def reload_passwords(search_entry: Entry, live_search: LiveSearch, tree, user: User):
+    """
+    Relance la recherche en cours, ou recharge la liste complète à la même position
+    """
+    if search_entry.get().strip():
+        live_search.search_now()
+    else:
+        refresh_passwords(tree, user)
+
+def logout(root: Tk, user: User):
+    get_runner(root).cancel_all()
+    lock(user.id)
+    create_login_screen(root)
+
 
 from tkinter import filedialog, messagebox
 from tkinter.ttk import Treeview
 from pathlib import Path
-from sqlalchemy.orm import Session
 
 from ..services.password import (
     export_passwords,
-    import_passwords
+    import_passwords,
+    ImportSummary
 )
-from sqlmodel import Session
-from ..data.database import engine
+from ..data.database import unit_of_work
 
 
 def add_import_export_buttons(root: Tk, tree: Treeview, user: User):
     button_frame = Frame(root)
     button_frame.pack(pady=5, fill="x")
+    status_bar = StatusBar(root)
     
     # Bouton d'export
     export_btn = Button(
         button_frame, 
         text="Exporter vers CSV",
-        command=lambda: export_passwords_gui(root, user, tree)
+        command=lambda: export_passwords_gui(root, user, tree, status_bar, busy=(export_btn, import_btn))
     )
     export_btn.pack(side="left", padx=5)
     
@@ -94,84 +108,133 @@ def add_import_export_buttons(root: Tk, tree: Treeview, user: User):
     import_btn = Button(
         button_frame,
         text="Importer depuis CSV",
-        command=lambda: import_passwords_gui(root, user, tree)
+        command=lambda: import_passwords_gui(root, user, tree, status_bar, busy=(export_btn, import_btn))
     )
     import_btn.pack(side="left", padx=5)
 
-def export_passwords_gui(root: Tk, user: User, tree: Treeview):
-    try:
-        # Demander le chemin de sauvegarde
-        file_path = filedialog.asksaveasfilename(
-            defaultextension=".csv",
-            filetypes=[("Fichiers CSV", "*.csv")],
-            initialfile="passwords_export.csv"
-        )
-        
-        if not file_path:  # Si l'utilisateur annule
-            return
-            
-        file_path = Path(file_path)
+def export_passwords_gui(root: Tk, user: User, tree: Treeview, status_bar: StatusBar=None, busy=()):
+    # Demander le chemin de sauvegarde
+    file_path = filedialog.asksaveasfilename(
+        defaultextension=".csv",
+        filetypes=[("Fichiers CSV", "*.csv")],
+        initialfile="passwords_export.csv"
+    )
+    
+    if not file_path:  # Si l'utilisateur annule
+        return
         
-        with Session(engine) as session:
-            export_passwords(
+    file_path = Path(file_path)
+
+    def export(task: Task) -> list[int]:
+        def progress(written: int):
+            task.report(written)
+            task.raise_if_cancelled()
+
+        with unit_of_work("export") as session:
+            return export_passwords(
                 session=session,
                 user=user,
-                file_path=file_path
+                file_path=file_path,
+                on_progress=progress
             )
-        
+
+    def on_done(failed_ids: list[int]):
+        if status_bar:
+            status_bar.hide(task)
         messagebox.showinfo(
             "Export réussi",
             f"Les mots de passe ont été exportés avec succès vers:\n{file_path}"
         )
-        
-        # Rafraîchir l'affichage
-        load_passwords(
-            tree=tree,
-            user=user,
-            limit=10000
-        )
-    except Exception as e:
+        if failed_ids:
+            messagebox.showwarning(
+                "Export incomplet",
+                f"Mots de passe impossibles à déchiffrer (exportés sans mot de passe):\n{', '.join(map(str, failed_ids))}"
+            )
+
+    def on_error(e: Exception):
+        if status_bar:
+            status_bar.hide(task)
         messagebox.showerror(
             "Erreur d'export",
             f"Une erreur est survenue lors de l'export:\n{str(e)}"
         )
 
-def import_passwords_gui(root: Tk, user: User, tree: Treeview):
-    try:
-        # Demander le fichier à importer
-        file_path = filedialog.askopenfilename(
-            filetypes=[("Fichiers CSV", "*.csv")],
-            title="Sélectionnez le fichier CSV à importer"
-        )
-        
-        if not file_path:  # Si l'utilisateur annule
-            return
-            
-        file_path = Path(file_path)
-        
-        # Confirmation avant import
-        if not messagebox.askyesno(
-            "Confirmation",
-            "Êtes-vous sûr de vouloir importer ces mots de passe?\n"
-            "Les doublons seront ignorés."
-        ):
-            return
-            
-        import_passwords(user, file_path)
+    def on_cancel():
+        if status_bar:
+            status_bar.hide(task)
+        file_path.unlink(missing_ok=True)  # Ne pas laisser un export partiel
+        messagebox.showinfo("Export annulé", "L'export a été annulé.")
+
+    task = get_runner(root).submit(
+        export,
+        name="export",
+        on_done=on_done,
+        on_error=on_error,
+        on_cancel=on_cancel,
+        on_progress=lambda written: status_bar and status_bar.update_text(f"Export en cours... {written} mots de passe"),
+        busy=busy
+    )
+    if status_bar:
+        status_bar.show(task, "Export en cours...")
+
+def import_passwords_gui(root: Tk, user: User, tree: Treeview, status_bar: StatusBar=None, busy=()):
+    # Demander le fichier à importer
+    file_path = filedialog.askopenfilename(
+        filetypes=[("Fichiers CSV", "*.csv")],
+        title="Sélectionnez le fichier CSV à importer"
+    )
+    
+    if not file_path:  # Si l'utilisateur annule
+        return
         
+    file_path = Path(file_path)
+    
+    # Confirmation avant import
+    if not messagebox.askyesno(
+        "Confirmation",
+        "Êtes-vous sûr de vouloir importer ces mots de passe?\n"
+        "Les doublons seront ignorés."
+    ):
+        return
+
+    def import_(task: Task) -> ImportSummary:
+        def progress(summary: ImportSummary):
+            task.report(summary.processed)
+            # Les lots déjà validés restent importés
+            task.raise_if_cancelled()
+
+        return import_passwords(user, file_path, on_progress=progress)
+
+    def on_done(summary: ImportSummary):
+        if status_bar:
+            status_bar.hide(task)
         messagebox.showinfo(
-            "Import réussi",
-            "Les mots de passe ont été importés avec succès!"
-        )
-        
-        # Rafraîchir l'affichage
-        load_passwords(
-            tree=tree,
-            user=user,
-            limit=10000
+            "Import terminé",
+            f"{summary.inserted} mots de passe importés, {summary.skipped} doublons ignorés, {len(summary.failed)} lignes en échec."
+            + "".join(f"\nLigne {line}: {reason}" for line, reason in summary.failed[:10])
         )
-    except Exception as e:
+
+    def on_error(e: Exception):
+        if status_bar:
+            status_bar.hide(task)
         messagebox.showerror(
             "Erreur d'import",
             f"Une erreur est survenue lors de l'import:\n{str(e)}"
         )
+
+    def on_cancel():
+        if status_bar:
+            status_bar.hide(task)
+        messagebox.showinfo("Import interrompu", "L'import a été interrompu : les lots déjà traités ont été conservés.")
+
+    task = get_runner(root).submit(
+        import_,
+        name="import",
+        on_done=on_done,
+        on_error=on_error,
+        on_cancel=on_cancel,
+        on_progress=lambda processed: status_bar and status_bar.update_text(f"Import en cours... {processed} lignes traitées"),
+        busy=busy
+    )
+    if status_bar:
+        status_bar.show(task, "Import en cours...")
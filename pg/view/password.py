@@ -1,18 +1,32 @@
 # pg.view.password.py
+from itertools import repeat
+from queue import Queue, Empty
+from threading import current_thread, main_thread
+from typing import Callable
+from weakref import WeakKeyDictionary
 from tkinter import Tk, Toplevel, Text, Scrollbar
 from tkinter.ttk import Treeview, Frame, Label, Entry, Button
 from tkinter import messagebox
-from sqlmodel import Session
+from sqlalchemy import Engine
 
-from ..services.password import similar_passwords
+from ..services.password import search_passwords
 
 from ..data.models import User, Password
-from ..data.database import engine
+from ..data.database import engine, unit_of_work
+from ..data.vault import vault_for
+from ..data.events import ChangeKind, PasswordChange, subscribe
+
+from .tasks import get_runner
 
 MASKED_PASSWORD = "●●●●●"
 
+DECRYPTION_FAILED = "⚠ illisible"
+
 NOT_SPECIFIED = ""
 
+PAGE_SIZE = 100        # Lignes chargées par page
+PREFETCH_MARGIN = 0.8  # Page suivante chargée quand le bas de la vue dépasse cette fraction de la liste
+
 COLUMNS = ("ID", "URL", "Identifiant", "Mot de passe", "Email", "Téléphone", "Date de création", "Date de modification")
 
 def add_password_tree(root: Tk) -> Treeview:
@@ -27,7 +41,7 @@ def add_password_tree(root: Tk) -> Treeview:
     
     # Ajout de la scrollbar verticale
     vsb = Scrollbar(container, orient="vertical", command=tree.yview)
-    tree.configure(yscrollcommand=vsb.set)
+    tree.configure(yscrollcommand=lambda first, last: on_tree_scroll(tree, vsb, first, last))
     
     # Placement des éléments dans le container
     tree.grid(row=0, column=0, sticky="nsew")
@@ -61,64 +75,282 @@ def update_description(tree: Treeview):
     if not password_id:
         return
     
-    password = Password.get_by_id(password_id) 
+    def fetch(task) -> Password | None:
+        return Password.get_by_id(password_id)
 
-    if password is None:
-        messagebox.showerror("Erreur", "Impossible de récupérer les détails du mot de passe.")
-        return
+    def on_done(password: Password | None):
+        if password is None:
+            messagebox.showerror("Erreur", "Impossible de récupérer les détails du mot de passe.")
+            return
+        if not tree.exists(item_id) or tree.selection()[:1] != (item_id,):
+            return  # La sélection a changé pendant le chargement
 
-    # Supprimer toute ligne de description existante
-    for child in tree.get_children():
-        if tree.item(child, "tags") == ("description",):
-            tree.delete(child)
+        # Supprimer toute ligne de description existante
+        for child in tree.get_children():
+            if tree.item(child, "tags") == ("description",):
+                tree.delete(child)
 
-    description_text = password.description if password.description else "Aucune description disponible"
+        description_text = password.description if password.description else "Aucune description disponible"
 
-    tree.insert(
-        "", 
-        tree.index(item_id) + 1,  # Position après l'élément sélectionné
-        values=("", description_text),  # Première colonne vide pour alignement
-        tags=("description",)  # Tag pour identifier la ligne
+        tree.insert(
+            "", 
+            tree.index(item_id) + 1,  # Position après l'élément sélectionné
+            values=("", description_text),  # Première colonne vide pour alignement
+            tags=("description",)  # Tag pour identifier la ligne
+        )
+
+    get_runner(tree.winfo_toplevel()).submit(fetch, name="description", on_done=on_done)
+
+def password_row(pwd: Password, clear_password: str) -> tuple:
+    """
+    Retourne les valeurs d'une ligne du tableau des mots de passe
+    """
+    return (
+        pwd.id,
+        pwd.url, 
+        pwd.key, 
+        clear_password,
+        pwd.email or NOT_SPECIFIED,
+        pwd.phone or NOT_SPECIFIED,
+        pwd.date_added,
+        pwd.date_updated
     )
 
-def load_passwords(tree: Treeview, user: User, query: str=None, limit: int=15, decrypted_passwords: bool=False):
-    for row in tree.get_children():
-        tree.delete(row)
-    
-    with Session(engine) as session:
-        user = session.get(User, user.id)
-        pwds = similar_passwords(
+def fetch_password_rows(user: User, query: str=None, limit: int=15, decrypted_passwords: bool=False, engine: Engine=engine) -> list[tuple]:
+    """
+    Charge et met en forme les lignes du tableau, sans toucher à Tk (utilisable depuis un thread de travail)
+    """
+    vault = vault_for(user)
+    with unit_of_work("chargement des mots de passe", engine) as session:
+        pwds = search_passwords(
             session=session,
             user=user,
             query=query,
             limit=limit
-        ) if query else user.passwords[:limit]
-        if query and not pwds:
-            messagebox.showinfo("Aucun résultat", f"Aucun mot de passe ne correspond à la recherche \"{query}\".")
+        ) if query else Password.page(user.id, limit=limit, session=session)[0]
+        clear_passwords = (
+            decrypted.password if decrypted.ok else DECRYPTION_FAILED
+            for decrypted in vault.decrypt_many([pwd.password_encrypted for pwd in pwds], use_processes=False)  # Jamais de fork depuis l'application Tk
+        ) if decrypted_passwords else repeat(MASKED_PASSWORD)
+        return [password_row(pwd, clear_password) for pwd, clear_password in zip(pwds, clear_passwords)]
+
+class PasswordPager:
+    """
+    Liste virtuelle des mots de passe : seules les pages visibles (plus une marge) sont chargées et mises en forme,
+    les suivantes le sont au défilement. Les lignes ont pour identifiant Tk celui du mot de passe.
+    """
+
+    def __init__(self, tree: Treeview, user: User, page_size: int=PAGE_SIZE):
+        self.tree = tree
+        self.user = user
+        self.page_size = page_size
+        self.cursor: tuple | None = None
+        self.exhausted = False
+        self.active = False
+        self._loading = False
+        self._generation = 0  # Incrémenté à chaque rechargement : les pages demandées pour une liste précédente sont ignorées
+        self._rows_to_load = 0
+        self._on_loaded: Callable[[], None] | None = None
+        _pagers[tree] = self
+
+    @property
+    def loaded(self) -> int:
+        return sum(1 for item in self.tree.get_children() if self.tree.item(item, "tags") != ("description",))
+
+    def reset(self, rows_to_load: int | None = None, on_loaded: Callable[[], None] | None = None):
+        """
+        Vide le tableau et charge la première page (ou assez de pages pour couvrir `rows_to_load` lignes),
+        puis appelle `on_loaded`
+        """
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+        self.cursor, self.exhausted, self.active = None, False, True
+        self._generation += 1
+        self._loading = False
+        self._rows_to_load, self._on_loaded = rows_to_load or 0, on_loaded
+        self.load_next_page()
+
+    def load_next_page(self):
+        """
+        Charge la page suivante dans un thread de travail ; les lignes sont ajoutées au tableau depuis la boucle Tk
+        """
+        if self.exhausted or self._loading:
+            return
+        self._loading = True
+        generation, cursor = self._generation, self.cursor
+
+        def fetch(task) -> tuple[list[Password], tuple | None]:
+            return Password.page(self.user.id, after=cursor, limit=self.page_size)
+
+        def on_done(page: tuple[list[Password], tuple | None]):
+            if generation != self._generation:
+                return  # Liste rechargée ou remplacée par des résultats de recherche entre-temps
+            self._loading = False
+            passwords, self.cursor = page
+            self.exhausted = self.cursor is None
+            for pwd in passwords:
+                if not self.tree.exists(str(pwd.id)):
+                    self.tree.insert("", "end", iid=str(pwd.id), values=password_row(pwd, MASKED_PASSWORD))
+            if not self.exhausted and self.loaded < self._rows_to_load:
+                self.load_next_page()
+            elif (on_loaded := self._on_loaded) is not None:
+                self._on_loaded = None
+                on_loaded()
+
+        def on_error(e: Exception):
+            if generation == self._generation:
+                self._loading = False
+            messagebox.showerror("Erreur", f"Une erreur est survenue: {e}")
+
+        get_runner(self.tree.winfo_toplevel()).submit(fetch, name="chargement d'une page", on_done=on_done, on_error=on_error)
+
+    def refresh(self):
+        """
+        Recharge les lignes déjà affichées en conservant la position de défilement et la sélection
+        """
+        first, _ = self.tree.yview()
+        selection = self.tree.selection()
+
+        def restore():
+            self.tree.yview_moveto(first)
+            if (still_there := [item for item in selection if self.tree.exists(item)]):
+                self.tree.selection_set(still_there)
+
+        self.reset(rows_to_load=self.loaded, on_loaded=restore)
+
+    def deactivate(self):
+        """
+        Suspend le chargement au défilement (le tableau affiche des résultats de recherche)
+        """
+        self.active = False
+        self._generation += 1
+        self._loading = False
+
+_pagers: "WeakKeyDictionary[Treeview, PasswordPager]" = WeakKeyDictionary()
+
+def get_pager(tree: Treeview) -> PasswordPager | None:
+    return _pagers.get(tree)
+
+def on_tree_scroll(tree: Treeview, scrollbar: Scrollbar, first: str, last: str):
+    scrollbar.set(first, last)
+    pager = get_pager(tree)
+    if pager and pager.active and not pager.exhausted and float(last) >= PREFETCH_MARGIN:
+        tree.after_idle(pager.load_next_page)
+
+CHANGES_POLL_MS = 100
+
+class TreeSync:
+    """
+    Applique en place au tableau les créations, modifications et suppressions de mots de passe de l'utilisateur
+    (voir `pg.data.events`) au lieu de tout recharger. Un import est appliqué en un seul lot.
+    """
+
+    def __init__(self, tree: Treeview, user: User):
+        self.tree = tree
+        self.user = user
+        self._queue: Queue = Queue()
+        self._unsubscribe = subscribe(self._on_changes)
+        self._poll_id = tree.after(CHANGES_POLL_MS, self._poll)
+        tree.bind("<Destroy>", lambda event: self.close() if event.widget is tree else None, add="+")
+        _syncs[tree] = self
+
+    def _on_changes(self, changes: list[PasswordChange]):
+        if not (changes := [change for change in changes if change.user_id == self.user.id]):
+            return
+        if current_thread() is main_thread():
+            self.apply(changes)
         else:
-            for pwd in pwds:
-                tree.insert("", "end", values=(
-                    pwd.id,
-                    pwd.url, 
-                    pwd.key, 
-                    pwd.password if decrypted_passwords else MASKED_PASSWORD,
-                    pwd.email or NOT_SPECIFIED,
-                    pwd.phone or NOT_SPECIFIED,
-                    pwd.date_added,
-                    pwd.date_updated
-                ))
+            # Les widgets Tk ne se manipulent que depuis la boucle principale, qui relève la file
+            self._queue.put(changes)
+
+    def _poll(self):
+        self.flush()
+        self._poll_id = self.tree.after(CHANGES_POLL_MS, self._poll)
+
+    def flush(self):
+        """
+        Applique sans attendre les modifications notifiées depuis un thread de travail
+        """
+        try:
+            while True:
+                self.apply(self._queue.get_nowait())
+        except Empty:
+            pass
+
+    def apply(self, changes: list[PasswordChange]):
+        pager = get_pager(self.tree)
+        for change in changes:
+            iid = str(change.password_id)
+            match change.kind:
+                case ChangeKind.DELETED:
+                    if self.tree.exists(iid):
+                        self._remove_description(iid)
+                        self.tree.delete(iid)
+                case ChangeKind.UPDATED:
+                    if self.tree.exists(iid):
+                        shown = self.tree.set(iid, "Mot de passe")
+                        clear_password = MASKED_PASSWORD if shown == MASKED_PASSWORD else change.password.password
+                        self.tree.item(iid, values=password_row(change.password, clear_password))
+                case ChangeKind.CREATED:
+                    # Liste paginée par identifiant croissant : une nouvelle ligne n'est visible qu'une fois la liste
+                    # entièrement chargée, sinon elle arrivera avec les pages suivantes ; rien à faire sur des résultats de recherche
+                    if pager and pager.active and pager.exhausted and not self.tree.exists(iid):
+                        self.tree.insert("", "end", iid=iid, values=password_row(change.password, MASKED_PASSWORD))
+
+    def _remove_description(self, iid: str):
+        following = self.tree.next(iid)
+        if following and self.tree.item(following, "tags") == ("description",):
+            self.tree.delete(following)
+
+    def close(self):
+        self._unsubscribe()
+        if self._poll_id is not None:
+            try:
+                self.tree.after_cancel(self._poll_id)
+            except Exception:
+                pass
+            self._poll_id = None
+
+_syncs: "WeakKeyDictionary[Treeview, TreeSync]" = WeakKeyDictionary()
+
+def sync_tree(tree: Treeview):
+    """
+    Reporte immédiatement au tableau les modifications validées par un traitement qui vient de se terminer
+    """
+    if (sync := _syncs.get(tree)) is not None:
+        sync.flush()
+
+def refresh_passwords(tree: Treeview, user: User):
+    """
+    Recharge le tableau depuis la base (modifications faites par un autre processus : console, serveur)
+    en conservant la position de défilement et la sélection
+    """
+    if (pager := get_pager(tree)) is None:
+        PasswordPager(tree, user).reset()
+    else:
+        pager.refresh()
 
 def toggle_password_visibility(tree: Treeview):
     row        = tree.focus()
+    if not row:
+        return
     values     = tree.item(row)["values"]
     new_values = list(values)
     
-    if values[3] == MASKED_PASSWORD:
-        new_values[3] = Password.get_by_id(values[0]).password
-    else:
+    if values[3] != MASKED_PASSWORD:
         new_values[3]  = MASKED_PASSWORD
+        tree.item(row, values=tuple(new_values))
+        return
+
+    def reveal(task) -> str:
+        return Password.get_by_id(values[0], load_user=True).password
 
-    tree.item(row, values=tuple(new_values))
+    def on_done(clear_password: str):
+        if tree.exists(row):
+            new_values[3] = clear_password
+            tree.item(row, values=tuple(new_values))
+
+    get_runner(tree.winfo_toplevel()).submit(reveal, name="affichage du mot de passe", on_done=on_done)
 
 def create_add_password_window(root: Tk, user: User, tree):
     add_window = Toplevel(root)
@@ -155,23 +387,29 @@ def create_add_password_window(root: Tk, user: User, tree):
     phone_entry.pack()
     
     def save_password():
-        try:
-            Password.create(
-                user_id=user.id,
-                url=url_entry.get(),
-                description=description_text.get("1.0", "end").strip() or None,
-                key=key_entry.get(),
-                password=password_entry.get(),
-                email=email_entry.get() or None,
-                phone=phone_entry.get() or None
-            )
+        # Champs lus dans la boucle Tk, enregistrement (chiffrement compris) dans un thread de travail
+        fields = dict(
+            user_id=user.id,
+            url=url_entry.get(),
+            description=description_text.get("1.0", "end").strip() or None,
+            key=key_entry.get(),
+            password=password_entry.get(),
+            email=email_entry.get() or None,
+            phone=phone_entry.get() or None
+        )
+
+        def create(task):
+            Password.create(**fields)
+
+        def on_done(_):
+            sync_tree(tree)
             messagebox.showinfo("Succès", "Mot de passe ajouté avec succès")
             add_window.destroy()
-            load_passwords(user=user, tree=tree, limit=10000)
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Une erreur est survenue: {e}")
+
+        get_runner(root).submit(create, name="ajout d'un mot de passe", on_done=on_done, busy=(save_button,))
     
-    Button(add_window, text="Enregistrer", command=save_password).pack(pady=10)
+    save_button = Button(add_window, text="Enregistrer", command=save_password)
+    save_button.pack(pady=10)
     Button(add_window, text="Annuler", command=add_window.destroy).pack()
 
 def create_edit_password_window(root: Tk, user: User, tree):
@@ -181,11 +419,19 @@ def create_edit_password_window(root: Tk, user: User, tree):
         return
     
     password_id = tree.item(selected_item, "values")[0]
-    password = Password.get_by_id(password_id)
-    if password is None or password.user_id != user.id:
-        messagebox.showerror("Erreur", "Mot de passe introuvable ou non autorisé.")
-        return
-    
+
+    def fetch(task) -> Password | None:
+        return Password.get_by_id(password_id)
+
+    def on_done(password: Password | None):
+        if password is None or password.user_id != user.id:
+            messagebox.showerror("Erreur", "Mot de passe introuvable ou non autorisé.")
+            return
+        open_edit_password_window(root, tree, password)
+
+    get_runner(root).submit(fetch, name="modification d'un mot de passe", on_done=on_done)
+
+def open_edit_password_window(root: Tk, tree: Treeview, password: Password):
     edit_window = Toplevel(root)
     edit_window.title("Modifier un mot de passe")
     edit_window.geometry("400x400")
@@ -205,19 +451,24 @@ def create_edit_password_window(root: Tk, user: User, tree):
     password_entry.pack()
     
     def update_password():
-        try:
-            password.update(
-                description=description_text.get("1.0", "end").strip() or None,
-                key=key_entry.get(),
-                password=password_entry.get() or None
-            )
+        fields = dict(
+            description=description_text.get("1.0", "end").strip() or None,
+            key=key_entry.get(),
+            password=password_entry.get() or None
+        )
+
+        def update(task):
+            password.update(**fields)
+
+        def on_done(_):
+            sync_tree(tree)
             messagebox.showinfo("Succès", "Mot de passe modifié avec succès")
             edit_window.destroy()
-            load_passwords(user=user, tree=tree, limit=10000)
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Une erreur est survenue: {e}")
+
+        get_runner(root).submit(update, name="modification d'un mot de passe", on_done=on_done, busy=(save_button,))
     
-    Button(edit_window, text="Enregistrer", command=update_password).pack(pady=10)
+    save_button = Button(edit_window, text="Enregistrer", command=update_password)
+    save_button.pack(pady=10)
     Button(edit_window, text="Annuler", command=edit_window.destroy).pack()
 
 def delete_selected_password(user: User, tree: Treeview):
@@ -229,10 +480,14 @@ def delete_selected_password(user: User, tree: Treeview):
     password_id = tree.item(selected_item, "values")[0]
     confirmation = messagebox.askyesno("Confirmation", "Voulez-vous vraiment supprimer ce mot de passe ?")
     
-    if confirmation:
-        try:
-            Password.delete_by_id(password_id)
-            messagebox.showinfo("Succès", "Mot de passe supprimé avec succès")
-            load_passwords(user=user, tree=tree, limit=10000)
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Une erreur est survenue: {e}")
\ No newline at end of file
+    if not confirmation:
+        return
+
+    def delete(task):
+        Password.delete_by_id(password_id)
+
+    def on_done(_):
+        sync_tree(tree)
+        messagebox.showinfo("Succès", "Mot de passe supprimé avec succès")
+
+    get_runner(tree.winfo_toplevel()).submit(delete, name="suppression d'un mot de passe", on_done=on_done)
\ No newline at end of file
@@ -0,0 +1,122 @@
+# pg.view.search.py
+"""
+Recherche instantanée : la saisie est temporisée, la requête s'exécute dans un thread de travail
+et les résultats sont appliqués au tableau depuis la boucle Tk
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from queue import Queue, Empty
+from tkinter import Tk, messagebox
+from tkinter.ttk import Entry, Treeview
+
+from ..data.models import User
+
+from .password import fetch_password_rows, get_pager
+
+SEARCH_DEBOUNCE_MS = 250    # Délai sans frappe avant de lancer la recherche
+POLL_INTERVAL_MS = 16       # Une image à 60 Hz
+ROWS_PER_FRAME = 200        # Lignes insérées par passage dans la boucle Tk
+
+
+class LiveSearch:
+    def __init__(self, root: Tk, entry: Entry, tree: Treeview, user: User, limit: int=10000):
+        self.root = root
+        self.entry = entry
+        self.tree = tree
+        self.user = user
+        self.limit = limit
+        self._generation = 0
+        self._debounce_id = None
+        self._poll_id = None
+        self._pending_rows = iter(())
+        self._has_pending_rows = False
+        self._last_query: str | None = None
+        self._in_flight = 0
+        self._results: Queue = Queue()
+        # Un seul travailleur : les requêtes dépassées sont abandonnées avant même de s'exécuter
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pg-search")
+
+        entry.bind("<KeyRelease>", self._on_key, add="+")
+        entry.bind("<Return>", lambda event: self.search_now(), add="+")
+        tree.bind("<Destroy>", lambda event: self.close() if event.widget is tree else None, add="+")
+
+    def _on_key(self, event=None):
+        if self.entry.get().strip() == self._last_query:
+            return  # Touche sans effet sur la saisie (flèches, Entrée déjà traitée...)
+        if self._debounce_id is not None:
+            self.root.after_cancel(self._debounce_id)
+        self._debounce_id = self.root.after(SEARCH_DEBOUNCE_MS, self.search_now)
+
+    def search_now(self):
+        """
+        Lance immédiatement la recherche correspondant à la saisie actuelle (annule la précédente)
+        """
+        if self._debounce_id is not None:
+            self.root.after_cancel(self._debounce_id)
+            self._debounce_id = None
+        self._generation += 1
+        self._pending_rows, self._has_pending_rows = iter(()), False
+        self._last_query = self.entry.get().strip()
+        pager = get_pager(self.tree)
+        if not self._last_query and pager is not None:
+            pager.reset()  # Saisie vide : retour à la liste complète, chargée page par page
+            return
+        if pager is not None:
+            pager.deactivate()
+        self._in_flight += 1
+        self._executor.submit(self._run, self._generation, self._last_query)
+        if self._poll_id is None:
+            self._poll_id = self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def _run(self, generation: int, query: str):
+        # Exécuté dans le thread de travail : aucune opération Tk ici
+        if generation != self._generation:
+            self._results.put((generation, None, None))  # Dépassée avant d'avoir commencé
+            return
+        try:
+            rows = fetch_password_rows(user=self.user, query=query or None, limit=self.limit)
+            self._results.put((generation, rows, None))
+        except Exception as e:
+            self._results.put((generation, None, e))
+
+    def _poll(self):
+        self._poll_id = None
+        try:
+            while True:
+                generation, rows, error = self._results.get_nowait()
+                self._in_flight -= 1
+                if generation != self._generation:
+                    continue  # Résultat d'une recherche dépassée
+                if error is not None:
+                    messagebox.showerror("Erreur", f"Une erreur est survenue: {error}")
+                    continue
+                for item in self.tree.get_children():
+                    self.tree.delete(item)
+                self._pending_rows, self._has_pending_rows = iter(rows), bool(rows)
+        except Empty:
+            pass
+
+        # Insertion par tranches pour ne jamais bloquer la boucle plus d'une image
+        if self._has_pending_rows:
+            chunk = list(islice(self._pending_rows, ROWS_PER_FRAME))
+            for values in chunk:
+                self.tree.insert("", "end", iid=str(values[0]), values=values)
+            self._has_pending_rows = len(chunk) == ROWS_PER_FRAME
+
+        if self._has_pending_rows or self._in_flight:
+            self._poll_id = self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def close(self):
+        """
+        Arrête la recherche (à la destruction du tableau) : les recherches en cours sont ignorées
+        """
+        self._generation += 1
+        for after_id in (self._debounce_id, self._poll_id):
+            if after_id is not None:
+                try:
+                    self.root.after_cancel(after_id)
+                except Exception:
+                    pass
+        self._debounce_id = self._poll_id = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,205 @@
+# pg.view.tasks.py
+"""
+Exécution des traitements bloquants (base de données, hachage, chiffrement) hors de la boucle Tk :
+un groupe de threads de travail, une file de résultats relevée par `root.after`, le suivi de progression
+et l'annulation
+"""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue, Empty
+from threading import Event
+from tkinter import Tk, TclError, Misc, messagebox
+from tkinter.ttk import Frame, Label, Button, Progressbar
+from typing import Any, Callable, Iterable
+from weakref import WeakKeyDictionary
+
+from ..data.database import unit_of_work
+
+POLL_INTERVAL_MS = 30
+MAX_WORKERS = 2
+
+
+class TaskCancelled(Exception):
+    """Levée dans un traitement dont l'annulation a été demandée"""
+
+
+class Task:
+    """
+    Traitement soumis au `TaskRunner`. Le traitement reçoit sa tâche pour signaler sa progression
+    (`report`) et vérifier s'il doit s'arrêter (`raise_if_cancelled`).
+    """
+
+    def __init__(self, runner: "TaskRunner", name: str):
+        self.runner = runner
+        self.name = name
+        self._cancelled = Event()
+        self.done = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """
+        Demande l'arrêt du traitement ; il s'arrête au prochain appel de `raise_if_cancelled`
+        """
+        self._cancelled.set()
+
+    def raise_if_cancelled(self):
+        if self._cancelled.is_set():
+            raise TaskCancelled(self.name)
+
+    def report(self, progress: Any):
+        """
+        Signale une progression (depuis le thread de travail) ; elle est transmise à `on_progress` dans la boucle Tk
+        """
+        self.runner._events.put((self, "progress", progress))
+
+
+class TaskRunner:
+    """
+    Groupe de threads de travail rattaché à une fenêtre Tk. Les fonctions de rappel (`on_done`, `on_error`,
+    `on_progress`, `on_cancel`) sont toujours exécutées dans la boucle Tk.
+    """
+
+    def __init__(self, root: Tk, max_workers: int = MAX_WORKERS):
+        self.root = root
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pg-task")
+        self._events: Queue = Queue()
+        self._callbacks: dict[Task, dict[str, Callable | None]] = {}
+        self._poll_id = None
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._callbacks)
+
+    def submit(self, job: Callable[[Task], Any], name: str = "", on_done: Callable[[Any], None] | None = None, on_error: Callable[[Exception], None] | None = None, on_progress: Callable[[Any], None] | None = None, on_cancel: Callable[[], None] | None = None, busy: Iterable[Misc] = ()) -> Task:
+        """
+        Exécute `job(task)` dans un thread de travail, dans une unité de travail nommée d'après la tâche.
+        Les widgets de `busy` sont désactivés (et le curseur passe en attente) jusqu'à la fin du traitement.
+        """
+        task = Task(self, name or getattr(job, "__name__", "tâche"))
+        busy = [widget for widget in busy if widget is not None]
+        self._callbacks[task] = {
+            "done": on_done,
+            "error": on_error or (lambda e: messagebox.showerror("Erreur", f"Une erreur est survenue: {e}")),
+            "progress": on_progress,
+            "cancel": on_cancel,
+            "busy": busy,
+        }
+        self._set_busy(busy, True)
+        self._executor.submit(self._run, task, job)
+        if self._poll_id is None:
+            self._poll_id = self.root.after(POLL_INTERVAL_MS, self._poll)
+        return task
+
+    def _run(self, task: Task, job: Callable[[Task], Any]):
+        # Exécuté dans un thread de travail : aucune opération Tk ici
+        try:
+            task.raise_if_cancelled()
+            # Une session et une transaction par traitement, annulée si le traitement échoue ou est annulé
+            with unit_of_work(task.name):
+                result = job(task)
+            self._events.put((task, "done", result))
+        except TaskCancelled:
+            self._events.put((task, "cancel", None))
+        except Exception as e:
+            self._events.put((task, "error", e))
+
+    def _poll(self):
+        self._poll_id = None
+        try:
+            while True:
+                task, kind, payload = self._events.get_nowait()
+                if (callbacks := self._callbacks.get(task)) is None:
+                    continue
+                if kind != "progress":
+                    task.done = True
+                    del self._callbacks[task]
+                    self._set_busy(callbacks["busy"], False)
+                if (callback := callbacks[kind]) is None:
+                    continue
+                try:
+                    callback() if kind == "cancel" else callback(payload)
+                except TclError:
+                    pass  # Les widgets concernés ont été détruits entre-temps (déconnexion...)
+                except Exception:
+                    self.root.report_callback_exception(*sys.exc_info())
+        except Empty:
+            pass
+        if self._callbacks:
+            self._poll_id = self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def _set_busy(self, widgets: list[Misc], busy: bool):
+        for widget in widgets:
+            try:
+                if widget.winfo_exists():
+                    widget.configure(state="disabled" if busy else "normal")
+            except TclError:
+                pass
+        try:
+            self.root.configure(cursor="watch" if self.busy else "")
+        except TclError:
+            pass
+
+    def cancel_all(self):
+        for task in list(self._callbacks):
+            task.cancel()
+
+    def shutdown(self):
+        """
+        Annule les traitements en cours et libère les threads de travail
+        """
+        self.cancel_all()
+        if self._poll_id is not None:
+            try:
+                self.root.after_cancel(self._poll_id)
+            except TclError:
+                pass
+            self._poll_id = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_runners: "WeakKeyDictionary[Tk, TaskRunner]" = WeakKeyDictionary()
+
+def get_runner(root: Tk) -> TaskRunner:
+    """
+    Retourne le gestionnaire de traitements de la fenêtre, créé au premier appel
+    """
+    if (runner := _runners.get(root)) is None:
+        runner = _runners[root] = TaskRunner(root)
+    return runner
+
+
+class StatusBar(Frame):
+    """
+    Barre d'état d'un traitement long : libellé, barre de progression et bouton d'annulation, masquée au repos
+    """
+
+    def __init__(self, master: Misc, **kwargs):
+        super().__init__(master, **kwargs)
+        self.label = Label(self)
+        self.label.pack(side="left", padx=5)
+        self.progressbar = Progressbar(self, mode="indeterminate", length=150)
+        self.progressbar.pack(side="left", padx=5)
+        self.cancel_button = Button(self, text="Annuler")
+        self.cancel_button.pack(side="left", padx=5)
+        self._task: Task | None = None
+
+    def show(self, task: Task, text: str):
+        self._task = task
+        self.label.configure(text=text)
+        self.cancel_button.configure(command=task.cancel)
+        self.progressbar.start(15)
+        self.pack(pady=5)
+
+    def update_text(self, text: str):
+        self.label.configure(text=text)
+
+    def hide(self, task: Task | None = None):
+        if task is not None and task is not self._task:
+            return
+        self._task = None
+        self.progressbar.stop()
+        self.pack_forget()